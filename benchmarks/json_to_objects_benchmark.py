@@ -0,0 +1,64 @@
+"""
+Measures the cost of turning decoded Graph API responses into models with json_to_objects,
+against the old path which re-serialized every object with json.dumps and parsed it again with json.loads.
+
+Run with:
+
+    python benchmarks/json_to_objects_benchmark.py
+
+"""
+import copy
+import json
+import timeit
+
+from pyfacebook import models
+from pyfacebook.utils import json_to_objects
+
+OBJECT_COUNT = 10000
+REPEAT = 3
+
+
+def adgroup_dicts(count=OBJECT_COUNT):
+    """
+    Returns a list of decoded adgroup dicts shaped like the ones in Graph API responses.
+
+    """
+    return [{u'id': 6000000000000 + i,
+             u'name': u'adgroup ' + unicode(i),
+             u'account_id': 106929496119713,
+             u'campaign_id': 6010000000000 + i % 50,
+             u'adgroup_status': u'ACTIVE',
+             u'bid_type': u'CPM',
+             u'bid_info': {u'IMPRESSIONS': 2},
+             u'creative_ids': [6020000000000 + i],
+             u'creative': {u'creative_id': 6020000000000 + i},
+             u'last_updated_by_app_id': 1234567890,
+             u'created_time': 1393632000 + i,
+             u'updated_time': 1393632000 + i} for i in range(count)]
+
+
+def legacy_json_to_objects(list_or_dict, model):
+    for index, obj in enumerate(list_or_dict):
+        list_or_dict[index] = model(from_json=json.dumps(obj))
+    return list_or_dict
+
+
+def best_time(function, data):
+    return min(timeit.repeat(lambda: function(copy.copy(data)), number=1, repeat=REPEAT))
+
+
+def main():
+    data = adgroup_dicts()
+    results = [
+        ('json.dumps/json.loads round trip', best_time(lambda d: legacy_json_to_objects(d, models.AdGroup), data)),
+        ('json_to_objects (from_dict)', best_time(lambda d: json_to_objects(d, models.AdGroup), data)),
+        ('json_to_objects (from_dict, validate=False)',
+         best_time(lambda d: json_to_objects(d, models.AdGroup, validate=False), data)),
+    ]
+    print "AdGroup hydration, seconds per", OBJECT_COUNT, "objects (best of", str(REPEAT) + "):"
+    for name, seconds in results:
+        print "  %-45s %.3f" % (name, seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+"""
+Benchmarks the hot paths of PyFacebook: param encoding, call_graph_api, json_to_objects, AdBase construction,
+attribute access and validation, pagination and to_json. Payloads are the responses recorded under caliendo/cache,
+replayed many times over, and synthetic large payloads. Nothing is sent to Facebook.
+
+Run with:
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --compare results.json
+
+Results are written as JSON, with one entry per benchmark giving the best, median and mean time in seconds
+over --repeat runs, and the best time per item in microseconds. With --compare, the best times are checked against
+an earlier results file, and the script exits with status 1 if any benchmark got slower by more than --threshold.
+
+"""
+import os
+import pytz
+import sys
+import json
+import glob
+import pickle
+import platform
+import argparse
+import datetime
+import subprocess
+
+from timeit import default_timer
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from pyfacebook import models, PyFacebook
+from pyfacebook.hydration import ProcessHydrator
+from pyfacebook.pagination import iterate_pages
+from pyfacebook.utils import EncodedParam, convert_datetime_to_facebook, encode_params, json_to_objects
+from json_to_objects_benchmark import adgroup_dicts
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'caliendo', 'cache')
+RESULTS_FORMAT_VERSION = 1
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The decorated function takes the scale and returns (function to time, number of items),
+    optionally followed by a function cleaning up after the runs.
+
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def model_classes():
+    return [val for val in vars(models).values() if isinstance(val, type) and getattr(val, 'FIELD_DEFS', None)]
+
+
+def guess_model(obj):
+    """
+    Returns the model whose fields best match the keys of a recorded object, or None if no model has all of them.
+
+    """
+    best_model, best_score = None, 0
+    for model in model_classes():
+        titles = set(f.title for f in model.FIELD_DEFS)
+        if set(obj) <= titles and float(len(obj)) / len(titles) > best_score:
+            best_model, best_score = model, float(len(obj)) / len(titles)
+    return best_model
+
+
+def recorded_objects():
+    """
+    Loads the objects recorded by the caliendo-patched test_graph_api, with the model each one is for.
+    Objects which can't be loaded into their model are left out.
+
+    :rtype list: A list of (model, decoded JSON dict) tuples.
+
+    """
+    objects = []
+    for path in sorted(glob.glob(os.path.join(CACHE_DIR, '*'))):
+        with open(path) as cache_file:
+            record = pickle.load(cache_file)
+        try:
+            returnval = pickle.loads(record['returnval'])
+        except Exception:
+            continue
+        if not (isinstance(returnval, tuple) and isinstance(returnval[0], dict) and returnval[0]):
+            continue
+        obj, (model_name, ids) = returnval
+        model = getattr(models, model_name, None) if model_name else guess_model(obj)
+        if not model:
+            continue
+        try:
+            model.from_dict(dict(obj))
+        except Exception:
+            continue
+        objects.append((model, obj))
+    return objects
+
+
+def replayed(objects, count):
+    """
+    Repeats recorded objects until there are count of them, and groups them by model.
+
+    :rtype dict: A dict of model to a list of decoded JSON dicts.
+
+    """
+    by_model = {}
+    for i in xrange(count):
+        model, obj = objects[i % len(objects)]
+        by_model.setdefault(model, []).append(dict(obj))
+    return by_model
+
+
+class ReplaySession(object):
+
+    """
+    Stands in for GraphSession, answering every call with the same recorded response.
+
+    """
+
+    class Response(object):
+        status_code = 200
+        headers = {}
+
+        def __init__(self, body):
+            self.text = body
+
+        def json(self):
+            return json.loads(self.text)
+
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, url, **kwargs):
+        return self.Response(self.body)
+
+    post = delete = get
+
+
+def post_params():
+    return {
+        'name': u'benchmark adgroup',
+        'campaign_id': 6010000000000,
+        'bid_type': 'CPM',
+        'bid_info': {'IMPRESSIONS': 200},
+        'creative': {'creative_id': 6020000000000},
+        'targeting': {'countries': ['US', 'GB'], 'age_min': 18, 'age_max': 65, 'genders': [1, 2],
+                      'excluded_connections': [{'id': '481523265256333'}]},
+        'tracking_specs': [{'action.type': ['offsite_conversion'], 'offsite_pixel': [6000000000000]}],
+        'start_time': datetime.datetime(2014, 3, 1, tzinfo=pytz.utc),
+        'end_time': datetime.datetime(2014, 3, 31, tzinfo=pytz.utc),
+        'redownload': True,
+    }
+
+
+def legacy_encode_params(params):
+    """
+    The in-place isinstance loop encode_params replaced, kept as the baseline of the encode_params benchmarks.
+
+    """
+    for key, val in params.items():
+        if isinstance(val, (list, dict, tuple, set)):
+            try:
+                params[key] = json.dumps(val)
+            except (TypeError, ValueError):
+                pass
+        elif isinstance(val, (datetime.date, datetime.datetime)):
+            params[key] = convert_datetime_to_facebook(key, val)
+    return params
+
+
+@benchmark('encode_params.legacy')
+def bench_legacy_encode_params(scale):
+    params = post_params()
+
+    def run():
+        for _ in xrange(scale):
+            legacy_encode_params(dict(params))
+    return run, scale
+
+
+@benchmark('encode_params')
+def bench_encode_params(scale):
+    params = post_params()
+
+    def run():
+        for _ in xrange(scale):
+            encode_params(dict(params))
+    return run, scale
+
+
+@benchmark('encode_params.shared_params')
+def bench_encode_params_shared(scale):
+    # encode_params leaves its argument alone, so the same params can be sent again without being copied
+    params = post_params()
+
+    def run():
+        for _ in xrange(scale):
+            encode_params(params)
+    return run, scale
+
+
+@benchmark('encode_params.encoded_targeting')
+def bench_encode_params_encoded(scale):
+    params = post_params()
+    params['targeting'] = EncodedParam(params['targeting'])
+    params['tracking_specs'] = EncodedParam(params['tracking_specs'])
+
+    def run():
+        for _ in xrange(scale):
+            encode_params(params)
+    return run, scale
+
+
+@benchmark('encode_params.datetime_list')
+def bench_encode_params_datetimes(scale):
+    start = datetime.datetime(2014, 3, 1, tzinfo=pytz.utc)
+    params = {'time_ranges': [start + datetime.timedelta(hours=i) for i in xrange(100)]}
+    calls = max(1, scale / 100)
+
+    def run():
+        for _ in xrange(calls):
+            encode_params(params)
+    return run, calls * 100
+
+
+@benchmark('call_graph_api.get')
+def bench_call_graph_api(scale):
+    body = json.dumps({'data': adgroup_dicts(25)})
+    pyfb = PyFacebook(token_text='benchmark', lazy_validate=True, session=ReplaySession(body))
+    calls = max(1, scale / 10)
+
+    def run():
+        for _ in xrange(calls):
+            pyfb.call_graph_api(endpoint='act_1/adgroups', params={'access_token': 'benchmark', 'limit': 25,
+                                                                   'fields': ['id', 'name', 'adgroup_status']})
+    return run, calls
+
+
+@benchmark('json_to_objects.synthetic')
+def bench_json_to_objects(scale):
+    data = adgroup_dicts(scale)
+    return lambda: json_to_objects(list(data), models.AdGroup), scale
+
+
+@benchmark('json_to_objects.synthetic.no_validation')
+def bench_json_to_objects_no_validation(scale):
+    data = adgroup_dicts(scale)
+    return lambda: json_to_objects(list(data), models.AdGroup, validate=False), scale
+
+
+@benchmark('json_to_objects.process_pool')
+def bench_json_to_objects_process_pool(scale):
+    hydrator = ProcessHydrator(threshold=0)
+    # Warm up the workers before timing
+    hydrator.hydrate(adgroup_dicts(100), models.AdGroup)
+    data = adgroup_dicts(scale)
+    return lambda: hydrator.hydrate(list(data), models.AdGroup), scale, hydrator.close
+
+
+@benchmark('json_to_objects.recorded')
+def bench_json_to_objects_recorded(scale):
+    by_model = replayed(recorded_objects(), scale)
+
+    def run():
+        for model, objects in by_model.items():
+            json_to_objects(list(objects), model)
+    return run, scale
+
+
+@benchmark('adbase.construct')
+def bench_adbase_construct(scale):
+    data = adgroup_dicts(scale)
+
+    def run():
+        for kwargs in data:
+            models.AdGroup(**kwargs)
+    return run, scale
+
+
+@benchmark('adbase.getattr')
+def bench_adbase_getattr(scale):
+    objects = json_to_objects(adgroup_dicts(scale), models.AdGroup)
+
+    def run():
+        for obj in objects:
+            obj.id, obj.name, obj.adgroup_status, obj.updated_time
+    return run, scale * 4
+
+
+@benchmark('adbase.validate')
+def bench_adbase_validate(scale):
+    objects = json_to_objects(adgroup_dicts(scale), models.AdGroup)
+
+    def run():
+        for obj in objects:
+            obj.name = u'renamed'
+            obj.bid_type = u'CPC'
+            obj.creative_ids = [6020000000001, 6020000000002]
+            obj.bid_info = {u'CLICKS': 40}
+    return run, scale * 4
+
+
+@benchmark('pagination')
+def bench_pagination(scale):
+    page_size = 100
+    data = adgroup_dicts(scale)
+    pages = {}
+    for start in xrange(0, scale, page_size):
+        next_url = 'page/' + str(start + page_size) if start + page_size < scale else None
+        pages['page/' + str(start)] = {'data': data[start:start + page_size], 'paging': {'next': next_url}}
+
+    def run():
+        for page in iterate_pages(pages['page/0'], pages.get, prefetch=False):
+            json_to_objects(list(page['data']), models.AdGroup, validate=False)
+    return run, scale
+
+
+@benchmark('to_json')
+def bench_to_json(scale):
+    objects = [model.from_dict(dict(obj)) for model, obj in recorded_objects() if hasattr(model, 'to_json')]
+    count = max(1, scale / 10)
+    objects = [objects[i % len(objects)] for i in xrange(count)] if objects else []
+
+    def run():
+        for obj in objects:
+            obj.to_json(return_dict=True)
+    return run, len(objects)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(setup, scale, repeat):
+    prepared = setup(scale)
+    function, items = prepared[:2]
+    times = []
+    try:
+        for _ in xrange(repeat):
+            start = default_timer()
+            function()
+            times.append(default_timer() - start)
+    finally:
+        for cleanup in prepared[2:]:
+            cleanup()
+    times.sort()
+    return {
+        'items': items,
+        'times': times,
+        'best': times[0],
+        'median': times[len(times) / 2],
+        'mean': sum(times) / len(times),
+        'best_per_item_us': times[0] / items * 1e6 if items else None,
+    }
+
+
+def run_suite(names, scale, repeat):
+    results = OrderedDict()
+    for name in names:
+        results[name] = run_benchmark(BENCHMARKS[name], scale, repeat)
+        sys.stderr.write("%-45s %10.4fs best  %10.2fus/item\n" % (name, results[name]['best'],
+                                                                     results[name]['best_per_item_us'] or 0))
+    return {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'meta': {
+            'timestamp': datetime.datetime.utcnow().isoformat() + 'Z',
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'scale': scale,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares best times against a baseline results file.
+
+    :rtype list: The names of the benchmarks that got slower by more than threshold.
+
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if not base or base['items'] != result['items'] or not base['best']:
+            continue
+        ratio = result['best'] / base['best']
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        sys.stderr.write("%-45s %6.2fx baseline%s\n" % (name, ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the hot paths of PyFacebook.")
+    parser.add_argument('--scale', type=int, default=10000, help="The number of objects most benchmarks handle per run.")
+    parser.add_argument('--repeat', type=int, default=5, help="The number of runs of each benchmark.")
+    parser.add_argument('--only', action='append', help="Only run benchmarks whose name starts with this. Repeatable.")
+    parser.add_argument('--output', help="Write the results as JSON to this file instead of stdout.")
+    parser.add_argument('--compare', help="A results file to compare best times against.")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="The slowdown over the baseline counted as a regression, as a fraction.")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    results = run_suite(names, args.scale, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    else:
+        print json.dumps(results, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            if compare(results, json.load(baseline_file), args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
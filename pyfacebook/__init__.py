@@ -1,16 +1,45 @@
-import json
-import pytz
-import requests
 import datetime
 import warnings
-import inflection
+import threading
 
+from timeit import default_timer
 from urlparse import parse_qs
+from requests.exceptions import RequestException
 from pyfacebook import models
+from pyfacebook.async_client import AsyncPyFacebook
+from pyfacebook.batch import GraphBatch
+from pyfacebook.bulk import BulkDeleter
+from pyfacebook.fanout import(
+    MAX_IDS_PER_CALL,
+    GetResult,
+    chunks,
+    fan_out,
+)
+from pyfacebook.hydration import hydrate
+from pyfacebook.images import(
+    ImageSource,
+    ImageUploader,
+    MultipartBody,
+    image_sources,
+)
+from pyfacebook.instrumentation import Instrumentation
+from pyfacebook.pagination import(
+    iterate_pages,
+    next_page_request,
+)
+from pyfacebook.projection import project
+from pyfacebook.session import GraphSession
+from pyfacebook.stats import to_columns
+from pyfacebook.streaming import StreamingResponse
+from pyfacebook.sync import IncrementalSync
 
 from pyfacebook.utils import(
     FacebookException,
+    build_endpoint,
+    encode_params,
     json_to_objects,
+    normalize_response,
+    request_template,
 )
 
 
@@ -22,21 +51,63 @@ class PyFacebook(object):
     """
 
     def __init__(self, app_id=None, app_secret=None, token_text=None,
-                 use_long_lived_tokens=True, facebook_graph_url='https://graph.facebook.com'):
+                 use_long_lived_tokens=True, facebook_graph_url='https://graph.facebook.com', session=None,
+                 validate_responses=True, scheduler=None, token_cache=None, lazy_validate=False, response_cache=None,
+                 instrumentation=None, hydrator=None):
         """
         Initializes an object of the Facebook class. Sets local vars and establishes a connection.
 
         :param str app_id: Facebook app_id
         :param str app_secret: Facebook app_secret
         :param str token_text: Facebook access_token
+        :param GraphSession session: The pooled HTTP session to send Graph calls through. A default one is created if not provided.
+        :param bool validate_responses: If False, models built from Facebook responses skip field validation.
+        :param RequestScheduler scheduler: Paces calls and retries throttled or failed ones. If not provided, calls are sent right away and never retried.
+        :param TokenCache token_cache: If provided, validated tokens are cached in it, e.g. tokens.PROCESS_TOKEN_CACHE to share
+                                       them within the process. If not, every validation calls debug_token.
+        :param bool lazy_validate: If True, token_text is validated on the first call instead of right away.
+        :param ResponseCache response_cache: If provided, GET responses for slowly changing models are cached in it.
+        :param Instrumentation instrumentation: Hooks called before and after each call. Calls aren't timed if it has no hooks.
+        :param ProcessHydrator hydrator: If provided, models of large pages are built on its worker processes. See hydration.ProcessHydrator
 
         """
         self.__use_long_lived_tokens = use_long_lived_tokens
         self.__facebook_graph_url = facebook_graph_url
+        self.session = session or GraphSession()
+        self.validate_responses = validate_responses
+        self.scheduler = scheduler
+        self.token_cache = token_cache or None
+        self.response_cache = response_cache
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.hydrator = hydrator
 
         self.app_id = app_id
         self.app_secret = app_secret
-        self.access_token = self.validate_access_token(token_text=token_text)
+        self.__token_text = token_text
+        self.__access_token = None
+        self.__access_token_lock = threading.Lock()
+        if not lazy_validate:
+            self.access_token = self.validate_access_token(token_text=token_text)
+
+    @property
+    def facebook_graph_url(self):
+        return self.__facebook_graph_url
+
+    @property
+    def access_token(self):
+        """
+        The validated access token, as a models.Token. If validation was deferred with lazy_validate, it happens on first access.
+
+        """
+        if self.__access_token is None:
+            with self.__access_token_lock:
+                if self.__access_token is None:
+                    self.__access_token = self.validate_access_token(token_text=self.__token_text)
+        return self.__access_token
+
+    @access_token.setter
+    def access_token(self, token):
+        self.__access_token = token
 
     def __call_token_debug(self, token_text, input_token_text):
         """
@@ -48,6 +119,11 @@ class PyFacebook(object):
         :rtype models.Token:
 
         """
+        if self.token_cache:
+            token_dict = self.token_cache.get(input_token_text, self.__facebook_graph_url, self.app_id)
+            if token_dict:
+                return models.Token.from_dict(token_dict)
+
         token_debug_params = {'access_token': token_text,
                               'input_token': input_token_text}
         debug_response = self.call_graph_api(endpoint='debug_token', params=token_debug_params)
@@ -55,9 +131,12 @@ class PyFacebook(object):
         if token_dict.get('error'):
             raise FacebookException(message=token_dict['error']['message'], code=token_dict['error']['code'])
         token_dict['text'] = input_token_text
-        return models.Token(from_json=json.dumps(token_dict))
+        if self.token_cache:
+            self.token_cache.set(input_token_text, token_dict, self.__facebook_graph_url, self.app_id)
+        return models.Token.from_dict(token_dict)
 
-    def __call_endpoint(self, model, id, connection, http_method, params, return_json):
+    def __call_endpoint(self, model, id, connection, http_method, params, return_json, columnar=False, hydrate_as=None,
+                        stream=False):
         """
         Creates a properly-formatted Facebook Graph API endpoint from id and connection parameters.
         Performs an endpoint call and returns the result.
@@ -68,47 +147,35 @@ class PyFacebook(object):
         :param str http_method: The type of call to make
         :param dict params: The params to send in the call
         :param bool return_json: If True, the call returns a dict instead of TinyModel objects
+        :param bool columnar: If True, the data is returned as a stats.ModelColumns instead of TinyModel objects
+        :param tinymodel.TinyModel hydrate_as: The class objects are built as, if not model, e.g. a partial model.
+        :param bool stream: If True, the response is decoded as it is read and returned as a streaming.StreamingResponse
 
         """
-        endpoint = str(id or model.__name__.lower())
-
-        if connection:
-            endpoint += ('/' + connection)
-
-        fb_response = self.call_graph_api(endpoint=endpoint, http_method=http_method, params=params)
-        if not return_json:
-            fb_response['data'] = json_to_objects(fb_response['data'], model)
+        endpoint = build_endpoint(model, id, connection)
+        cache_ttl = self.response_cache.ttl_for(model) if self.response_cache and http_method == 'GET' else None
+        fb_response = self.call_graph_api(endpoint=endpoint, http_method=http_method, params=params, cache_ttl=cache_ttl,
+                                          stream=stream)
+        if stream:
+            return fb_response if return_json else self.__hydrate_stream(fb_response, hydrate_as or model, endpoint, http_method)
+        elif columnar:
+            fb_response['data'] = to_columns(fb_response['data'], model)
+        elif not return_json:
+            fb_response['data'] = self.__hydrate(fb_response['data'], hydrate_as or model, endpoint, http_method)
 
         return fb_response
 
-    def __convert_datetime_to_facebook(self, field_name, this_datetime):
+    def __hydrate(self, list_or_dict, model, endpoint, http_method='GET'):
         """
-        Converts any date or datetime to the proper format for a Facebook call
-
-        Facebook expects UTC times so if we get anything other than UTC than we raise a warning and convert if possible
-
-        :param str field_name: The name of the field we're converting
-        :param datetime this_datetime: The datetime we want to convert
-        :rtype str: A string representing the Facebook time
+        Builds models from the objects of a response, reporting to our after_hydrate hooks. See hydration.hydrate
 
         """
-        if not isinstance(this_datetime, datetime.datetime):
-            if not isinstance(this_datetime, datetime.date):
-                raise Exception(field_name + " needs to be either a date or a datetime object")
-            else:
-                this_datetime = datetime.datetime(this_datetime.year, this_datetime.month, this_datetime.day)
+        return hydrate(list_or_dict, model, validate=self.validate_responses, hydrator=self.hydrator,
+                       instrumentation=self.instrumentation, event={'endpoint': endpoint, 'http_method': http_method})
 
-        if not this_datetime.tzinfo:
-            warnings.warn("WARNING: Your parameter " + field_name + " was sent as a naive datetime.\n"
-                          "Facebook expects UTC datetimes only, so we are sending as UTC.\n"
-                          "Please send timezone-aware datetimes in the future.")
-        elif not this_datetime.tzinfo == pytz.utc:
-            warnings.warn("WARNING: Your parameter " + field_name + " was not sent as UTC.\n"
-                          "Facebook expects UTC datetimes only, so we are converting it to UTC.\n"
-                          "Please send UTC datetimes in the future.")
-            this_datetime = this_datetime.astimezone(pytz.utc)
-
-        return this_datetime.replace(tzinfo=pytz.utc, minute=0, second=0, microsecond=0).isoformat()
+    def __hydrate_stream(self, page, model, endpoint, http_method='GET'):
+        return page.hydrate(model, validate=self.validate_responses, instrumentation=self.instrumentation,
+                            event={'endpoint': endpoint, 'http_method': http_method})
 
     def __delete_everything(self, account_id):
         """
@@ -116,20 +183,9 @@ class PyFacebook(object):
         This is obviously an extremely destructive method so USE CAUTION!!!
 
         """
-        adgroups = self.get(model=models.AdGroup, id=account_id, connection='adgroups')['data']
-        for adgroup in adgroups:
-            self.delete(id=adgroup.id)
-        print "DELETED", len(adgroups), "ADGROUPS"
-
-        adcreatives = self.get(model=models.AdCreative, id=account_id, connection='adcreatives')['data']
-        for adcreative in adcreatives:
-            self.delete(id=adcreative.id)
-        print "DELETED", len(adcreatives), "ADCREATIVES"
-
-        adcampaigns = self.get(model=models.AdCampaign, id=account_id, connection='adcampaigns')['data']
-        for adcampaign in adcampaigns:
-            self.delete(id=adcampaign.id)
-        print "DELETED", len(adcampaigns), "ADCAMPAIGNS"
+        results = self.bulk_delete(account_id=account_id)
+        for connection, model, status_field, deleted_status in BulkDeleter.TIERS:
+            print "DELETED", len([r for r in results if r.connection == connection and r.success]), connection.upper()
 
     def validate_access_token(self, token_text, input_token_text=None):
         """
@@ -175,64 +231,190 @@ class PyFacebook(object):
         new_token_text = parse_qs(resp)['access_token'][0]
         return self.__call_token_debug(token_text=new_token_text, input_token_text=new_token_text)
 
-    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params={}):
+    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params=None, cache_ttl=None, stream=False):
         """
         This method calls the Facebook graph api, given an endpoint and a set of params.
 
         :param str endpoint: The endpoint to call.
         :param str http_method: The http method to use. Currently supports only GET, POST and DELETE
-        :param dict params: A dict of params to attach to the graph API call.
+        :param < dict | list > params: A dict of params to attach to the graph API call. It is left unchanged.
+                                       A list of (key, value) pairs is sent as it is, without being encoded.
+        :param int cache_ttl: If set and we have a response_cache, GET responses are served from and stored in it for this many seconds.
+        :param bool stream: If True, the response body is decoded incrementally as it is read, and a
+                            streaming.StreamingResponse yielding the elements of data is returned. Streamed calls aren't cached.
 
         :rtype dict: A dict representing the json-decoded result from Facebook.
 
         """
+        params = params or {}
+        post_file = None
+        if isinstance(params, list):
+            # Already encoded pairs, such as the params of a paging url, which may repeat a key
+            params = list(params)
+            has_token = any(key in ('access_token', 'fb_exchange_token') and val for key, val in params)
+        else:
+            # Dump iterable params to JSON and convert dates to Facebook time, leaving files to upload alone
+            post_file = params.get('file') if http_method == 'POST' else None
+            params = encode_params(dict((key, val) for key, val in params.iteritems() if key != 'file') if post_file else params)
+            has_token = params.get('access_token') or params.get('fb_exchange_token')
+
         # Append access_token if not sent in params
-        if not (params.get('access_token') or params.get('fb_exchange_token')) and hasattr(self, 'access_token'):
-            params['access_token'] = self.access_token.text
-
-        # Dump iterable params to JSON if possible
-        for key, val in params.items():
-            if isinstance(val, (list, dict, tuple, set)):
-                try:
-                    params[key] = json.dumps(val)
-                except (TypeError, ValueError):
-                    pass
-            elif isinstance(val, (datetime.date, datetime.datetime)):
-                params[key] = self.__convert_datetime_to_facebook(key, val)
-
-        # MAKE THE CALL
+        if not has_token and (self.__access_token is not None or self.__token_text):
+            if isinstance(params, list):
+                params.append(('access_token', self.access_token.text))
+            else:
+                params['access_token'] = self.access_token.text
+
+        if self.response_cache and not stream:
+            if http_method == 'GET' and cache_ttl:
+                cached_response = self.response_cache.get(endpoint, params)
+                if cached_response is not None:
+                    return cached_response
+                json_response = self.__call_graph_api(endpoint, http_method, expect_json, params, post_file)
+                if isinstance(json_response, dict):
+                    self.response_cache.set(endpoint, params, json_response, cache_ttl)
+                return json_response
+            elif http_method in ('POST', 'DELETE'):
+                self.response_cache.invalidate(endpoint, params)
+
+        return self.__call_graph_api(endpoint, http_method, expect_json, params, post_file, stream)
+
+    def __call_graph_api(self, endpoint, http_method, expect_json, params, post_file, stream=False):
+        """
+        Sends an already encoded call to the graph api and parses the response, pacing and retrying it if we have a scheduler.
+
+        """
+        instrumented = bool(self.instrumentation)
+        if not self.scheduler:
+            event = {'endpoint': endpoint, 'http_method': http_method, 'attempt': 0} if instrumented else None
+            response = self.__send_request(endpoint, http_method, params, post_file, event, stream)
+            return self.__parse_response(response, expect_json, event, stream)
+
+        # Pace the call, and retry it with backoff if Facebook throttles us or has a transient failure
+        attempt = 0
+        while True:
+            event = {'endpoint': endpoint, 'http_method': http_method, 'attempt': attempt} if instrumented else None
+            self.scheduler.wait(endpoint)
+            try:
+                response = self.__send_request(endpoint, http_method, params, post_file, event, stream)
+                self.scheduler.record_response(endpoint, response.headers)
+                if response.status_code >= 500 and self.scheduler.should_retry(attempt, status_code=response.status_code,
+                                                                               http_method=http_method):
+                    if event is not None:
+                        self.instrumentation.emit('on_error', event)
+                    attempt += 1
+                    self.__backoff(attempt, event)
+                    continue
+                return self.__parse_response(response, expect_json, event, stream)
+            except (FacebookException, RequestException) as e:
+                if not self.scheduler.should_retry(attempt, exception=e, http_method=http_method):
+                    raise
+                attempt += 1
+                self.__backoff(attempt, event)
+
+    def __backoff(self, attempt, event):
+        delay = self.scheduler.backoff(attempt)
+        if event is not None:
+            event['delay'] = delay
+            self.instrumentation.emit('on_retry', event)
+
+    def __send_request(self, endpoint, http_method, params, post_file=None, event=None, stream=False):
+        """
+        Sends an already encoded call to the Facebook graph api through our session.
+
+        :param dict event: If set, the call is timed and reported to our instrumentation hooks in it.
+
+        :rtype requests.Response:
+
+        """
+        if event is None:
+            return self.__send(endpoint, http_method, params, post_file, stream)
+
+        self.instrumentation.emit('before_request', event)
+        started_at = default_timer()
+        try:
+            response = self.__send(endpoint, http_method, params, post_file, stream)
+        except RequestException as e:
+            event.update(send_time=default_timer() - started_at, exception=e)
+            self.instrumentation.emit('on_error', event)
+            raise
+        # Reading the content of a streamed response would load it whole, so its size is taken from the headers
+        size = int(response.headers.get('content-length') or 0) if stream else len(response.content or '')
+        event.update(send_time=default_timer() - started_at, status_code=response.status_code, bytes=size)
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            event['server_time'] = elapsed.total_seconds()
+        return response
+
+    def __send(self, endpoint, http_method, params, post_file, stream=False):
         url = self.__facebook_graph_url
-        if http_method == 'GET':
-            response = requests.get(url + '/' + endpoint, params=params)
+        if http_method == 'GET' and stream:
+            response = self.session.get(url + '/' + endpoint, params=params, stream=True)
+        elif http_method == 'GET':
+            response = self.session.get(url + '/' + endpoint, params=params)
         elif http_method == 'POST':
-            post_file = params.pop('file', None)
-            if post_file:
-                response = requests.post(url + '/' + endpoint, files=post_file, data=params)
+            if post_file and any(isinstance(image, ImageSource) for image in post_file.values()):
+                # Stream the images from their sources instead of building the whole multipart body in memory
+                body = MultipartBody(params, image_sources(post_file))
+                response = self.session.post(url + '/' + endpoint, data=body, headers={'Content-Type': body.content_type})
+            elif post_file:
+                response = self.session.post(url + '/' + endpoint, files=post_file, data=params)
             else:
-                response = requests.post(url + '/' + endpoint, data=params)
+                response = self.session.post(url + '/' + endpoint, data=params)
         elif http_method == 'DELETE':
-            response = requests.delete(url + '/' + endpoint, params=params)
+            response = self.session.delete(url + '/' + endpoint, params=params)
         else:
             raise Exception("Called Facebook Graph API with unsupported method: " + http_method)
+        return response
+
+    def __parse_response(self, response, expect_json, event=None, stream=False):
+        """
+        Parses a graph api response and standardizes it for edge cases, raising Facebook errors if they exist.
+
+        :param dict event: If set, decoding is timed and the outcome reported to our instrumentation hooks in it.
+
+        :rtype < dict | str >: A dict representing the json-decoded result, or the response text if it isn't JSON and expect_json is False.
+                               If stream is True, a StreamingResponse which decodes the response as it is iterated over.
+
+        """
+        if stream:
+            streaming_response = StreamingResponse(response)
+            try:
+                streaming_response.check_error()
+            except Exception as e:
+                if event is not None:
+                    event.update(exception=e, error_code=getattr(e, 'code', None))
+                    self.instrumentation.emit('on_error', event)
+                raise
+            if event is not None:
+                self.instrumentation.emit('after_response', event)
+            return streaming_response
+        elif event is None:
+            return self.__decode_response(response, expect_json)
 
-        # Parse response and standardize for edge cases, raising Facebook errors if they exist
+        started_at = default_timer()
+        try:
+            result = self.__decode_response(response, expect_json)
+        except Exception as e:
+            event.update(decode_time=default_timer() - started_at, exception=e, error_code=getattr(e, 'code', None))
+            self.instrumentation.emit('on_error', event)
+            raise
+        event['decode_time'] = default_timer() - started_at
+        self.instrumentation.emit('after_response', event)
+        return result
+
+    def __decode_response(self, response, expect_json):
         try:
             json_response = response.json()
             if not isinstance(json_response, dict):
                 raise ValueError
-            elif json_response.get('error'):
-                raise FacebookException(message=json_response['error']['message'], code=json_response['error']['code'])
-            elif json_response.get('images'):
-                json_response = {'data': json_response['images']}
-            elif not json_response.get('data'):
-                json_response = {'data': [json_response]}
-            return json_response
+            return normalize_response(json_response)
         except ValueError:
             if expect_json:
                 raise
             return response.text
 
-    def get(self, model, id, connection=None, return_json=False, **kwargs):
+    def get(self, model, id, connection=None, return_json=False, columnar=False, stream=False, **kwargs):
         """
         Sends an Ads API GET call to Facebook and retrieves a JSON response
 
@@ -240,23 +422,145 @@ class PyFacebook(object):
         :param str id: The Facebook id of the object we're getting.
         :param str connection: The name of the connection, if we're getting connected objects.
         :param bool return_json: Should return a json string
+        :param bool columnar: Should return the data as one NumPy array per field, e.g. for large adgroupstats reports. Requires numpy.
+        :param bool stream: Should decode the response as it is read and return a streaming.StreamingResponse, which yields
+                            objects one at a time and holds paging in its meta once consumed. Use for very large pages.
+
+        The fields keyword arg selects which fields Facebook returns. It may be a list of fields, with nested expansions
+        such as 'targeting{countries}' or {'targeting': ['countries']}, a comma separated string of fields, or the name
+        of a preset in projection.PRESETS such as 'status'. Objects are then built as partial models, which only hold
+        the selected fields. If no fields are given, every field which isn't a connection is returned.
 
         :rtype dict: A dict with results. Typical keys are data, errors and paging.
                      If return_json is False, data is an iterable of TinyModels.
+                     If columnar is True, data is a stats.ModelColumns.
 
         """
+        if columnar and stream:
+            raise ValueError("A GET call can't be both columnar and streamed")
         if not id:
             raise Exception("Need an ID in order to make a GET request to the Facebook API.")
 
-        params = {}
-        if not kwargs.get('fields'):
-            fields_to_get = [f.title for f in model.FIELD_DEFS
-                             if f.title not in getattr(model, 'CONNECTIONS', []) and
-                             f.title not in getattr(model, 'CREATE_ONLY', [])]
-            params = {'fields': fields_to_get}
+        params = dict(kwargs)
+        params['fields'], hydrate_as = project(model, kwargs.get('fields'))
+        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='GET', params=params, return_json=return_json,
+                                    columnar=columnar, hydrate_as=hydrate_as, stream=stream)
+
+    def iterate(self, model, id, connection=None, return_json=False, max_items=None, max_pages=None, prefetch=True, stream=False,
+                **kwargs):
+        """
+        Sends an Ads API GET call to Facebook and lazily follows the paging cursors of the result,
+        yielding objects one at a time. Only the current page (and the next one, if prefetching) is held in memory.
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param str id: The Facebook id of the object we're getting.
+        :param str connection: The name of the connection, if we're getting connected objects.
+        :param bool return_json: Should yield dicts instead of TinyModels
+        :param int max_items: The maximum number of objects to yield.
+        :param int max_pages: The maximum number of pages to fetch.
+        :param bool prefetch: If True, the next page is fetched in the background while the current one is consumed.
+        :param bool stream: If True, each page is decoded as it is read, so that only one object of it is held in memory
+                            at a time. The next page is only known once a page is consumed, so prefetch is ignored.
+
+        :rtype generator: A generator of TinyModels, or dicts if return_json is True.
+
+        """
+        if stream:
+            for obj in self.__iterate_stream(model, id, connection, return_json, max_items, max_pages, **kwargs):
+                yield obj
+            return
+
+        def fetch_page(next_url):
+            endpoint, params = next_page_request(next_url, self.__facebook_graph_url)
+            return self.call_graph_api(endpoint=endpoint, params=params)
+
+        hydrate_as = project(model, kwargs.get('fields'))[1]
+        endpoint = build_endpoint(model, id, connection)
+        first_page = self.get(model=model, id=id, connection=connection, return_json=True, **kwargs)
+        items_yielded = 0
+        for page in iterate_pages(first_page, fetch_page, max_pages=max_pages, max_items=max_items, prefetch=prefetch):
+            data = page['data'] if return_json else self.__hydrate(page['data'], hydrate_as, endpoint)
+            for obj in (data if isinstance(data, list) else data.values()):
+                if max_items and items_yielded >= max_items:
+                    return
+                items_yielded += 1
+                yield obj
+
+    def __iterate_stream(self, model, id, connection, return_json, max_items, max_pages, **kwargs):
+        hydrate_as = project(model, kwargs.get('fields'))[1]
+        page = self.get(model=model, id=id, connection=connection, return_json=return_json, stream=True, **kwargs)
+        items_yielded = pages_seen = 0
+        while page is not None:
+            pages_seen += 1
+            page_items = 0
+            for obj in page:
+                if max_items and items_yielded >= max_items:
+                    page.close()
+                    return
+                items_yielded += 1
+                page_items += 1
+                yield obj
+
+            next_url = page.paging.get('next')
+            if not next_url or not page_items or (max_pages and pages_seen >= max_pages):
+                return
+            endpoint, params = next_page_request(next_url, self.__facebook_graph_url)
+            page = self.call_graph_api(endpoint=endpoint, params=params, stream=True)
+            if not return_json:
+                self.__hydrate_stream(page, hydrate_as, endpoint)
+
+    def get_many(self, model, ids, connection=None, return_json=False, max_workers=10, ids_per_call=MAX_IDS_PER_CALL, **kwargs):
+        """
+        Sends Ads API GET calls for many ids concurrently, and yields the outcome for each id as soon as it is known.
+
+        Without a connection, ids are packed into multi-id ?ids=a,b,c calls of up to ids_per_call ids each. If one of
+        these calls fails, its ids are fetched one by one so that each id gets its own error.
+        With a connection, every id is fetched with its own GET call.
+
+        :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+        :param list ids: The Facebook ids of the objects we're getting.
+        :param str connection: The name of the connection, if we're getting connected objects.
+        :param bool return_json: Should return dicts instead of TinyModels
+        :param int max_workers: The maximum number of GET calls in flight at once.
+        :param int ids_per_call: The maximum number of ids packed into a single multi-id call. 1 disables packing.
+
+        :rtype generator: A generator of fanout.GetResults, in completion order.
+                          The response of each is what get would have returned for its id.
 
-        params.update(kwargs)
-        return self.__call_endpoint(model=model, id=id, connection=connection, http_method='GET', params=params, return_json=return_json)
+        """
+        def get_one(id):
+            try:
+                return [GetResult(id, response=self.get(model=model, id=id, connection=connection,
+                                                        return_json=return_json, **kwargs))]
+            except Exception as e:
+                return [GetResult(id, exception=e)]
+
+        def get_chunk(chunk):
+            params = dict(kwargs)
+            params['fields'], hydrate_as = project(model, kwargs.get('fields'))
+            params['ids'] = ','.join(str(id) for id in chunk)
+            try:
+                objects_by_id = self.call_graph_api(endpoint='', params=params)['data'][0]
+            except Exception:
+                return [result for id in chunk for result in get_one(id)]
+
+            results = []
+            for id in chunk:
+                obj = objects_by_id.get(str(id))
+                if obj is None:
+                    results.append(GetResult(id, exception=FacebookException("No object returned for id " + str(id))))
+                elif return_json:
+                    results.append(GetResult(id, response={'data': [obj]}))
+                else:
+                    results.append(GetResult(id, response={'data': self.__hydrate([obj], hydrate_as, '')}))
+            return results
+
+        ids = list(ids)
+        if connection or ids_per_call <= 1:
+            tasks = [lambda id=id: get_one(id) for id in ids]
+        else:
+            tasks = [lambda chunk=chunk: get_chunk(chunk) for chunk in chunks(ids, min(ids_per_call, MAX_IDS_PER_CALL))]
+        return fan_out(tasks, max_workers)
 
     def post(self, model, id=None, connection=None, return_json=False, **kwargs):
         """
@@ -270,9 +574,28 @@ class PyFacebook(object):
 
         """
         if not connection:
-            connection = inflection.pluralize(model.__name__.lower())
+            connection = request_template(model).connection
         return self.__call_endpoint(model=model, id=id, connection=connection, http_method='POST', params=kwargs, return_json=return_json)
 
+    def upload_images(self, account_id, images, max_workers=4, images_per_request=10, index=None, verify=False):
+        """
+        Uploads many AdImages concurrently, streaming each from its source. See images.ImageUploader
+
+        :param str account_id: The id of the ad account, e.g. act_123
+        :param < dict | list > images: A dict of filename to source, or a list of file paths or images.ImageSources.
+                                       Sources may be file paths, open files, memory-mapped files or byte buffers such as bytearrays.
+        :param int max_workers: The maximum number of uploads in flight at once.
+        :param int images_per_request: The maximum number of images sent in a single POST.
+        :param index: An index of images already uploaded by content, e.g. images.MemoryImageIndex or store.SQLiteObjectStore.
+                      Images found in it for the account aren't uploaded again.
+        :param bool verify: Should indexed images be checked against the account's adimages before being reused.
+
+        :rtype dict: A dict of filename to the uploaded models.AdImage. Images which failed are left out, with a warning.
+
+        """
+        return ImageUploader(self, max_workers=max_workers, images_per_request=images_per_request,
+                             index=index, verify=verify).upload(account_id, images)
+
     def delete(self, id, **kwargs):
         """
         Sends an Ads API DELETE call to Facebook and retrieves a JSON response
@@ -290,3 +613,50 @@ class PyFacebook(object):
             return False
         else:
             return True
+
+    def bulk_delete(self, account_id=None, ids=None, archive=False, max_workers=10, use_batch=True):
+        """
+        Deletes or archives many objects concurrently, adgroups first, then adcreatives, then adcampaigns.
+        See bulk.BulkDeleter
+
+        :param str account_id: The id of an ad account whose adgroups, adcreatives and adcampaigns should all go.
+        :param < dict | list > ids: Instead of an account, a dict of connection (e.g. 'adgroups') to a list of ids,
+                                    or a plain list of ids of a single tier.
+        :param bool archive: If True, objects are archived instead of deleted.
+        :param int max_workers: The maximum number of calls (or batch requests) in flight at once.
+        :param bool use_batch: If True, deletes are packed into batch requests.
+
+        :rtype list: A bulk.BulkResult for every id, with the success, Facebook response or exception of its call.
+
+        """
+        if not (account_id or ids):
+            raise Exception("Need an account ID or a list of IDs in order to make a bulk delete.")
+
+        deleter = BulkDeleter(self, max_workers=max_workers, use_batch=use_batch)
+        if account_id:
+            ids = deleter.list_account(account_id)
+        return deleter.run(ids, archive=archive)
+
+    def incremental_sync(self, store=None, **kwargs):
+        """
+        Starts keeping a local copy of ad account connections, fetching only objects updated since the last sync.
+        Takes the same keyword arguments as sync.IncrementalSync
+
+        :param MemorySyncStore store: Where synced objects and watermarks are kept. Defaults to an in-memory store.
+
+        :rtype IncrementalSync: The syncer. Call its sync or sync_account methods to sync.
+
+        """
+        return IncrementalSync(self, store=store, **kwargs)
+
+    def batch(self, max_batch_size=GraphBatch.MAX_BATCH_SIZE):
+        """
+        Starts a batch of Ads API calls. Calls are collected with the batch's get, post and delete methods,
+        which take the same arguments as ours, and are sent to Facebook as Graph API batch requests on execute().
+
+        :param int max_batch_size: The maximum number of calls sent in a single batch request (Facebook allows up to 50).
+
+        :rtype GraphBatch: The batch to add calls to.
+
+        """
+        return GraphBatch(self, max_batch_size=max_batch_size)
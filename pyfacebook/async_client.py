@@ -0,0 +1,140 @@
+import threading
+
+from multiprocessing.pool import ThreadPool
+from pyfacebook.session import GraphSession
+
+
+class AsyncPyFacebook(object):
+
+    """
+    A non-blocking counterpart of PyFacebook. Each call is run on a bounded pool of worker threads sharing
+    one pooled HTTP session, and returns a pending result right away. Call .get() on it to wait for the outcome,
+    which is exactly what the matching PyFacebook method would have returned (or raised).
+
+    All parameter encoding, datetime conversion and response normalization is done by the wrapped PyFacebook instance.
+
+    """
+
+    def __init__(self, app_id=None, app_secret=None, token_text=None, use_long_lived_tokens=True,
+                 facebook_graph_url='https://graph.facebook.com', session=None, scheduler=None, max_concurrency=10,
+                 pyfacebook=None, **kwargs):
+        """
+        Initializes an AsyncPyFacebook. Takes the same arguments as PyFacebook, such as validate_responses,
+        response_cache or hydrator, which are passed on to it, plus:
+
+        :param int max_concurrency: The maximum number of Graph calls in flight at once.
+        :param PyFacebook pyfacebook: An already initialized PyFacebook instance to wrap instead of creating one.
+                                      The PyFacebook arguments are then ignored.
+
+        """
+        if not pyfacebook:
+            from pyfacebook import PyFacebook
+            session = session or GraphSession(pool_maxsize=max_concurrency)
+            pyfacebook = PyFacebook(app_id=app_id, app_secret=app_secret, token_text=token_text,
+                                    use_long_lived_tokens=use_long_lived_tokens,
+                                    facebook_graph_url=facebook_graph_url, session=session, scheduler=scheduler,
+                                    **kwargs)
+        self.pyfacebook = pyfacebook
+        self.max_concurrency = max_concurrency
+        self.__pool = ThreadPool(processes=max_concurrency)
+
+    @property
+    def access_token(self):
+        return self.pyfacebook.access_token
+
+    def __submit(self, method, *args, **kwargs):
+        return self.__pool.apply_async(method, args, kwargs)
+
+    def call_graph_api(self, endpoint, http_method='GET', expect_json=True, params=None):
+        """
+        Calls the Facebook graph api without blocking. See PyFacebook.call_graph_api
+
+        :rtype multiprocessing.pool.AsyncResult: The pending result.
+
+        """
+        return self.__submit(self.pyfacebook.call_graph_api, endpoint=endpoint, http_method=http_method,
+                             expect_json=expect_json, params=dict(params or {}))
+
+    def validate_access_token(self, token_text, input_token_text=None):
+        """
+        Validates an access token without blocking. See PyFacebook.validate_access_token
+
+        :rtype multiprocessing.pool.AsyncResult: The pending result.
+
+        """
+        return self.__submit(self.pyfacebook.validate_access_token, token_text, input_token_text=input_token_text)
+
+    def get(self, model, id, connection=None, return_json=False, **kwargs):
+        """
+        Sends an Ads API GET call without blocking. See PyFacebook.get
+
+        :rtype multiprocessing.pool.AsyncResult: The pending result.
+
+        """
+        return self.__submit(self.pyfacebook.get, model, id, connection=connection, return_json=return_json, **kwargs)
+
+    def post(self, model, id=None, connection=None, return_json=False, **kwargs):
+        """
+        Sends an Ads API POST call without blocking. See PyFacebook.post
+
+        :rtype multiprocessing.pool.AsyncResult: The pending result.
+
+        """
+        return self.__submit(self.pyfacebook.post, model, id=id, connection=connection, return_json=return_json, **kwargs)
+
+    def delete(self, id, **kwargs):
+        """
+        Sends an Ads API DELETE call without blocking. See PyFacebook.delete
+
+        :rtype multiprocessing.pool.AsyncResult: The pending result.
+
+        """
+        return self.__submit(self.pyfacebook.delete, id, **kwargs)
+
+    def gather(self, calls, concurrency=None, return_exceptions=False):
+        """
+        Runs many calls with at most `concurrency` of them in flight, and returns their results in order.
+        Calls are only handed to the worker pool as slots free up, so a generator of thousands of calls
+        never has more than `concurrency` of them pending at once.
+
+        Example:
+            afb.gather(functools.partial(afb.pyfacebook.get, models.AdGroup, id=i) for i in adgroup_ids)
+
+        :param iterable calls: Callables taking no arguments, usually bound PyFacebook calls.
+        :param int concurrency: The maximum number of calls in flight. Defaults to max_concurrency.
+        :param bool return_exceptions: If True, exceptions are returned in place of results instead of raised.
+
+        :rtype list: The results of the calls, in the order they were given.
+
+        """
+        slots = threading.BoundedSemaphore(min(concurrency or self.max_concurrency, self.max_concurrency))
+
+        def run(call):
+            try:
+                return call()
+            finally:
+                slots.release()
+
+        pending = []
+        for call in calls:
+            slots.acquire()
+            pending.append(self.__submit(run, call))
+
+        results = []
+        for result in pending:
+            try:
+                results.append(result.get())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def close(self):
+        """
+        Waits for pending calls to finish, then shuts down the worker pool and pooled connections.
+
+        """
+        self.__pool.close()
+        self.__pool.join()
+        self.pyfacebook.session.close()
@@ -0,0 +1,311 @@
+import json
+import urllib
+import warnings
+
+from pyfacebook.hydration import hydrate
+from pyfacebook.projection import project
+from pyfacebook.utils import(
+    FacebookException,
+    build_endpoint,
+    encode_params,
+    normalize_response,
+    request_template,
+)
+
+
+class BatchReference(object):
+
+    """
+    A reference to the result of an earlier request in the same GraphBatch.
+
+    References can be passed anywhere in a later request's params, including inside dicts and lists,
+    e.g. creative={'creative_id': creative_request.ref()}.
+
+    """
+
+    def __init__(self, request, path='$.id'):
+        """
+        :param BatchRequest request: The request whose result we're referencing.
+        :param str path: A JSONPath expression into the referenced result, e.g. '$.id' or '$.images.*.hash'
+
+        """
+        self.request = request
+        self.path = path
+
+    def placeholder(self):
+        """
+        Returns the Graph API batch placeholder string for this reference.
+
+        :rtype str:
+
+        """
+        return '{result=' + self.request.name + ':' + self.path + '}'
+
+    def resolve(self):
+        """
+        Resolves this reference against the raw result of the (already executed) referenced request.
+
+        :rtype obj: The referenced value
+
+        """
+        if self.request.exception:
+            raise FacebookException(message="Batch request " + self.request.name + " this request depends on has failed")
+        value = self.request.raw
+        for key in self.path.lstrip('$').strip('.').split('.'):
+            if not key:
+                continue
+            if key == '*':
+                value = next(iter(value.values() if isinstance(value, dict) else value), None)
+            elif isinstance(value, list):
+                value = value[int(key)]
+            else:
+                value = value.get(key)
+        return value
+
+
+class BatchRequest(object):
+
+    """
+    A single sub-request of a GraphBatch. Once the batch is executed, the outcome is found in result,
+    or exception if Facebook returned an error for this request.
+
+    """
+
+    def __init__(self, model, http_method, endpoint, params, return_json=False):
+        self.model = model
+        self.http_method = http_method
+        self.endpoint = endpoint
+        self.params = params
+        self.return_json = return_json
+        self.name = None
+        self.raw = None
+        self.result = None
+        self.exception = None
+
+    def ref(self, path='$.id'):
+        """
+        Returns a reference to a field of this request's result, to be used in the params of a later request.
+
+        :param str path: A JSONPath expression into the result, e.g. '$.id' or '$.images.*.hash'
+        :rtype BatchReference:
+
+        """
+        return BatchReference(self, path)
+
+    def fail(self, exception):
+        self.exception = exception
+        self.result = exception
+
+
+class GraphBatch(object):
+
+    """
+    Collects many get, post and delete calls and sends them to Facebook as Graph API batch requests.
+    See documentation at: https://developers.facebook.com/docs/graph-api/making-multiple-requests
+
+    Calls are sent in chunks of up to 50 sub-requests. References to requests in the same chunk are left for
+    Facebook to resolve, while references to requests from an earlier chunk are resolved here.
+
+    """
+    MAX_BATCH_SIZE = 50
+
+    def __init__(self, pyfacebook, max_batch_size=MAX_BATCH_SIZE):
+        """
+        :param PyFacebook pyfacebook: The PyFacebook instance to send the batch requests through.
+        :param int max_batch_size: The maximum number of sub-requests sent in a single batch request.
+
+        """
+        self.__pyfacebook = pyfacebook
+        self.max_batch_size = min(max_batch_size, self.MAX_BATCH_SIZE)
+        self.requests = []
+
+    def __add(self, request):
+        self.requests.append(request)
+        for reference in self.__references(request.params):
+            if reference.request not in self.requests:
+                raise Exception("Batch requests can only reference requests added to the same batch before them.")
+            if not reference.request.name:
+                reference.request.name = 'request_' + str(self.requests.index(reference.request))
+        return request
+
+    def __references(self, value):
+        if isinstance(value, BatchReference):
+            yield value
+        elif isinstance(value, dict):
+            for val in value.values():
+                for reference in self.__references(val):
+                    yield reference
+        elif isinstance(value, (list, tuple, set)):
+            for val in value:
+                for reference in self.__references(val):
+                    yield reference
+
+    def __substitute(self, value, chunk):
+        if isinstance(value, BatchReference):
+            if value.request in chunk:
+                if value.request.exception:
+                    raise FacebookException(message="Batch request " + value.request.name + " this request depends on has failed")
+                return value.placeholder()
+            return value.resolve()
+        elif isinstance(value, dict):
+            return dict((key, self.__substitute(val, chunk)) for key, val in value.items())
+        elif isinstance(value, (list, tuple, set)):
+            return [self.__substitute(val, chunk) for val in value]
+        return value
+
+    def get(self, model, id, connection=None, return_json=False, **kwargs):
+        """
+        Adds a GET call to the batch. Takes the same arguments as PyFacebook.get
+
+        :rtype BatchRequest: The pending request.
+
+        """
+        if not id:
+            raise Exception("Need an ID in order to make a GET request to the Facebook API.")
+
+        params = dict(kwargs)
+        params['fields'], hydrate_as = project(model, kwargs.get('fields'))
+        return self.__add(BatchRequest(hydrate_as, 'GET', build_endpoint(model, id, connection), params, return_json))
+
+    def post(self, model, id=None, connection=None, return_json=False, **kwargs):
+        """
+        Adds a POST call to the batch. Takes the same arguments as PyFacebook.post
+
+        :rtype BatchRequest: The pending request.
+
+        """
+        if not connection:
+            connection = request_template(model).connection
+        return self.__add(BatchRequest(model, 'POST', build_endpoint(model, id, connection), kwargs, return_json))
+
+    def delete(self, id, **kwargs):
+        """
+        Adds a DELETE call to the batch. Takes the same arguments as PyFacebook.delete
+
+        :rtype BatchRequest: The pending request.
+
+        """
+        return self.__add(BatchRequest(None, 'DELETE', str(id), {}))
+
+    def __encode_request(self, request, chunk, files):
+        """
+        Turns a BatchRequest into a sub-request dict of the Graph API batch format.
+
+        :param BatchRequest request: The request to encode.
+        :param list chunk: The requests sent in the same batch as this one.
+        :param dict files: The files attached to the batch. Files posted by this request are added to it.
+
+        :rtype dict:
+
+        """
+        params = self.__substitute(request.params, chunk)
+        post_file = params.pop('file', None)
+        params = encode_params(params)
+        query = urllib.urlencode(dict((key, val.encode('utf-8') if isinstance(val, unicode) else val)
+                                      for key, val in params.items()))
+        sub_request = {'method': request.http_method, 'relative_url': request.endpoint}
+        if request.http_method == 'POST':
+            sub_request['body'] = query
+        elif query:
+            sub_request['relative_url'] += '?' + query
+        if post_file:
+            attached = []
+            for file_name, file_content in post_file.items():
+                attached_name = 'file' + str(len(files))
+                files[attached_name] = (file_name, file_content)
+                attached.append(attached_name)
+            sub_request['attached_files'] = ','.join(attached)
+        if request.name:
+            sub_request['name'] = request.name
+            sub_request['omit_response_on_success'] = False
+        return sub_request
+
+    def __handle_response(self, request, sub_response):
+        """
+        Turns a single sub-response of a batch call into the request's result, the same way
+        PyFacebook.get, post and delete would.
+
+        """
+        if sub_response is None:
+            raise FacebookException(message="Batch request was not executed because a request it depends on has failed")
+
+        body = sub_response.get('body')
+        try:
+            request.raw = json.loads(body)
+        except (TypeError, ValueError):
+            request.raw = body
+
+        if isinstance(request.raw, dict) and request.raw.get('error'):
+            normalize_response(request.raw)
+
+        if request.http_method == 'DELETE':
+            if body != 'true':
+                warnings.warn("WARNING: DELETE called on Facebook object with id " + request.endpoint + ""
+                              "But the object may not have been deleted. Facebook says:\n" + str(body))
+                return False
+            return True
+
+        if not isinstance(request.raw, dict):
+            raise FacebookException(message="Unexpected batch response: " + str(body), code=sub_response.get('code'))
+
+        fb_response = normalize_response(dict(request.raw))
+        if not request.return_json:
+            # Models are built in place, so hydrate a copy and keep raw decoded for references into $.data
+            data = fb_response['data']
+            data = list(data) if isinstance(data, list) else dict(data)
+            fb_response['data'] = hydrate(data, request.model, validate=self.__pyfacebook.validate_responses,
+                                          hydrator=self.__pyfacebook.hydrator, instrumentation=self.__pyfacebook.instrumentation,
+                                          event={'endpoint': request.endpoint, 'http_method': request.http_method})
+        return fb_response
+
+    def __execute_chunk(self, chunk):
+        files = {}
+        sent = []
+        sub_requests = []
+        for request in chunk:
+            try:
+                sub_requests.append(self.__encode_request(request, chunk, files))
+                sent.append(request)
+            except FacebookException as e:
+                request.fail(e)
+
+        if not sent:
+            return
+
+        params = {'batch': sub_requests}
+        if files:
+            params['file'] = files
+        try:
+            sub_responses = json.loads(self.__pyfacebook.call_graph_api(endpoint='', http_method='POST',
+                                                                          expect_json=False, params=params))
+            if not isinstance(sub_responses, list) or len(sub_responses) != len(sent):
+                raise FacebookException(message="Unexpected batch response: expected a list of " + str(len(sent)) +
+                                                " responses, got " + str(sub_responses)[:200])
+        except ValueError as e:
+            # The body wasn't JSON, e.g. an HTML error page from a proxy or a truncated response
+            for request in sent:
+                request.fail(FacebookException(message="Invalid batch response: " + str(e)))
+            return
+        except FacebookException as e:
+            for request in sent:
+                request.fail(e)
+            return
+
+        for request, sub_response in zip(sent, sub_responses):
+            try:
+                request.result = self.__handle_response(request, sub_response)
+            except FacebookException as e:
+                request.fail(e)
+
+    def execute(self):
+        """
+        Sends all collected calls to Facebook, in batches of up to max_batch_size sub-requests.
+
+        :rtype list: The result of each call in the order they were added. Results are the same as what
+                     PyFacebook.get, post and delete return, or a FacebookException if the call failed.
+
+        """
+        pending = [request for request in self.requests if request.result is None]
+        for start in range(0, len(pending), self.max_batch_size):
+            self.__execute_chunk(pending[start:start + self.max_batch_size])
+        return [request.result for request in self.requests]
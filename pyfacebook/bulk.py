@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from pyfacebook import models
+from pyfacebook.batch import GraphBatch
+from pyfacebook.fanout import chunks, fan_out
+
+
+class BulkResult(object):
+
+    """
+    The outcome of deleting or archiving a single object in a bulk operation.
+
+    success is False if Facebook answered but did not confirm the change, in which case response holds what it said.
+    exception is set if the call itself failed.
+
+    """
+    __slots__ = ('id', 'connection', 'success', 'response', 'exception')
+
+    def __init__(self, id, connection=None, success=False, response=None, exception=None):
+        self.id = id
+        self.connection = connection
+        self.success = success
+        self.response = response
+        self.exception = exception
+
+    def __repr__(self):
+        outcome = "ok" if self.success else repr(self.exception or self.response)
+        return "<BulkResult " + str(self.connection) + " " + str(self.id) + ": " + outcome + ">"
+
+
+class BulkDeleter(object):
+
+    """
+    Deletes or archives many objects concurrently, one dependency tier at a time: adgroups first,
+    then adcreatives, then adcampaigns, so that no object is removed while others still depend on it.
+
+    Deletes are sent as Graph API batch requests of up to max_batch_size calls, with up to max_workers
+    batches in flight. Archives are sent as single POSTs, with up to max_workers in flight.
+
+    """
+    # (connection, model, status field, status value of deleted objects), in the order tiers are deleted
+    TIERS = (
+        ('adgroups', models.AdGroup, 'adgroup_status', 'DELETED'),
+        ('adcreatives', models.AdCreative, None, None),
+        ('adcampaigns', models.AdCampaign, 'campaign_status', 3),
+    )
+    # The params POSTed to archive an object of each tier. Tiers without an entry have no archived state and fail.
+    ARCHIVE_PARAMS = {
+        'adgroups': {'adgroup_status': 'ARCHIVED'},
+    }
+
+    def __init__(self, pyfacebook, max_workers=10, use_batch=True, max_batch_size=GraphBatch.MAX_BATCH_SIZE):
+        """
+        :param PyFacebook pyfacebook: The PyFacebook instance to send the calls through.
+        :param int max_workers: The maximum number of calls (or batch requests) in flight at once.
+        :param bool use_batch: If True, deletes are packed into batch requests. Otherwise each is sent on its own.
+        :param int max_batch_size: The maximum number of deletes sent in a single batch request.
+
+        """
+        self.pyfacebook = pyfacebook
+        self.max_workers = max_workers
+        self.use_batch = use_batch
+        self.max_batch_size = max_batch_size
+
+    def list_account(self, account_id):
+        """
+        Lists the ids of every adgroup, adcreative and adcampaign of an ad account which isn't deleted yet.
+
+        :param str account_id: The id of the ad account, e.g. act_123
+        :rtype OrderedDict: A dict of connection to a list of ids, in the order tiers are deleted.
+
+        """
+        ids_by_connection = OrderedDict()
+        for connection, model, status_field, deleted_status in self.TIERS:
+            fields = ['id'] + ([status_field] if status_field else [])
+            ids_by_connection[connection] = [
+                obj['id'] for obj in self.pyfacebook.iterate(model=model, id=account_id, connection=connection,
+                                                             return_json=True, fields=fields)
+                if not status_field or obj.get(status_field) != deleted_status]
+        return ids_by_connection
+
+    def __delete_one(self, connection, id):
+        try:
+            resp = self.pyfacebook.call_graph_api(endpoint=str(id), http_method='DELETE', expect_json=False)
+        except Exception as e:
+            return [BulkResult(id, connection, exception=e)]
+        return [BulkResult(id, connection, success=resp == 'true', response=resp)]
+
+    def __delete_chunk(self, connection, chunk):
+        batch = self.pyfacebook.batch(max_batch_size=self.max_batch_size)
+        requests = [batch.delete(id) for id in chunk]
+        try:
+            batch.execute()
+        except Exception as e:
+            return [BulkResult(id, connection, exception=e) for id in chunk]
+        return [BulkResult(id, connection, success=request.result is True, response=request.raw,
+                           exception=request.exception)
+                for id, request in zip(chunk, requests)]
+
+    def __archive_one(self, connection, id, params):
+        try:
+            resp = self.pyfacebook.call_graph_api(endpoint=str(id), http_method='POST', expect_json=False,
+                                                  params=dict(params))
+        except Exception as e:
+            return [BulkResult(id, connection, exception=e)]
+        # Facebook answers either true, or {"success": true} which call_graph_api normalizes under data
+        if isinstance(resp, dict):
+            success = bool(resp['data']) and resp['data'][0].get('success') is True
+        else:
+            success = resp == 'true'
+        return [BulkResult(id, connection, success=success, response=resp)]
+
+    def run(self, ids, archive=False):
+        """
+        Deletes or archives objects, tier by tier. Each tier is finished before the next one starts.
+
+        :param < dict | list > ids: A dict of connection (e.g. 'adgroups') to a list of ids, or a plain list of ids
+                                    which are deleted all at once, without ordering.
+        :param bool archive: If True, objects are archived instead of deleted. Only ids given under a connection
+                             in ARCHIVE_PARAMS are archived; the others are left as they are and get a failed
+                             BulkResult with a ValueError.
+
+        :rtype list: A BulkResult for every id, tier by tier.
+
+        """
+        if not isinstance(ids, dict):
+            ids = {None: list(ids)}
+        tier_connections = [tier[0] for tier in self.TIERS]
+        connections = [c for c in tier_connections if c in ids] + [c for c in ids if c not in tier_connections]
+
+        results = []
+        for connection in connections:
+            tier_ids = list(ids[connection])
+            if not tier_ids:
+                continue
+            if archive:
+                params = self.ARCHIVE_PARAMS.get(connection)
+                if not params:
+                    error = ValueError("Objects of " + str(connection) + " can't be archived")
+                    results.extend(BulkResult(id, connection, exception=error) for id in tier_ids)
+                    continue
+                tasks = [lambda id=id, c=connection: self.__archive_one(c, id, params) for id in tier_ids]
+            elif self.use_batch:
+                tasks = [lambda chunk=chunk, c=connection: self.__delete_chunk(c, chunk)
+                         for chunk in chunks(tier_ids, self.max_batch_size)]
+            else:
+                tasks = [lambda id=id, c=connection: self.__delete_one(c, id) for id in tier_ids]
+            results.extend(fan_out(tasks, self.max_workers))
+        return results
@@ -0,0 +1,305 @@
+import json
+import time
+import shelve
+import urllib
+import urlparse
+import hashlib
+import threading
+
+from collections import OrderedDict
+from pyfacebook import models
+
+# How long responses for rarely changing models are cached by default, in seconds
+DEFAULT_TTLS = {
+    models.Country: 86400,
+    models.Region: 86400,
+    models.City: 86400,
+    models.BroadTargetingCategory: 86400,
+    models.AdPreviewCss: 86400,
+    models.AdAccount: 3600,
+}
+
+
+def cache_key(endpoint, params):
+    """
+    Builds the cache key of a GET call from its endpoint and encoded params. The access_token is left out,
+    so that clients using different tokens share entries.
+
+    :param str endpoint: The endpoint called.
+    :param < dict | list > params: The encoded params of the call, as a dict or a list of (key, value) pairs.
+    :rtype str:
+
+    """
+    # Sorted by key only, so that the values of a repeated param keep their order
+    items = sorted(((key, val.encode('utf-8') if isinstance(val, unicode) else val)
+                    for key, val in (params.items() if isinstance(params, dict) else params) if key != 'access_token'),
+                   key=lambda item: item[0])
+    return hashlib.sha1(endpoint + '?' + urllib.urlencode(items)).hexdigest()
+
+
+def response_tags(endpoint, json_response):
+    """
+    Returns the ids a cached response depends on: the object the endpoint belongs to, and every object in the response.
+    Writes to any of these ids invalidate the response.
+
+    :param str endpoint: The endpoint called.
+    :param dict json_response: The normalized response.
+    :rtype set:
+
+    """
+    tags = set([endpoint.split('/')[0]])
+    data = json_response.get('data')
+    for obj in (data.values() if isinstance(data, dict) else data or []):
+        if isinstance(obj, dict) and obj.get('id'):
+            tags.add(str(obj['id']))
+    return tags
+
+
+def written_endpoints(endpoint, params):
+    """
+    Returns the endpoints a POST or DELETE call writes to. A batch call writes to the relative_url of each
+    of its sub-requests which isn't a GET.
+
+    :param str endpoint: The endpoint called.
+    :param dict params: The params of the call.
+    :rtype list:
+
+    """
+    batch = params.get('batch') if isinstance(params, dict) else None
+    if endpoint.strip('/') or not batch:
+        return [endpoint]
+    if isinstance(batch, basestring):
+        batch = json.loads(batch)
+    return [urlparse.urlparse(sub_request['relative_url']).path.lstrip('/') for sub_request in batch
+            if sub_request.get('method', 'GET').upper() != 'GET' and sub_request.get('relative_url')]
+
+
+class MemoryCacheBackend(object):
+
+    """
+    An in-memory LRU store for cached responses, bounded by the total size of the stored bodies.
+
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.__entries = OrderedDict()
+        self.__tags = {}
+        self.__lock = threading.Lock()
+
+    def __remove(self, key):
+        entry = self.__entries.pop(key, None)
+        if entry:
+            self.bytes -= len(entry['body'])
+            for tag in entry['tags']:
+                keys = self.__tags.get(tag)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self.__tags[tag]
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if not entry:
+                return None
+            if entry['expires_at'] < time.time():
+                self.__remove(key)
+                return None
+            # Move the entry to the end, as the most recently used
+            del self.__entries[key]
+            self.__entries[key] = entry
+            return entry['body']
+
+    def set(self, key, body, expires_at, tags):
+        if len(body) > self.max_bytes:
+            return
+        with self.__lock:
+            self.__remove(key)
+            self.__entries[key] = {'body': body, 'expires_at': expires_at, 'tags': tags}
+            self.bytes += len(body)
+            for tag in tags:
+                self.__tags.setdefault(tag, set()).add(key)
+            while self.bytes > self.max_bytes:
+                self.__remove(next(iter(self.__entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        with self.__lock:
+            keys = list(self.__tags.get(tag, ()))
+            for key in keys:
+                self.__remove(key)
+        return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__tags.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+class DiskCacheBackend(object):
+
+    """
+    A shelf-backed store for cached responses, so they survive the process. Least recently used entries are evicted
+    once the total size of the stored bodies goes over max_bytes.
+
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self.__lock = threading.Lock()
+        self.__shelf = shelve.open(path)
+        self.bytes = sum(len(entry['body']) for entry in self.__shelf.values())
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__shelf.get(key)
+            if not entry:
+                return None
+            if entry['expires_at'] < time.time():
+                self.bytes -= len(entry['body'])
+                del self.__shelf[key]
+                return None
+            entry['used_at'] = time.time()
+            self.__shelf[key] = entry
+            return entry['body']
+
+    def set(self, key, body, expires_at, tags):
+        if len(body) > self.max_bytes:
+            return
+        with self.__lock:
+            old_entry = self.__shelf.get(key)
+            if old_entry:
+                self.bytes -= len(old_entry['body'])
+            self.__shelf[key] = {'body': body, 'expires_at': expires_at, 'tags': tags, 'used_at': time.time()}
+            self.bytes += len(body)
+            if self.bytes > self.max_bytes:
+                self.__evict()
+            self.__shelf.sync()
+
+    def __evict(self):
+        by_use = sorted((entry['used_at'], key, len(entry['body'])) for key, entry in self.__shelf.items())
+        for used_at, key, size in by_use:
+            if self.bytes <= self.max_bytes:
+                break
+            del self.__shelf[key]
+            self.bytes -= size
+            self.evictions += 1
+
+    def invalidate(self, tag):
+        with self.__lock:
+            keys = [key for key, entry in self.__shelf.items() if tag in entry['tags']]
+            for key in keys:
+                self.bytes -= len(self.__shelf[key]['body'])
+                del self.__shelf[key]
+            self.__shelf.sync()
+        return len(keys)
+
+    def clear(self):
+        with self.__lock:
+            self.__shelf.clear()
+            self.__shelf.sync()
+            self.bytes = 0
+
+    def close(self):
+        self.__shelf.close()
+
+    def __len__(self):
+        return len(self.__shelf)
+
+
+class ResponseCache(object):
+
+    """
+    An opt-in cache for GET responses of models that rarely change, such as targeting lookups.
+
+    Responses are cached for the TTL of the model they are for, and are invalidated by POSTs and DELETEs
+    to the object they belong to, or to any object they contain, including those sent in batch calls.
+
+    """
+
+    def __init__(self, backend=None, ttls=None, default_ttl=None):
+        """
+        :param < MemoryCacheBackend | DiskCacheBackend > backend: Where responses are stored. Defaults to a 64MB in-memory LRU.
+        :param dict ttls: A dict of model class to the number of seconds its responses are cached. Defaults to DEFAULT_TTLS.
+        :param int default_ttl: The number of seconds responses for models not in ttls are cached, or None to not cache them.
+
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttls = dict(DEFAULT_TTLS) if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.__lock = threading.Lock()
+        self.__stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def __count(self, stat, amount=1):
+        with self.__lock:
+            self.__stats[stat] += amount
+
+    def ttl_for(self, model):
+        """
+        Returns the number of seconds responses for a model are cached, or None if they aren't.
+
+        :param tinymodel.TinyModel model: The model class
+        :rtype int:
+
+        """
+        return self.ttls.get(model, self.default_ttl)
+
+    def get(self, endpoint, params):
+        """
+        Returns the cached response for a GET call, or None.
+
+        :rtype dict:
+
+        """
+        body = self.backend.get(cache_key(endpoint, params))
+        if body is None:
+            self.__count('misses')
+            return None
+        self.__count('hits')
+        return json.loads(body)
+
+    def set(self, endpoint, params, json_response, ttl):
+        """
+        Caches the normalized response of a GET call for ttl seconds.
+
+        """
+        self.backend.set(cache_key(endpoint, params), json.dumps(json_response), time.time() + ttl,
+                         response_tags(endpoint, json_response))
+
+    def invalidate(self, endpoint, params=None):
+        """
+        Drops every cached response which depends on the object the endpoint belongs to, or for a batch call,
+        on the objects its sub-requests write to.
+
+        :param str endpoint: The endpoint written to.
+        :param dict params: The params of the call.
+
+        """
+        for written in written_endpoints(endpoint, params or {}):
+            invalidated = self.backend.invalidate(written.split('/')[0])
+            if invalidated:
+                self.__count('invalidations', invalidated)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of the cache, and the size of the backend.
+
+        :rtype dict: A dict with keys hits, misses, invalidations, evictions, entries and bytes
+
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+        stats.update({'evictions': self.backend.evictions, 'entries': len(self.backend), 'bytes': self.backend.bytes})
+        return stats
@@ -0,0 +1,846 @@
+"""
+A local stand-in for the Facebook Graph API, for integration and load testing PyFacebook offline.
+
+It serves synthetic ad accounts of any size, generated from object indexes so that millions of objects cost
+no memory until they are changed, and implements the calls PyFacebook makes: debug_token, oauth/access_token,
+ad accounts and their connections (adcampaigns, adgroups, adcreatives, adimages, adgroupstats) with paging,
+filtering and field selection, objects by id and ?ids=, POSTs, DELETEs and batch requests. Latency, throttling
+and server errors can be injected.
+
+Run it on its own with:
+
+    python -m pyfacebook.fakegraph --port 8080 --adgroups-per-campaign 1000 --latency 0.05
+
+or in-process:
+
+    with FakeGraphServer(accounts=2, throttle_rate=0.01) as server:
+        pyfb = PyFacebook(token_text='fake', facebook_graph_url=server.url)
+
+"""
+import cgi
+import json
+import time
+import bisect
+import random
+import socket
+import hashlib
+import urllib
+import urlparse
+import argparse
+import calendar
+import threading
+import SocketServer
+import BaseHTTPServer
+
+from pyfacebook.instrumentation import endpoint_pattern
+
+GRAPH_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S+0000'
+
+# The first id of the generated objects of each connection, and of the objects created through POSTs
+ID_BASES = {
+    'adcampaigns': 6000000000000,
+    'adgroups': 6010000000000,
+    'adcreatives': 6020000000000,
+}
+CREATED_ID_OFFSET = 5000000000
+
+# How each connection marks deleted objects. Objects of other connections are dropped when deleted.
+DELETED_STATUSES = {
+    'adcampaigns': ('campaign_status', 3),
+    'adgroups': ('adgroup_status', 'DELETED'),
+}
+
+# POSTed params which are sent as they are, rather than decoded from JSON
+TEXT_PARAMS = frozenset(['name', 'title', 'body', 'link_url', 'url_tags', 'bid_type', 'adgroup_status'])
+
+FILTER_OPERATORS = {
+    'EQUAL': lambda value, target: value == target,
+    'NOT_EQUAL': lambda value, target: value != target,
+    'GREATER_THAN': lambda value, target: value is not None and value > target,
+    'LESS_THAN': lambda value, target: value is not None and value < target,
+    'IN': lambda value, target: value in target,
+    'NOT_IN': lambda value, target: value not in target,
+    'CONTAIN': lambda value, target: value is not None and unicode(target) in unicode(value),
+}
+
+
+def graph_time(timestamp):
+    return time.strftime(GRAPH_TIME_FORMAT, time.gmtime(timestamp))
+
+
+def parse_graph_time(value):
+    """
+    Converts a filter value on a time field, a unix timestamp or a Graph time string, to a unix timestamp.
+
+    """
+    if isinstance(value, basestring) and not value.isdigit():
+        return calendar.timegm(time.strptime(value[:19], GRAPH_TIME_FORMAT[:17]))
+    return int(value)
+
+
+def error_body(message, code, error_type='OAuthException'):
+    return json.dumps({'error': {'message': message, 'type': error_type, 'code': code}})
+
+
+class GraphError(Exception):
+
+    """
+    An error answered to a call, as Facebook would send it.
+
+    """
+
+    def __init__(self, message, code=100, status=400):
+        Exception.__init__(self, message)
+        self.code = code
+        self.status = status
+
+
+class FakeGraph(object):
+
+    """
+    The data and the endpoints of the fake Graph API, independent of HTTP.
+
+    Each ad account act_1 ... act_<accounts> has generated campaigns, adgroups, creatives, images and adgroup stats.
+    Connections are listed most recently updated first. Generated objects are spaced a minute apart going back from
+    when the FakeGraph was made, and objects which are created or changed move to the front of their connection.
+
+    """
+    CONNECTIONS = ('adcampaigns', 'adgroups', 'adcreatives', 'adimages', 'adgroupstats')
+
+    def __init__(self, accounts=1, campaigns_per_account=10, adgroups_per_campaign=100, creatives_per_account=100,
+                 images_per_account=10, page_size=25, max_page_size=5000, latency=0.0, throttle_rate=0.0,
+                 throttle_code=17, error_rate=0.0, rate_limit=None, seed=None, clock=time.time, sleep=time.sleep):
+        """
+        :param int accounts: The number of ad accounts.
+        :param int campaigns_per_account: The number of campaigns generated per account.
+        :param int adgroups_per_campaign: The number of adgroups generated per campaign. Each has one adgroupstats row.
+        :param int creatives_per_account: The number of creatives generated per account.
+        :param int images_per_account: The number of images generated per account.
+        :param int page_size: The number of objects per page when no limit is given.
+        :param int max_page_size: The largest limit honoured.
+        :param < float | tuple > latency: The seconds every call takes, or a (min, max) range to pick from at random.
+        :param float throttle_rate: The fraction of calls answered with a throttling error, at random.
+        :param int throttle_code: The Facebook error code of throttling errors, e.g. 4, 17 or 613.
+        :param float error_rate: The fraction of calls answered with an HTTP 500, at random.
+        :param float rate_limit: If set, the calls per second allowed before calls are throttled. The usage is
+                                 reported in the X-App-Usage header, as Facebook does.
+        :param int seed: The seed of the random latency, throttling and errors.
+
+        """
+        self.accounts = accounts
+        self.counts = {
+            'adcampaigns': campaigns_per_account,
+            'adgroups': campaigns_per_account * adgroups_per_campaign,
+            'adcreatives': creatives_per_account,
+            'adimages': images_per_account,
+            'adgroupstats': campaigns_per_account * adgroups_per_campaign,
+        }
+        self.adgroups_per_campaign = adgroups_per_campaign
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.throttle_code = throttle_code
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.revoked_tokens = set()
+        self.clock = clock
+        self.sleep = sleep
+        self.epoch = int(clock())
+
+        self.__random = random.Random(seed)
+        self.__lock = threading.RLock()
+        # Created and changed objects by id, as (connection, account index, updated timestamp, object or None if deleted)
+        self.__objects = {}
+        # The ids of the created and changed objects of each (connection, account index), most recently updated first
+        self.__front = {}
+        # The sorted indexes of the generated objects of each (connection, account index) which were changed
+        self.__overridden = {}
+        self.__created = 0
+        self.__tokens = float(rate_limit or 0)
+        self.__tokens_at = clock()
+        self.__stats = {}
+
+    def __generated_id(self, connection, account_index, index):
+        return ID_BASES[connection] + account_index * self.counts[connection] + index
+
+    def __locate(self, id):
+        """
+        Finds the generated object an id belongs to.
+
+        :rtype tuple: (connection, account index, index), or None if it isn't the id of a generated object.
+
+        """
+        for connection, base in ID_BASES.items():
+            offset = id - base
+            if 0 <= offset < self.accounts * self.counts[connection]:
+                return (connection,) + divmod(offset, self.counts[connection])
+        return None
+
+    def generate(self, connection, account_index, index):
+        """
+        Builds a generated object.
+
+        :rtype tuple: (updated timestamp, object)
+
+        """
+        account_id = account_index + 1
+        updated = self.epoch - 60 * (index + 1)
+        if connection == 'adimages':
+            image_hash = hashlib.md5('act_%d/%d' % (account_id, index)).hexdigest()
+            return updated, {'hash': image_hash, 'url': 'https://fbcdn.example.com/' + image_hash + '.png'}
+        if connection == 'adgroupstats':
+            return updated, self.__adgroup_stats(account_index, index)
+
+        id = self.__generated_id(connection, account_index, index)
+        obj = {
+            'id': id,
+            'account_id': account_id,
+            'name': u'%s %d' % (connection[2:-1], index),
+            'created_time': graph_time(updated - 86400),
+            'updated_time': graph_time(updated),
+        }
+        if connection == 'adcampaigns':
+            obj.update(campaign_status=1, daily_budget=10000 + index % 100 * 100, lifetime_budget=0,
+                       budget_remaining=10000, start_time=graph_time(self.epoch - 30 * 86400))
+        elif connection == 'adgroups':
+            creative_id = self.__generated_id('adcreatives', account_index, index % max(self.counts['adcreatives'], 1))
+            obj.update(campaign_id=self.__generated_id('adcampaigns', account_index, index // self.adgroups_per_campaign),
+                       adgroup_status='ACTIVE', bid_type='CPC', bid_info={'CLICKS': 50 + index % 50},
+                       creative_ids=[creative_id], creative={'creative_id': creative_id})
+        elif connection == 'adcreatives':
+            image_hash = self.generate('adimages', account_index, index % max(self.counts['adimages'], 1))[1]['hash']
+            obj.update(type=1, title=u'Title %d' % index, body=u'Body of creative %d' % index, image_hash=image_hash,
+                       link_url=u'http://www.example.com/%d' % index)
+            del obj['created_time'], obj['updated_time'], obj['account_id']
+        return updated, obj
+
+    def __adgroup_stats(self, account_index, index):
+        adgroup_id = self.__generated_id('adgroups', account_index, index)
+        spread = adgroup_id * 2654435761 % 4294967296
+        impressions = 1000 + spread % 100000
+        clicks = impressions // (50 + spread % 50)
+        return {
+            'id': u'%d/stats/0/%d' % (adgroup_id, self.epoch),
+            'account_id': account_index + 1,
+            'adcampaign_id': self.__generated_id('adcampaigns', account_index, index // self.adgroups_per_campaign),
+            'adgroup_id': adgroup_id,
+            'impressions': impressions,
+            'clicks': clicks,
+            'spent': clicks * (20 + spread % 30),
+            'social_impressions': impressions // 4,
+            'social_clicks': clicks // 4,
+            'social_spent': clicks * (20 + spread % 30) // 4,
+            'unique_impressions': impressions * 3 // 4,
+            'unique_clicks': clicks * 3 // 4,
+            'social_unique_impressions': impressions // 5,
+            'social_unique_clicks': clicks // 5,
+            'start_time': None,
+            'end_time': None,
+        }
+
+    def account(self, account_index):
+        return {
+            'id': u'act_%d' % (account_index + 1),
+            'account_id': account_index + 1,
+            'name': u'Fake account %d' % (account_index + 1),
+            'account_status': 1,
+            'currency': u'USD',
+            'timezone_id': 1,
+            'timezone_name': u'America/Los_Angeles',
+            'timezone_offset_hours_utc': -8,
+            'daily_spend_limit': 1000000,
+            'amount_spent': 0,
+        }
+
+    def __nth_generated(self, position, overridden):
+        """
+        Returns the index of the position-th generated object which wasn't changed.
+
+        """
+        index = position + bisect.bisect_right(overridden, position)
+        while True:
+            next_index = position + bisect.bisect_right(overridden, index)
+            if next_index == index:
+                return index
+            index = next_index
+
+    def listing(self, connection, account_index, start=0):
+        """
+        Yields the objects of a connection from a position on, most recently updated first.
+
+        :rtype generator: A generator of (position, updated timestamp, object)
+
+        """
+        key = (connection, account_index)
+        with self.__lock:
+            front = [(id,) + self.__objects[id][2:] for id in self.__front.get(key, ())]
+            overridden = list(self.__overridden.get(key, ()))
+
+        position = start
+        for id, updated, obj in front[start:]:
+            if obj is not None:
+                yield position, updated, obj
+            position += 1
+
+        skipped = set(overridden)
+        index = self.__nth_generated(max(position - len(front), 0), overridden)
+        while index < self.counts[connection]:
+            if index not in skipped:
+                updated, obj = self.generate(connection, account_index, index)
+                yield position, updated, obj
+                position += 1
+            index += 1
+
+    def __get_object(self, id):
+        """
+        :rtype tuple: (connection, account index, updated timestamp, object), or None if there is no such object.
+
+        """
+        with self.__lock:
+            if id in self.__objects:
+                found = self.__objects[id]
+                return found if found[3] is not None else None
+        location = self.__locate(id)
+        if location is None:
+            return None
+        connection, account_index, index = location
+        return (connection, account_index) + self.generate(connection, account_index, index)
+
+    def __store(self, connection, account_index, id, obj, index=None):
+        """
+        Saves a created or changed object, moving it to the front of its connection.
+
+        """
+        key = (connection, account_index)
+        with self.__lock:
+            front = self.__front.setdefault(key, [])
+            if id in self.__objects:
+                front.remove(id)
+            elif index is not None:
+                bisect.insort(self.__overridden.setdefault(key, []), index)
+            front.insert(0, id)
+            self.__objects[id] = (connection, account_index, int(self.clock()), obj)
+
+    def handle(self, method, path, params, files=None, base_url=''):
+        """
+        Answers a single call, injecting latency, throttling and errors as configured.
+
+        :param str method: GET, POST or DELETE
+        :param str path: The path of the call, without the leading slash.
+        :param dict params: The query string or form params.
+        :param dict files: Uploaded files, as a dict of field name to (filename, md5 hex digest).
+        :param str base_url: The url the server is reached at, for paging urls.
+
+        :rtype tuple: (HTTP status, body, dict of headers)
+
+        """
+        self.__count(method, path, 'requests')
+        delay = self.latency if not isinstance(self.latency, (tuple, list)) else self.__random.uniform(*self.latency)
+        if delay:
+            self.sleep(delay)
+
+        headers = {}
+        usage = self.__take_token()
+        if usage is not None:
+            headers['X-App-Usage'] = json.dumps({'call_count': usage, 'total_time': usage, 'total_cputime': usage})
+        if (usage is not None and usage >= 100) or (self.throttle_rate and self.__random.random() < self.throttle_rate):
+            self.__count(method, path, 'throttled')
+            return 400, error_body("(#" + str(self.throttle_code) + ") User request limit reached", self.throttle_code), headers
+        if self.error_rate and self.__random.random() < self.error_rate:
+            self.__count(method, path, 'errors')
+            return 500, error_body("An unexpected error has occurred. Please retry your request later.", 2), headers
+        status, body = self.__call(method, path, params, files or {}, base_url)
+        return status, body, headers
+
+    def __call(self, method, path, params, files, base_url):
+        """
+        Answers a single call, or a sub-request of a batch call.
+
+        :rtype tuple: (HTTP status, body)
+
+        """
+        try:
+            return self.__dispatch(method, path, params, files, base_url)
+        except GraphError as e:
+            self.__count(method, path, 'errors')
+            return e.status, error_body(str(e), e.code)
+
+    def __take_token(self):
+        """
+        Takes a call from the rate limit bucket.
+
+        :rtype int: The usage of the rate limit in percent, or None if there is no rate limit.
+
+        """
+        if not self.rate_limit:
+            return None
+        with self.__lock:
+            now = self.clock()
+            self.__tokens = min(float(self.rate_limit), self.__tokens + (now - self.__tokens_at) * self.rate_limit)
+            self.__tokens_at = now
+            if self.__tokens < 1:
+                return 100
+            self.__tokens -= 1
+            return min(99, int(100 * (1 - self.__tokens / self.rate_limit)))
+
+    def __count(self, method, path, stat, amount=1):
+        key = method + ' ' + endpoint_pattern(path.split('?')[0])
+        with self.__lock:
+            counts = self.__stats.setdefault(key, {'requests': 0, 'throttled': 0, 'errors': 0, 'objects': 0})
+            counts[stat] += amount
+
+    def stats(self):
+        """
+        :rtype dict: A dict of 'METHOD endpoint pattern' to the number of requests, throttled calls, errors
+                     and objects served.
+
+        """
+        with self.__lock:
+            return dict((key, dict(counts)) for key, counts in self.__stats.items())
+
+    def reset_stats(self):
+        with self.__lock:
+            self.__stats.clear()
+
+    def __check_token(self, params):
+        token = params.get('access_token')
+        if not token:
+            raise GraphError("An active access token must be used to query information about the current user.", 2500)
+        if token in self.revoked_tokens:
+            raise GraphError("Error validating access token: The session has been invalidated.", 190)
+
+    def __dispatch(self, method, path, params, files, base_url):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['oauth', 'access_token']:
+            return 200, self.__exchange_token(params)
+        if parts == ['debug_token']:
+            return 200, json.dumps(self.__debug_token(params))
+        self.__check_token(params)
+
+        if not parts and method == 'POST' and 'batch' in params:
+            return 200, json.dumps(self.__batch(params, files, base_url))
+        if not parts and method == 'GET' and 'ids' in params:
+            return 200, json.dumps(self.__get_ids(params))
+        if method == 'DELETE' and len(parts) == 1:
+            return 200, self.__delete(parts[0])
+        if len(parts) == 1 and parts[0].startswith('act_'):
+            if method == 'GET':
+                return 200, json.dumps(self.__select(self.account(self.__account_index(parts[0])), params))
+        elif len(parts) == 1:
+            if method == 'GET':
+                return 200, json.dumps(self.__select(self.__object(parts[0])[3], params))
+            elif method == 'POST':
+                return 200, json.dumps(self.__update(parts[0], params))
+        elif len(parts) == 2 and parts[0].startswith('act_') and parts[1] in self.CONNECTIONS:
+            account_index = self.__account_index(parts[0])
+            if method == 'GET':
+                return 200, json.dumps(self.__page(parts[1], account_index, params, path, base_url))
+            elif method == 'POST':
+                return 200, json.dumps(self.__create(parts[1], account_index, params, files))
+        elif len(parts) == 2 and parts[1] == 'adgroups' and method == 'GET':
+            connection, account_index = self.__object(parts[0])[:2]
+            if connection == 'adcampaigns':
+                params = dict(params, filtering=json.dumps(json.loads(params.get('filtering') or '[]') + [
+                    {'field': 'campaign_id', 'operator': 'EQUAL', 'value': int(parts[0])}]))
+                return 200, json.dumps(self.__page('adgroups', account_index, params, path, base_url))
+        raise GraphError("Unsupported " + method.lower() + " request.", 100)
+
+    def __account_index(self, account_id):
+        try:
+            account_index = int(account_id[4:]) - 1
+        except ValueError:
+            account_index = -1
+        if not 0 <= account_index < self.accounts:
+            raise GraphError("Unsupported get request. Object with ID '" + account_id + "' does not exist.", 100)
+        return account_index
+
+    def __object(self, id):
+        found = self.__get_object(int(id)) if id.isdigit() else None
+        if found is None:
+            raise GraphError("Unsupported get request. Object with ID '" + id + "' does not exist.", 100)
+        return found
+
+    def __exchange_token(self, params):
+        if params.get('grant_type') != 'fb_exchange_token' or not params.get('fb_exchange_token'):
+            raise GraphError("Missing grant_type or fb_exchange_token", 1)
+        return urllib.urlencode({'access_token': 'long-' + params['fb_exchange_token'], 'expires': 5183999})
+
+    def __debug_token(self, params):
+        self.__check_token(params)
+        token = params.get('input_token') or params['access_token']
+        now = int(self.clock())
+        if token in self.revoked_tokens:
+            return {'data': {'is_valid': False, 'error': {'message': "The session has been invalidated.", 'code': 190}}}
+        return {'data': {'app_id': u'1', 'is_valid': True, 'application': u'Fake Graph', 'user_id': u'1',
+                         'issued_at': now, 'expires_at': now + 60 * 86400, 'scopes': [u'ads_management']}}
+
+    def __select(self, obj, params):
+        """
+        Keeps only the fields asked for, if any were.
+
+        """
+        fields = params.get('fields')
+        if not fields:
+            return obj
+        try:
+            names = json.loads(fields)
+        except ValueError:
+            names = fields.split(',')
+        if not isinstance(names, list):
+            names = [fields]
+        names = set(name.split('{')[0].strip() for name in names) | set(['id'])
+        return dict((key, val) for key, val in obj.iteritems() if key in names)
+
+    def __filters(self, params):
+        filters = []
+        for spec in json.loads(params.get('filtering') or '[]'):
+            operator = FILTER_OPERATORS.get(spec.get('operator'))
+            if operator is None:
+                raise GraphError("Filtering operator " + str(spec.get('operator')) + " is not supported", 100)
+            value = spec.get('value')
+            if spec['field'] in ('updated_time', 'created_time'):
+                value = parse_graph_time(value)
+            filters.append((spec['field'], spec['operator'], operator, value))
+        return filters
+
+    def __matches(self, obj, updated, filters):
+        for field, operator_name, operator, value in filters:
+            if field == 'updated_time':
+                obj_value = updated
+            elif field == 'created_time':
+                obj_value = parse_graph_time(obj['created_time']) if obj.get('created_time') else None
+            else:
+                obj_value = obj.get(field)
+            if not operator(obj_value, value):
+                return False
+        return True
+
+    def __page(self, connection, account_index, params, path, base_url):
+        limit = min(int(params.get('limit') or self.page_size), self.max_page_size)
+        start = int(params.get('after') or params.get('offset') or 0)
+        filters = self.__filters(params)
+        # Connections are listed most recently updated first, so nothing past an updated_time lower bound can match
+        updated_after = [value for field, name, op, value in filters if field == 'updated_time' and name == 'GREATER_THAN']
+        hashes = set(json.loads(params['hashes'])) if connection == 'adimages' and params.get('hashes') else None
+
+        data = []
+        next_position = None
+        exhausted = True
+        for position, updated, obj in self.listing(connection, account_index, start):
+            if updated_after and updated <= max(updated_after):
+                break
+            next_position = position + 1
+            if filters and not self.__matches(obj, updated, filters):
+                continue
+            if hashes is not None and obj['hash'] not in hashes:
+                continue
+            data.append(self.__select(obj, params))
+            if len(data) >= limit:
+                exhausted = False
+                break
+
+        self.__count('GET', path, 'objects', len(data))
+        page = {'data': data, 'paging': {'cursors': {'before': str(start), 'after': str(next_position or start)}}}
+        if not exhausted:
+            next_params = dict((key, val) for key, val in params.items() if key not in ('after', 'offset'))
+            next_params['after'] = next_position
+            page['paging']['next'] = base_url + '/' + path.lstrip('/') + '?' + urllib.urlencode(next_params)
+        return page
+
+    def __get_ids(self, params):
+        result = {}
+        for id in params['ids'].split(','):
+            id = id.strip()
+            try:
+                obj = self.account(self.__account_index(id)) if id.startswith('act_') else self.__object(id)[3]
+            except GraphError:
+                continue
+            result[id] = self.__select(obj, params)
+        return result
+
+    def __decode_params(self, params):
+        decoded = {}
+        for key, val in params.items():
+            if key in ('access_token', 'file') or key in TEXT_PARAMS:
+                decoded[key] = val
+                continue
+            try:
+                decoded[key] = json.loads(val)
+            except (TypeError, ValueError):
+                decoded[key] = val
+        decoded.pop('access_token', None)
+        return decoded
+
+    def __create(self, connection, account_index, params, files):
+        if connection == 'adimages':
+            if not files:
+                raise GraphError("No image file was uploaded", 100)
+            images = {}
+            for field_name, (filename, digest) in files.items():
+                images[filename] = {'hash': digest, 'url': 'https://fbcdn.example.com/' + digest + '.png'}
+                self.__store(connection, account_index, digest, images[filename])
+            return {'images': images}
+        if connection == 'adgroupstats':
+            raise GraphError("Unsupported post request.", 100)
+
+        with self.__lock:
+            self.__created += 1
+            id = ID_BASES[connection] + CREATED_ID_OFFSET + self.__created
+        obj = dict(self.generate(connection, account_index, 0)[1], id=id)
+        obj.update(self.__decode_params(params))
+        now = graph_time(self.clock())
+        if 'updated_time' in obj:
+            obj['created_time'] = obj['updated_time'] = now
+        self.__store(connection, account_index, id, obj)
+        return {'id': id}
+
+    def __update(self, id, params):
+        connection, account_index, updated, obj = self.__object(id)
+        obj = dict(obj, **self.__decode_params(params))
+        if 'updated_time' in obj:
+            obj['updated_time'] = graph_time(self.clock())
+        location = self.__locate(int(id))
+        self.__store(connection, account_index, int(id), obj, location[2] if location else None)
+        return {'success': True}
+
+    def __delete(self, id):
+        if not id.isdigit():
+            raise GraphError("Unsupported delete request.", 100)
+        connection, account_index, updated, obj = self.__object(id)
+        location = self.__locate(int(id))
+        if connection in DELETED_STATUSES:
+            status_field, deleted_status = DELETED_STATUSES[connection]
+            obj = dict(obj, **{status_field: deleted_status})
+            if 'updated_time' in obj:
+                obj['updated_time'] = graph_time(self.clock())
+        else:
+            obj = None
+        self.__store(connection, account_index, int(id), obj, location[2] if location else None)
+        return 'true'
+
+    def __batch(self, params, files, base_url):
+        """
+        Answers each sub-request of a batch call in order, resolving {result=name:$.path} references to
+        the responses of earlier named sub-requests.
+
+        """
+        sub_requests = json.loads(params['batch'])
+        if len(sub_requests) > 50:
+            raise GraphError("Too many requests in batch message. Maximum batch size is 50", 1)
+
+        named = {}
+        responses = []
+        for sub_request in sub_requests:
+            url = urlparse.urlsplit(sub_request['relative_url'])
+            sub_params = dict(urlparse.parse_qsl(url.query))
+            sub_params.update(urlparse.parse_qsl(sub_request.get('body') or ''))
+            sub_params = dict((key, self.__resolve(val, named)) for key, val in sub_params.items())
+            sub_params.setdefault('access_token', params['access_token'])
+            sub_files = dict((name, files[name]) for name in (sub_request.get('attached_files') or '').split(',') if name in files)
+            self.__count(sub_request['method'].upper(), url.path, 'requests')
+            status, body = self.__call(sub_request['method'].upper(), url.path, sub_params, sub_files, base_url)
+            if sub_request.get('name'):
+                named[sub_request['name']] = body
+            responses.append({'code': status, 'body': body,
+                              'headers': [{'name': 'Content-Type', 'value': 'text/javascript; charset=UTF-8'}]})
+        return responses
+
+    def __resolve(self, value, named):
+        if '{result=' not in value:
+            return value
+        start = value.index('{result=')
+        end = value.index('}', start)
+        name, path = value[start + len('{result='):end].split(':', 1)
+        values = [json.loads(named[name])] if name in named else []
+        for key in path.lstrip('$.').split('.'):
+            found = []
+            for val in values:
+                if key == '*':
+                    found.extend(val.values() if isinstance(val, dict) else val)
+                elif isinstance(val, dict) and key in val:
+                    found.append(val[key])
+            values = found
+        return value[:start] + ','.join(unicode(val) for val in values) + value[end + 1:]
+
+
+class FakeGraphRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    """
+    Parses HTTP requests for the FakeGraph of the server, and writes its answers. Connections are kept alive unless
+    the client asks for them to be closed.
+
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def __params(self):
+        url = urlparse.urlsplit(self.path)
+        params = dict(urlparse.parse_qsl(url.query))
+        files = {}
+        length = int(self.headers.get('content-length') or 0)
+        content_type = self.headers.get('content-type') or ''
+        if length and content_type.startswith('multipart/form-data'):
+            form = cgi.FieldStorage(fp=self.rfile, headers=self.headers,
+                                    environ={'REQUEST_METHOD': 'POST', 'CONTENT_TYPE': content_type})
+            for field in form.list or []:
+                if field.filename:
+                    digest = hashlib.md5()
+                    for chunk in iter(lambda: field.file.read(65536), ''):
+                        digest.update(chunk)
+                    files[field.name] = (field.filename, digest.hexdigest())
+                else:
+                    params[field.name] = field.value
+        elif length:
+            params.update(urlparse.parse_qsl(self.rfile.read(length)))
+        return url.path.lstrip('/'), params, files
+
+    def __answer(self):
+        path, params, files = self.__params()
+        status, body, headers = self.server.graph.handle(self.command, path, params, files, self.server.url)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/javascript; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if self.close_connection:
+            # Tell the client the connection won't be reused, as it asked, rather than letting it find out mid-request
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = __answer
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class FakeGraphServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    """
+    Serves a FakeGraph over HTTP on localhost, one thread per connection. Pass its url to PyFacebook
+    as facebook_graph_url.
+
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, graph=None, host='127.0.0.1', port=0, verbose=False, **kwargs):
+        """
+        :param FakeGraph graph: The data and endpoints to serve. If not provided, one is made with kwargs.
+        :param str host: The address to listen on.
+        :param int port: The port to listen on. 0 picks a free one.
+        :param bool verbose: If True, every request is logged to stderr.
+
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), FakeGraphRequestHandler)
+        self.graph = graph or FakeGraph(**kwargs)
+        self.verbose = verbose
+        self.url = 'http://%s:%d' % self.server_address[:2]
+        self.__thread = None
+        self.__stopped = False
+        self.__connections = set()
+        self.__handlers = set()
+        self.__connections_lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self.__connections_lock:
+            self.__connections.add(request)
+        SocketServer.ThreadingMixIn.process_request(self, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.__connections_lock:
+            self.__handlers.add(threading.current_thread())
+        try:
+            SocketServer.ThreadingMixIn.process_request_thread(self, request, client_address)
+        finally:
+            with self.__connections_lock:
+                self.__handlers.discard(threading.current_thread())
+
+    def handle_error(self, request, client_address):
+        # Connections closed by stop fail mid-request, which isn't worth a traceback
+        if not self.__stopped:
+            BaseHTTPServer.HTTPServer.handle_error(self, request, client_address)
+
+    def shutdown_request(self, request):
+        with self.__connections_lock:
+            self.__connections.discard(request)
+        BaseHTTPServer.HTTPServer.shutdown_request(self, request)
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        :rtype FakeGraphServer: self, for chaining.
+
+        """
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops serving, and closes any kept-alive connections and waits for their threads to exit.
+
+        """
+        self.__stopped = True
+        self.shutdown()
+        self.server_close()
+        with self.__connections_lock:
+            connections, self.__connections = self.__connections, set()
+            handlers = list(self.__handlers)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for handler in handlers:
+            handler.join(5)
+        if self.__thread:
+            self.__thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serves a fake Facebook Graph API for offline testing of PyFacebook.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--accounts', type=int, default=1)
+    parser.add_argument('--campaigns-per-account', type=int, default=10)
+    parser.add_argument('--adgroups-per-campaign', type=int, default=100)
+    parser.add_argument('--creatives-per-account', type=int, default=100)
+    parser.add_argument('--images-per-account', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=25)
+    parser.add_argument('--latency', type=float, default=0.0, help="The seconds every call takes.")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Up to this many seconds are added at random.")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="The fraction of calls throttled at random.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="The fraction of calls failing with an HTTP 500.")
+    parser.add_argument('--rate-limit', type=float, help="The calls per second allowed before calls are throttled.")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    latency = (args.latency, args.latency + args.latency_jitter) if args.latency_jitter else args.latency
+    graph = FakeGraph(accounts=args.accounts, campaigns_per_account=args.campaigns_per_account,
+                      adgroups_per_campaign=args.adgroups_per_campaign, creatives_per_account=args.creatives_per_account,
+                      images_per_account=args.images_per_account, page_size=args.page_size, latency=latency,
+                      throttle_rate=args.throttle_rate, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                      seed=args.seed)
+    server = FakeGraphServer(graph, host=args.host, port=args.port, verbose=args.verbose)
+    print "Serving a fake Graph API at", server.url
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
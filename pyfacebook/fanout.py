@@ -0,0 +1,58 @@
+from multiprocessing.pool import ThreadPool
+
+# The maximum number of ids Facebook accepts in a single ?ids= call
+MAX_IDS_PER_CALL = 50
+
+
+class GetResult(object):
+
+    """
+    The outcome of the GET call for a single id of a fan-out. Exactly one of response and exception is set.
+
+    """
+    __slots__ = ('id', 'response', 'exception')
+
+    def __init__(self, id, response=None, exception=None):
+        """
+        :param str id: The id that was fetched.
+        :param dict response: What PyFacebook.get returned for the id.
+        :param Exception exception: What PyFacebook.get raised for the id.
+
+        """
+        self.id = id
+        self.response = response
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    def __repr__(self):
+        return "<GetResult " + str(self.id) + (": ok>" if self.ok else ": " + repr(self.exception) + ">")
+
+
+def chunks(items, size):
+    for i in xrange(0, len(items), size):
+        yield items[i:i + size]
+
+
+def fan_out(tasks, max_workers):
+    """
+    Runs tasks on a bounded pool of worker threads and yields their results in the order they complete.
+    Each task returns a list of results, which are yielded one at a time. The pool is shut down
+    once the generator is exhausted or closed.
+
+    :param list tasks: Callables taking no arguments and returning a list of results, e.g. GetResults.
+    :param int max_workers: The maximum number of tasks running at once.
+
+    :rtype generator: A generator of the results of every task.
+
+    """
+    pool = ThreadPool(processes=max(1, min(max_workers, len(tasks))))
+    try:
+        for results in pool.imap_unordered(lambda task: task(), tasks):
+            for result in results:
+                yield result
+    finally:
+        pool.terminate()
+        pool.join()
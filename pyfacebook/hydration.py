@@ -0,0 +1,221 @@
+import cPickle
+import marshal
+import datetime
+import threading
+import multiprocessing
+
+from timeit import default_timer
+from pyfacebook import models
+from pyfacebook.fanout import chunks
+from pyfacebook.projection import partial_model
+from pyfacebook.utils import json_to_objects
+
+# Pages with fewer objects than this are hydrated in-process, since shipping them to workers costs more than it saves
+DEFAULT_THRESHOLD = 2000
+
+# The number of objects hydrated by a worker per task
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def model_spec(model):
+    """
+    Describes a model so that it can be sent to a worker process. Partial models are made on the fly by
+    projection.partial_model, so they are sent as the model they are a part of and the titles of their fields.
+
+    :rtype tuple: (model, frozenset of field titles or None)
+
+    """
+    partial_of = getattr(model, 'PARTIAL_OF', None)
+    if partial_of is not None:
+        return partial_of, frozenset(model.FIELD_DEFS_BY_TITLE)
+    return model, None
+
+
+def encode_states(states):
+    """
+    Serializes the field values of a chunk of models compactly. Decoded JSON values are all marshallable, and the
+    only values fields convert them to are datetimes, which are sent as tuples with their tzinfos pickled once per
+    chunk. Anything else makes the chunk fall back to cPickle.
+
+    :param list states: A list of dicts of field title to value.
+    :rtype tuple: (titles holding datetimes, pickled tzinfos, marshalled states), or (None, None, pickled states)
+
+    """
+    datetime_titles = set()
+    tzinfos = []
+    tzinfo_indexes = {}
+    encoded = []
+    for state in states:
+        for title, value in state.items():
+            if isinstance(value, datetime.datetime):
+                tzinfo = value.tzinfo
+                if tzinfo is None:
+                    tzinfo_index = -1
+                else:
+                    tzinfo_index = tzinfo_indexes.get(repr(tzinfo))
+                    if tzinfo_index is None:
+                        tzinfo_index = tzinfo_indexes[repr(tzinfo)] = len(tzinfos)
+                        tzinfos.append(tzinfo)
+                state[title] = (value.year, value.month, value.day, value.hour, value.minute, value.second,
+                                value.microsecond, tzinfo_index)
+                datetime_titles.add(title)
+        encoded.append(state)
+    try:
+        return tuple(datetime_titles), cPickle.dumps(tzinfos, cPickle.HIGHEST_PROTOCOL), marshal.dumps(encoded)
+    except ValueError:
+        decode_datetimes(encoded, datetime_titles, tzinfos)
+        return None, None, cPickle.dumps(encoded, cPickle.HIGHEST_PROTOCOL)
+
+
+def decode_datetimes(states, datetime_titles, tzinfos):
+    build = datetime.datetime
+    for state in states:
+        for title in datetime_titles:
+            value = state.get(title)
+            if type(value) is tuple:
+                state[title] = build(*value[:7], tzinfo=tzinfos[value[7]] if value[7] >= 0 else None)
+
+
+def decode_states(encoded):
+    """
+    Reverses encode_states.
+
+    :rtype list: A list of dicts of field title to value.
+
+    """
+    datetime_titles, tzinfos, body = encoded
+    if datetime_titles is None:
+        return cPickle.loads(body)
+    states = marshal.loads(body)
+    decode_datetimes(states, datetime_titles, cPickle.loads(tzinfos))
+    return states
+
+
+def hydrate_states(task):
+    """
+    Builds and validates the models of a chunk of objects in a worker process, and returns their field values.
+    Only the values are sent back, which is much less to serialize than the models, and they are loaded into
+    models without being validated again.
+
+    :param tuple task: (model_spec of the model, marshalled list of decoded JSON dicts, whether to validate)
+    :rtype tuple: The field values of the models, see encode_states.
+
+    """
+    (model, titles), objects, validate = task
+    if titles is not None:
+        model = partial_model(model, titles)
+    titles = [field_def.title for field_def in model.FIELD_DEFS]
+    get_field = object.__getattribute__
+    states = []
+    for obj in json_to_objects(marshal.loads(objects), model, validate=validate):
+        state = {}
+        for title in titles:
+            try:
+                state[title] = get_field(obj, title)
+            except AttributeError:
+                pass
+        states.append(state)
+    return encode_states(states)
+
+
+class ProcessHydrator(object):
+
+    """
+    Builds the models of very large pages on a pool of worker processes, so that hydration isn't held to one core.
+
+    A page of AdBase objects with at least threshold objects is split into chunks of chunk_size, which are hydrated
+    by the workers in parallel. Smaller pages, and models which aren't AdBase models, are hydrated in-process.
+
+    The workers are forked when the hydrator is made, and kept until close is called. Make it before starting
+    any threads: a fork copies locks such as projection.PARTIAL_MODELS_LOCK in whatever state other threads
+    left them, and a worker forked while one was held would deadlock on it. Once closed, pages are hydrated
+    in-process.
+
+    For reports where models aren't needed at all, PyFacebook.get with columnar=True is cheaper still.
+
+    """
+
+    def __init__(self, processes=None, threshold=DEFAULT_THRESHOLD, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param int processes: The number of worker processes. Defaults to the number of CPUs.
+        :param int threshold: The smallest page hydrated by the workers.
+        :param int chunk_size: The number of objects sent to a worker at a time.
+
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.__lock = threading.Lock()
+        self.__pool = multiprocessing.Pool(self.processes)
+
+    def hydrate(self, list_or_dict, model, validate=True):
+        """
+        Translates a list or a dict of json objects into TinyModel objects, like utils.json_to_objects.
+
+        :param < list | dict > list_or_dict: A list or a dict of JSON objects
+        :param tinymodel.TinyModel model: The model to build.
+        :param bool validate: If False, AdBase models skip field validation.
+
+        :rtype < list | dict >: A list or a dict of TinyModel objects
+
+        """
+        pool = self.__pool
+        if pool is None or len(list_or_dict) < self.threshold or \
+                not (isinstance(model, type) and issubclass(model, models.AdBase)):
+            return json_to_objects(list_or_dict, model, validate=validate)
+
+        is_dict = isinstance(list_or_dict, dict)
+        keys, objects = zip(*list_or_dict.items()) if is_dict else (None, list_or_dict)
+        spec = model_spec(model)
+        try:
+            tasks = [(spec, marshal.dumps(chunk), validate) for chunk in chunks(list(objects), self.chunk_size)]
+        except ValueError:
+            # Not decoded JSON, so it can't be sent to the workers cheaply
+            return json_to_objects(list_or_dict, model, validate=validate)
+
+        hydrated = []
+        for encoded in pool.imap(hydrate_states, tasks):
+            for state in decode_states(encoded):
+                obj = model.__new__(model)
+                obj.__setstate__(state)
+                hydrated.append(obj)
+
+        if is_dict:
+            list_or_dict.update(zip(keys, hydrated))
+        else:
+            list_or_dict[:] = hydrated
+        return list_or_dict
+
+    def close(self):
+        """
+        Stops the worker processes.
+
+        """
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.close()
+                self.__pool.join()
+                self.__pool = None
+
+
+def hydrate(list_or_dict, model, validate=True, hydrator=None, instrumentation=None, event=None):
+    """
+    Translates a list or a dict of json objects into TinyModel objects through a hydrator, or in-process with
+    utils.json_to_objects if there is none. If instrumentation has hooks, the hydration is timed and reported
+    to its after_hydrate hooks.
+
+    :param instrumentation.Instrumentation instrumentation: The hooks to report to.
+    :param dict event: The endpoint and http_method of the call the objects came from, for the hooks.
+
+    """
+    if not instrumentation:
+        if hydrator is None:
+            return json_to_objects(list_or_dict, model, validate=validate)
+        return hydrator.hydrate(list_or_dict, model, validate=validate)
+
+    started_at = default_timer()
+    hydrated = hydrate(list_or_dict, model, validate=validate, hydrator=hydrator)
+    info = dict(event or {}, model=model, objects=len(hydrated), hydrate_time=default_timer() - started_at)
+    info.setdefault('attempt', 0)
+    instrumentation.emit('after_hydrate', info)
+    return hydrated
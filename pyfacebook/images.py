@@ -0,0 +1,454 @@
+import os
+import uuid
+import errno
+import mmap
+import hashlib
+import warnings
+import threading
+import mimetypes
+
+from pyfacebook import models
+from pyfacebook.fanout import chunks, fan_out
+from pyfacebook.store import normalize_account_id
+from pyfacebook.utils import json_to_objects
+
+# The number of bytes read from an image source at a time
+CHUNK_SIZE = 64 * 1024
+
+# The maximum number of images sent in a single multi-file adimages POST
+MAX_IMAGES_PER_REQUEST = 10
+
+# The maximum number of hashes looked up in a single adimages GET when verifying an index
+MAX_HASHES_PER_CALL = 50
+
+
+class SliceReader(object):
+
+    """
+    Reads an in-memory buffer or a memory-mapped file a slice at a time, without copying it whole.
+
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def read(self, size=-1):
+        end = len(self.data) if size < 0 else min(self.pos + size, len(self.data))
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk.tobytes() if isinstance(chunk, memoryview) else str(chunk)
+
+    def close(self):
+        pass
+
+
+class FileReader(object):
+
+    """
+    Reads an open file from a given offset, leaving it open when closed, since it isn't ours.
+
+    """
+
+    def __init__(self, file_obj, start):
+        self.file_obj = file_obj
+        self.file_obj.seek(start)
+
+    def read(self, size=-1):
+        return self.file_obj.read(size)
+
+    def close(self):
+        pass
+
+
+class ImageSource(object):
+
+    """
+    An image to upload, read in chunks as it is sent so that it is never held in memory whole.
+
+    The source may be a file path, an open file, a memory-mapped file or a byte buffer (bytearray, buffer or
+    memoryview). A str is always taken as a path, unless is_path is False. Each send opens a fresh reader, so that
+    retried requests send the image again from the start.
+
+    """
+
+    def __init__(self, source, name=None, is_path=None):
+        """
+        :param < str | file | mmap.mmap | bytearray > source: The image, or the path of the image file.
+        :param str name: The filename Facebook keys the image by. Defaults to the basename of the path or file.
+        :param bool is_path: Is the source a file path. Defaults to True for strs, pass False to send a str's bytes.
+
+        """
+        if is_path is None:
+            is_path = isinstance(source, basestring)
+        self.source = source
+        if is_path:
+            if '\0' in source or not os.path.isfile(source):
+                raise IOError(errno.ENOENT, "No such image file", source)
+            self.path = source
+            self.size = os.path.getsize(source)
+            name = name or os.path.basename(source)
+        elif hasattr(source, 'fileno') and hasattr(source, 'seek') and not isinstance(source, mmap.mmap):
+            self.path = None
+            self.start = source.tell()
+            self.size = os.fstat(source.fileno()).st_size - self.start
+            name = name or os.path.basename(getattr(source, 'name', ''))
+        else:
+            self.path = None
+            self.size = len(source)
+
+        if not name:
+            raise ValueError("An image from a buffer needs a name")
+        self.name = name
+        self.__digest = None
+
+    @property
+    def content_type(self):
+        return mimetypes.guess_type(self.name)[0] or 'application/octet-stream'
+
+    def open(self):
+        """
+        :rtype file: A file-like object reading the image from its start.
+
+        """
+        if self.path is not None:
+            return open(self.path, 'rb')
+        elif hasattr(self.source, 'fileno') and not isinstance(self.source, mmap.mmap):
+            return FileReader(self.source, self.start)
+        return SliceReader(self.source)
+
+    @property
+    def digest(self):
+        """
+        The MD5 hex digest of the image's content, read in chunks the first time it is asked for.
+
+        :rtype str:
+
+        """
+        if self.__digest is None:
+            md5 = hashlib.md5()
+            reader = self.open()
+            try:
+                for chunk in iter(lambda: reader.read(CHUNK_SIZE), ''):
+                    md5.update(chunk)
+            finally:
+                reader.close()
+            self.__digest = md5.hexdigest()
+        return self.__digest
+
+
+class MultipartBody(object):
+
+    """
+    A multipart/form-data request body, generated a chunk at a time as it is sent.
+
+    requests only streams bodies that are iterable, and httplib sends those with a known length by calling read,
+    so this has both, and __len__ for the Content-Length header.
+
+    """
+
+    def __init__(self, fields, files, boundary=None):
+        """
+        :param dict fields: The form fields, such as access_token.
+        :param list files: The ImageSources to send, each as a file field named after its filename.
+        :param str boundary: The multipart boundary. Random by default.
+
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=' + self.boundary
+        self.__parts = []
+        for name, value in sorted(fields.items()):
+            self.__parts.append(self.__header(name) + '\r\n' + self.__encode(value) + '\r\n')
+        for image in files:
+            self.__parts.append(self.__header(image.name, image.name) + 'Content-Type: ' + image.content_type + '\r\n\r\n')
+            self.__parts.append(image)
+            self.__parts.append('\r\n')
+        self.__parts.append('--' + self.boundary + '--\r\n')
+        self.__length = sum(part.size if isinstance(part, ImageSource) else len(part) for part in self.__parts)
+        self.__index = 0
+        self.__offset = 0
+        self.__reader = None
+
+    @staticmethod
+    def __encode(value):
+        return value.encode('utf-8') if isinstance(value, unicode) else str(value)
+
+    def __header(self, name, filename=None):
+        disposition = 'form-data; name="' + self.__encode(name) + '"'
+        if filename is not None:
+            disposition += '; filename="' + self.__encode(filename) + '"'
+        return '--' + self.boundary + '\r\nContent-Disposition: ' + disposition + '\r\n'
+
+    def __len__(self):
+        return self.__length
+
+    def read(self, size=-1):
+        """
+        :param int size: The maximum number of bytes to read, or -1 for the rest of the body.
+        :rtype str: The next bytes of the body, or an empty string once it has all been read.
+
+        """
+        data = []
+        remaining = self.__length if size < 0 else size
+        while remaining > 0 and self.__index < len(self.__parts):
+            part = self.__parts[self.__index]
+            if isinstance(part, ImageSource):
+                if self.__reader is None:
+                    self.__reader = part.open()
+                chunk = self.__reader.read(remaining)
+                if not chunk:
+                    self.__reader.close()
+                    self.__reader = None
+                    self.__index += 1
+                    continue
+            else:
+                chunk = part[self.__offset:self.__offset + remaining]
+                self.__offset += len(chunk)
+                if self.__offset >= len(part):
+                    self.__index += 1
+                    self.__offset = 0
+            data.append(chunk)
+            remaining -= len(chunk)
+        return ''.join(data)
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        if self.__reader is not None:
+            self.__reader.close()
+            self.__reader = None
+
+
+def image_sources(images):
+    """
+    Turns the images passed to ImageUploader.upload into ImageSources.
+
+    :param < dict | list > images: A dict of filename to source, or a list of sources or file paths.
+    :rtype list:
+
+    """
+    if isinstance(images, dict):
+        return [image if isinstance(image, ImageSource) else ImageSource(image, name=name)
+                for name, image in sorted(images.items())]
+    return [image if isinstance(image, ImageSource) else ImageSource(image) for image in images]
+
+
+class MemoryImageIndex(object):
+
+    """
+    An in-memory index of the images already uploaded to each ad account, keyed by the digest of their content.
+    store.SQLiteObjectStore has the same methods, for an index that survives the process.
+
+    """
+
+    def __init__(self):
+        self.__images = {}
+        self.__lock = threading.Lock()
+
+    def get_images(self, account_id, digests):
+        """
+        :param str account_id: The ad account, with or without the act_ prefix.
+        :param iterable digests: The content digests to look up.
+        :rtype dict: A dict of digest to the hash and url Facebook gave the image, for the digests which are indexed.
+
+        """
+        account_id = normalize_account_id(account_id)
+        with self.__lock:
+            return dict((digest, dict(self.__images[(account_id, digest)])) for digest in digests
+                        if (account_id, digest) in self.__images)
+
+    def set_images(self, account_id, images):
+        """
+        :param dict images: A dict of content digest to the hash and url Facebook gave the image.
+
+        """
+        account_id = normalize_account_id(account_id)
+        with self.__lock:
+            for digest, image in images.items():
+                self.__images[(account_id, digest)] = {'hash': image['hash'], 'url': image.get('url')}
+
+    def drop_images(self, account_id, digests):
+        account_id = normalize_account_id(account_id)
+        with self.__lock:
+            for digest in digests:
+                self.__images.pop((account_id, digest), None)
+
+    def __len__(self):
+        return len(self.__images)
+
+
+class ImageUploader(object):
+
+    """
+    Uploads many AdImages to an ad account, streaming each from its source so that memory use stays flat
+    however large the images are.
+
+    Images are sent up to images_per_request at a time in multi-file adimages POSTs, with up to max_workers
+    POSTs in flight. If a multi-file POST fails, its images are retried one per POST so that each gets its own error.
+
+    Given an index, such as a MemoryImageIndex or a store.SQLiteObjectStore, images are content-addressed: each is
+    hashed before it is sent, images already uploaded to the account are taken from the index instead of being
+    uploaded again, and images with the same content are uploaded once. With verify, indexed images are first looked
+    up on the account in bulk, and those Facebook no longer has are dropped from the index and uploaded again,
+    as are those whose lookup failed. Images which fail to be read or sent are kept in errors, by filename.
+
+    """
+
+    def __init__(self, pyfacebook, max_workers=4, images_per_request=MAX_IMAGES_PER_REQUEST, index=None, verify=False):
+        """
+        :param PyFacebook pyfacebook: The PyFacebook instance to send the uploads through.
+        :param int max_workers: The maximum number of uploads in flight at once.
+        :param int images_per_request: The maximum number of images sent in a single POST. 1 sends each on its own.
+        :param index: The index of images already uploaded, by content digest. If not provided, every image is uploaded.
+        :param bool verify: Should indexed images be checked against the account's adimages before being reused.
+
+        """
+        self.pyfacebook = pyfacebook
+        self.max_workers = max_workers
+        self.images_per_request = max(1, min(images_per_request, MAX_IMAGES_PER_REQUEST))
+        self.index = index
+        self.verify = verify
+        self.errors = {}
+        self.reused = {}
+
+    def __post(self, account_id, images):
+        response = self.pyfacebook.post(models.AdImage, id=account_id, file=dict((image.name, image) for image in images))
+        uploaded = response['data']
+        return uploaded if isinstance(uploaded, dict) else {}
+
+    def __upload_chunk(self, account_id, images):
+        try:
+            uploaded = self.__post(account_id, images)
+        except Exception as e:
+            if len(images) == 1:
+                return [(images[0].name, None, e)]
+            return [result for image in images for result in self.__upload_chunk(account_id, [image])]
+        return [(image.name, uploaded.get(image.name), None) for image in images]
+
+    def __upload(self, account_id, sources):
+        tasks = [lambda chunk=chunk: self.__upload_chunk(account_id, chunk) for chunk in chunks(sources, self.images_per_request)]
+        uploaded = {}
+        for name, image, exception in (fan_out(tasks, self.max_workers) if tasks else []):
+            if image is None:
+                self.errors[name] = exception or ValueError("Facebook returned no image for " + name)
+            else:
+                uploaded[name] = image
+        return uploaded
+
+    def __digest(self, image):
+        try:
+            return image, image.digest, None
+        except Exception as e:
+            return image, None, e
+
+    def __lookup(self, account_id, hashes):
+        """
+        Looks images up on the account by hash.
+
+        :rtype list: The images Facebook has, or None if the lookup failed.
+
+        """
+        try:
+            return self.pyfacebook.get(models.AdImage, account_id, 'adimages', return_json=True, hashes=hashes,
+                                       fields=['hash', 'url'], limit=len(hashes))['data']
+        except Exception:
+            return None
+
+    def __verify(self, account_id, indexed):
+        """
+        Looks the indexed images up on the account, and drops those Facebook doesn't have from the index.
+        Images whose lookup failed are left in the index, but aren't reused.
+
+        :param dict indexed: A dict of content digest to indexed image.
+        :rtype dict: The indexed images Facebook still has.
+
+        """
+        digests_by_hash = dict((image['hash'], digest) for digest, image in indexed.items())
+        tasks = [lambda chunk=chunk: [(chunk, self.__lookup(account_id, chunk))]
+                 for chunk in chunks(sorted(digests_by_hash), MAX_HASHES_PER_CALL)]
+        found = {}
+        unverified = set()
+        for chunk, images in fan_out(tasks, self.max_workers):
+            if images is None:
+                unverified.update(chunk)
+            else:
+                found.update((image['hash'], image) for image in images if image.get('hash'))
+        missing = [digest for image_hash, digest in digests_by_hash.items()
+                   if image_hash not in found and image_hash not in unverified]
+        if missing:
+            self.index.drop_images(account_id, missing)
+        return dict((digest, dict(indexed[digest], url=found[image_hash].get('url') or indexed[digest].get('url')))
+                    for image_hash, digest in digests_by_hash.items() if image_hash in found)
+
+    def __upload_new(self, account_id, sources):
+        """
+        Uploads the images which aren't in the index, once per distinct content, and indexes them.
+        Images which can't be read to be hashed are kept in errors.
+
+        :rtype dict: A dict of filename to models.AdImage
+
+        """
+        tasks = [lambda chunk=chunk: [self.__digest(image) for image in chunk] for chunk in chunks(sources, self.images_per_request)]
+        digests = {}
+        for image, digest, exception in fan_out(tasks, self.max_workers):
+            if exception is None:
+                digests[image] = digest
+            else:
+                self.errors[image.name] = exception
+        sources = [image for image in sources if image in digests]
+        indexed = self.index.get_images(account_id, set(digests.values()))
+        if indexed and self.verify:
+            indexed = self.__verify(account_id, indexed)
+
+        by_digest = {}
+        for image in sources:
+            by_digest.setdefault(digests[image], []).append(image)
+        uploaded = self.__upload(account_id, [same[0] for digest, same in by_digest.items() if digest not in indexed])
+
+        new_images = {}
+        result = {}
+        for digest, same in by_digest.items():
+            if digest in indexed:
+                image = json_to_objects([dict((key, val) for key, val in indexed[digest].items() if val is not None)],
+                                        models.AdImage)[0]
+                self.reused.update((source.name, image) for source in same)
+            elif same[0].name in uploaded:
+                image = uploaded[same[0].name]
+                new_images[digest] = {'hash': image.hash, 'url': getattr(image, 'url', None)}
+            else:
+                self.errors.update((source.name, self.errors[same[0].name]) for source in same[1:])
+                continue
+            result.update((source.name, image) for source in same)
+        if new_images:
+            self.index.set_images(account_id, new_images)
+        return result
+
+    def upload(self, account_id, images):
+        """
+        Uploads images to an ad account.
+
+        Images which fail to upload are left out of the result, and the reasons are kept in errors, by filename.
+        Images taken from the index instead of being uploaded are also kept in reused, by filename.
+
+        :param str account_id: The id of the ad account, e.g. act_123
+        :param < dict | list > images: A dict of filename to source, or a list of ImageSources or file paths.
+                                       Sources may be file paths, open files, memory-mapped files or byte buffers.
+
+        :rtype dict: A dict of filename to the uploaded models.AdImage, which holds its hash and url.
+
+        """
+        sources = image_sources(images)
+        self.errors = {}
+        self.reused = {}
+        if self.index is None:
+            uploaded = self.__upload(account_id, sources)
+        else:
+            uploaded = self.__upload_new(account_id, sources)
+        if self.errors:
+            warnings.warn("WARNING: " + str(len(self.errors)) + " images failed to upload: " + ", ".join(sorted(self.errors)))
+        return uploaded
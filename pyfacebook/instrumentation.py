@@ -0,0 +1,242 @@
+import re
+import warnings
+import threading
+
+# The events hooks can be registered for. Every attempt at a call fires before_request, then either
+# after_response or on_error. on_retry fires before a failed attempt is retried, after_hydrate once models are built.
+EVENTS = ('before_request', 'after_response', 'on_error', 'on_retry', 'after_hydrate')
+
+ACCOUNT_ID_RE = re.compile(r'^act_\d+$')
+OBJECT_ID_RE = re.compile(r'^\d+(_\d+)?$')
+
+
+def endpoint_pattern(endpoint):
+    """
+    Replaces the ids in an endpoint with placeholders, so that calls to the same kind of object are counted together.
+
+    Example:
+        endpoint_pattern('act_123/adgroups') == 'act_{id}/adgroups'
+
+    :rtype str:
+
+    """
+    parts = []
+    for part in endpoint.split('/'):
+        if ACCOUNT_ID_RE.match(part):
+            part = 'act_{id}'
+        elif OBJECT_ID_RE.match(part):
+            part = '{id}'
+        parts.append(part)
+    return '/'.join(parts) or '/'
+
+
+class Instrumentation(object):
+
+    """
+    A registry of hooks called at each step of the Graph API calls made by a PyFacebook instance.
+
+    Hooks take a single dict describing the call attempt, which always has the keys endpoint, http_method
+    and attempt, and gains timings and outcomes as the call goes on:
+        send_time: The seconds spent sending the request and reading the response.
+        server_time: The seconds until the response headers were received, including connecting.
+        decode_time: The seconds spent decoding the JSON response.
+        status_code, bytes: The HTTP status and size of the response.
+        exception, error_code: What went wrong, for on_error.
+        delay: The backoff before the retry, for on_retry.
+        model, objects, hydrate_time: The models built from the response, for after_hydrate.
+
+    An Instrumentation without hooks is falsy, and PyFacebook skips all timing when it is.
+
+    """
+
+    def __init__(self):
+        self.hooks = dict((event, []) for event in EVENTS)
+        self.__active = False
+
+    def add_hook(self, event, hook):
+        """
+        :param str event: One of EVENTS
+        :param function hook: A function taking the dict describing the call.
+
+        """
+        if event not in self.hooks:
+            raise ValueError("Unknown event " + str(event) + ", expected one of " + ", ".join(EVENTS))
+        self.hooks[event].append(hook)
+        self.__active = True
+
+    def remove_hook(self, event, hook):
+        self.hooks[event].remove(hook)
+        self.__active = any(self.hooks.values())
+
+    def __nonzero__(self):
+        return self.__active
+
+    def emit(self, event, info):
+        """
+        Calls the hooks of an event. A failing hook is reported as a warning and never fails the call.
+
+        """
+        for hook in self.hooks[event]:
+            try:
+                hook(info)
+            except Exception as e:
+                warnings.warn("WARNING: " + event + " hook " + repr(hook) + " raised " + repr(e))
+
+
+class MetricsCollector(object):
+
+    """
+    Collects per-endpoint metrics from the hooks of an Instrumentation: request counts by status, latency histograms,
+    response bytes, decode time, error codes, retries and objects hydrated.
+
+    The metrics can be exported as a plain dict with to_dict, or in the Prometheus text format with to_prometheus.
+
+    """
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param tuple buckets: The upper bounds of the latency histogram buckets, in seconds.
+
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.__endpoints = {}
+        self.__lock = threading.Lock()
+
+    def attach(self, instrumentation):
+        """
+        Registers our hooks on an Instrumentation.
+
+        :rtype MetricsCollector: self, for chaining.
+
+        """
+        instrumentation.add_hook('after_response', self.__after_response)
+        instrumentation.add_hook('on_error', self.__on_error)
+        instrumentation.add_hook('on_retry', self.__on_retry)
+        instrumentation.add_hook('after_hydrate', self.__after_hydrate)
+        return self
+
+    def __metrics(self, info):
+        key = (info['http_method'], endpoint_pattern(info['endpoint']))
+        metrics = self.__endpoints.get(key)
+        if metrics is None:
+            metrics = self.__endpoints[key] = {
+                'requests': 0,
+                'status_codes': {},
+                'errors': {},
+                'latency_buckets': [0] * len(self.buckets),
+                'latency_sum': 0.0,
+                'latency_count': 0,
+                'bytes': 0,
+                'decode_time': 0.0,
+                'retries': 0,
+                'objects_hydrated': {},
+                'hydrate_time': 0.0,
+            }
+        return metrics
+
+    def __observe(self, metrics, info):
+        metrics['requests'] += 1
+        if info.get('status_code') is not None:
+            metrics['status_codes'][info['status_code']] = metrics['status_codes'].get(info['status_code'], 0) + 1
+        metrics['bytes'] += info.get('bytes', 0)
+        metrics['decode_time'] += info.get('decode_time', 0.0)
+        latency = info.get('send_time', 0.0) + info.get('decode_time', 0.0)
+        metrics['latency_sum'] += latency
+        metrics['latency_count'] += 1
+        for index, bound in enumerate(self.buckets):
+            if latency <= bound:
+                metrics['latency_buckets'][index] += 1
+
+    def __after_response(self, info):
+        with self.__lock:
+            self.__observe(self.__metrics(info), info)
+
+    def __on_error(self, info):
+        error = info.get('error_code') or type(info.get('exception')).__name__
+        if info.get('exception') is None and info.get('status_code'):
+            error = 'HTTP ' + str(info['status_code'])
+        with self.__lock:
+            metrics = self.__metrics(info)
+            self.__observe(metrics, info)
+            metrics['errors'][error] = metrics['errors'].get(error, 0) + 1
+
+    def __on_retry(self, info):
+        with self.__lock:
+            self.__metrics(info)['retries'] += 1
+
+    def __after_hydrate(self, info):
+        with self.__lock:
+            metrics = self.__metrics(info)
+            model = info['model'].__name__
+            metrics['objects_hydrated'][model] = metrics['objects_hydrated'].get(model, 0) + info['objects']
+            metrics['hydrate_time'] += info['hydrate_time']
+
+    def reset(self):
+        with self.__lock:
+            self.__endpoints.clear()
+
+    def to_dict(self):
+        """
+        Returns the collected metrics as plain data.
+
+        :rtype dict: A dict of 'METHOD endpoint pattern' to the metrics of those calls. Latency buckets are
+                     cumulative counts keyed by their upper bound, as in Prometheus histograms.
+
+        """
+        with self.__lock:
+            result = {}
+            for (http_method, pattern), metrics in self.__endpoints.items():
+                metrics = dict(metrics, status_codes=dict(metrics['status_codes']), errors=dict(metrics['errors']),
+                               objects_hydrated=dict(metrics['objects_hydrated']))
+                metrics['latency_buckets'] = dict(zip(self.buckets, metrics['latency_buckets']))
+                metrics['latency_buckets']['+Inf'] = metrics['latency_count']
+                result[http_method + ' ' + pattern] = metrics
+            return result
+
+    def to_prometheus(self, prefix='pyfacebook'):
+        """
+        Returns the collected metrics in the Prometheus text exposition format.
+
+        :param str prefix: The prefix of every metric name.
+        :rtype str:
+
+        """
+        lines = []
+
+        def add(name, kind, samples):
+            lines.append('# TYPE ' + prefix + '_' + name + ' ' + kind)
+            for suffix, labels, value in samples:
+                label_text = ','.join('%s="%s"' % (key, str(val).replace('\\', '\\\\').replace('"', '\\"'))
+                                      for key, val in labels)
+                value = str(value) if isinstance(value, (int, long)) else repr(float(value))
+                lines.append('%s_%s%s{%s} %s' % (prefix, name, suffix, label_text, value))
+
+        samples = dict((name, []) for name in ('request_duration_seconds', 'requests_total', 'errors_total',
+                                               'response_bytes_total', 'decode_seconds_total', 'retries_total',
+                                               'objects_hydrated_total', 'hydrate_seconds_total'))
+        for key, metrics in sorted(self.to_dict().items()):
+            http_method, pattern = key.split(' ', 1)
+            labels = [('method', http_method), ('endpoint', pattern)]
+            latency = samples['request_duration_seconds']
+            for bound in self.buckets:
+                latency.append(('_bucket', labels + [('le', repr(bound))], metrics['latency_buckets'][bound]))
+            latency.append(('_bucket', labels + [('le', '+Inf')], metrics['latency_count']))
+            latency.append(('_sum', labels, metrics['latency_sum']))
+            latency.append(('_count', labels, metrics['latency_count']))
+            for status_code, count in sorted(metrics['status_codes'].items()):
+                samples['requests_total'].append(('', labels + [('status', status_code)], count))
+            for error, count in sorted(metrics['errors'].items()):
+                samples['errors_total'].append(('', labels + [('error', error)], count))
+            for model, count in sorted(metrics['objects_hydrated'].items()):
+                samples['objects_hydrated_total'].append(('', labels + [('model', model)], count))
+            samples['response_bytes_total'].append(('', labels, metrics['bytes']))
+            samples['decode_seconds_total'].append(('', labels, metrics['decode_time']))
+            samples['retries_total'].append(('', labels, metrics['retries']))
+            samples['hydrate_seconds_total'].append(('', labels, metrics['hydrate_time']))
+
+        add('request_duration_seconds', 'histogram', samples['request_duration_seconds'])
+        for name in ('requests_total', 'errors_total', 'response_bytes_total', 'decode_seconds_total', 'retries_total',
+                     'objects_hydrated_total', 'hydrate_seconds_total'):
+            add(name, 'counter', samples[name])
+        return '\n'.join(lines) + '\n'
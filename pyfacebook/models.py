@@ -14,7 +14,81 @@ unix_datetime_translators = {
 }
 
 
-class FacebookModel(TinyModel):
+def json_value(value):
+    """
+    Returns what a value decodes to after a JSON round trip: str becomes unicode and tuples become lists.
+
+    """
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    elif isinstance(value, (list, tuple)):
+        return [json_value(v) for v in value]
+    elif isinstance(value, dict):
+        return dict((json_value(k), json_value(v)) for k, v in value.items())
+    return value
+
+
+def compile_dict_converter(field_def):
+    """
+    Builds the function which turns a decoded JSON value into the value of a TinyModel field, as loading
+    from_json would: the field's from_json translator if it has one, datetimes parsed from timestamps and date strings,
+    and nested models built from dicts.
+
+    :param FieldDef field_def: The field definition
+    :rtype function:
+
+    """
+    translate = getattr(field_def, 'custom_translators', None) and field_def.custom_translators.get('from_json')
+    if translate:
+        return translate
+
+    convert_datetime = compile_converter(field_def)
+    model_types = [t for t in field_def.allowed_types if isinstance(t, type) and hasattr(t, 'from_dict')]
+    list_model_types = [t[0] for t in field_def.allowed_types
+                        if isinstance(t, list) and isinstance(t[0], type) and hasattr(t[0], 'from_dict')]
+
+    def convert(value):
+        value = convert_datetime(json_value(value))
+        if isinstance(value, dict) and model_types:
+            return model_types[0].from_dict(value)
+        elif isinstance(value, list) and list_model_types:
+            return [list_model_types[0].from_dict(v) if isinstance(v, dict) else v for v in value]
+        return value
+
+    return convert
+
+
+# The field converters of each DictLoadableModel class, compiled on first use
+DICT_CONVERTERS = {}
+
+
+class DictLoadableModel(TinyModel):
+
+    """
+    Gives TinyModels the same from_dict constructor as AdBase models.
+
+    The dict's values are converted field by field, the way TinyModel converts them when loading from_json,
+    so objects are built without serializing the dict to JSON and parsing it again.
+
+    """
+
+    @classmethod
+    def from_dict(cls, data, validate=True):
+        """
+        Builds an object straight from an already decoded JSON dict, such as an item of a Facebook response.
+        Keys which aren't fields of the model are ignored.
+
+        :param dict data: The field values, keyed by field title.
+        :param bool validate: Unused; TinyModels are always validated. Accepted for parity with AdBase.from_dict
+
+        """
+        converters = DICT_CONVERTERS.get(cls)
+        if converters is None:
+            converters = DICT_CONVERTERS[cls] = dict((f.title, compile_dict_converter(f)) for f in cls.FIELD_DEFS)
+        return cls(**dict((str(key), converters[key](value)) for key, value in data.items() if key in converters))
+
+
+class FacebookModel(DictLoadableModel):
 
     """
     Represents a model defined by Facebook. See documentation at:
@@ -27,7 +101,7 @@ class FacebookModel(TinyModel):
     pass
 
 
-class SupportModel(TinyModel):
+class SupportModel(DictLoadableModel):
 
     """
     Represents models which Facebook uses, but do not have their own endpoints.
@@ -307,11 +381,149 @@ class Preview(FacebookModel):
 
 NewFieldDef = namedtuple('NewFieldDef', ['title', 'allowed_types', 'choices'])
 
+TIMESTAMP_TYPES = frozenset([int, long])
+DATE_STRING_TYPES = frozenset([str, unicode])
+
+
+def accepted_types(allowed_type):
+    """
+    Returns the tuple of types a value may have to match allowed_type. Longs also accept ints and unicode also accepts str.
+
+    """
+    types = [allowed_type]
+    if allowed_type is long:
+        types.append(int)
+    elif allowed_type is unicode:
+        types.append(str)
+    return tuple(types)
+
+
+def compile_converter(field_def):
+    """
+    Builds the function which converts raw values for a NewFieldDef, e.g. turning timestamps and date strings into datetimes.
+
+    :param NewFieldDef field_def: The field definition
+    :rtype function: A function taking a value and returning the converted value
+
+    """
+    if datetime.datetime not in field_def.allowed_types:
+        return lambda value: value
+
+    def convert(value):
+        if type(value) in TIMESTAMP_TYPES:
+            return datetime.datetime.fromtimestamp(value)
+        elif type(value) in DATE_STRING_TYPES:
+            return date_parser.parse(value)
+        return value
+
+    return convert
+
+
+def compile_validator(field_def, enforce_choices=False):
+    """
+    Builds the function which converts and validates values for a NewFieldDef. Everything the check needs
+    is worked out here once, so that validating a value is a direct type check plus a choices lookup.
+
+    allowed_types may contain plain types, [type] for lists of that type and {key_type: value_type} for dicts.
+
+    :param NewFieldDef field_def: The field definition
+    :param bool enforce_choices: Should values also be checked against the field's choices.
+    :rtype function: A function taking a value and returning the converted value, raising ValueError if it doesn't validate
+
+    """
+    convert = compile_converter(field_def)
+    scalar_types = ()
+    list_types = ()
+    dict_types = ()
+    for allowed_type in field_def.allowed_types:
+        if isinstance(allowed_type, list):
+            list_types += accepted_types(allowed_type[0])
+        elif isinstance(allowed_type, dict):
+            for key_type, val_type in allowed_type.items():
+                dict_types += ((accepted_types(key_type), accepted_types(val_type)),)
+        else:
+            scalar_types += accepted_types(allowed_type)
+
+    # Bools are ints, but as in the original validation they only pass for int when int is the field's only type
+    scalar_bools = bool in scalar_types or scalar_types == (int,)
+    dict_types = tuple((key_types, val_types, bool in val_types) for key_types, val_types in dict_types)
+
+    choices = field_def.choices if enforce_choices else None
+    if choices is not None:
+        try:
+            choices = frozenset(choices)
+        except TypeError:
+            choices = tuple(choices)
+
+    def is_valid_dict(value):
+        for key, val in value.iteritems():
+            if not any(isinstance(key, key_types) and isinstance(val, val_types) and (val_bools or type(val) is not bool)
+                       for key_types, val_types, val_bools in dict_types):
+                return False
+        return True
+
+    def validate(value):
+        value = convert(value)
+        if not ((isinstance(value, scalar_types) and (scalar_bools or type(value) is not bool)) or
+                (list_types and isinstance(value, list) and all(isinstance(v, list_types) for v in value)) or
+                (dict_types and isinstance(value, dict) and is_valid_dict(value))):
+            raise ValueError("{0} does not validate against allowed_types {1}".format(value, field_def.allowed_types))
+        if choices is not None and value not in choices:
+            raise ValueError("{0} is not present in choices {1}".format(value, field_def.choices))
+        return value
+
+    return validate
+
+
+class AdBaseMeta(type):
+    """
+    Precomputes the field lookups of AdBase subclasses once, when the class is created.
+
+    Every field in FIELD_DEFS gets its own slot, so field values are stored compactly on the instance
+    and reading one is a plain attribute lookup. FIELD_DEFS_BY_TITLE maps field titles to their definitions,
+    FIELD_VALIDATORS and FIELD_CONVERTERS map them to their compiled validate and convert functions.
+    Validators only check choices if the class, or a class it inherits from, sets ENFORCE_CHOICES.
+    """
+    def __new__(mcs, name, bases, attrs):
+        field_defs = attrs.get('FIELD_DEFS')
+        enforce_choices = attrs.get('ENFORCE_CHOICES', any(getattr(base, 'ENFORCE_CHOICES', False) for base in bases))
+        if field_defs is None:
+            attrs['__slots__'] = ()
+            if 'ENFORCE_CHOICES' in attrs:
+                field_defs = next((base.FIELD_DEFS for base in bases if hasattr(base, 'FIELD_DEFS')), ())
+                attrs['FIELD_VALIDATORS'] = dict((f.title, compile_validator(f, enforce_choices)) for f in field_defs)
+        else:
+            inherited = set()
+            for base in bases:
+                inherited.update(getattr(base, 'FIELD_DEFS_BY_TITLE', {}).keys())
+            attrs['__slots__'] = tuple(f.title for f in field_defs if f.title not in inherited)
+            attrs['FIELD_DEFS_BY_TITLE'] = dict((f.title, f) for f in field_defs)
+            attrs['FIELD_VALIDATORS'] = dict((f.title, compile_validator(f, enforce_choices)) for f in field_defs)
+            attrs['FIELD_CONVERTERS'] = dict((f.title, compile_converter(f)) for f in field_defs)
+        return super(AdBaseMeta, mcs).__new__(mcs, name, bases, attrs)
+
 
 class AdBase(object):
     """
     Common class for AdAccount, AdCampaign, AdCreative, AdGroup to simulate TinyModel.
     """
+    __metaclass__ = AdBaseMeta
+
+    FIELD_DEFS = ()
+
+    # Values have never been checked against choices, which are often out of date. Set to True in a subclass to check them
+    ENFORCE_CHOICES = False
+
+    @property
+    def FIELDS(self):
+        fields = []
+        for field_def in self.FIELD_DEFS:
+            try:
+                fields.append({'field_def': field_def, 'value': object.__getattribute__(self, field_def.title)})
+            except AttributeError:
+                pass
+        return fields
+
     def __repr__(self):
         frepr = {}
         for x in self.FIELDS:
@@ -319,100 +531,60 @@ class AdBase(object):
         return str(self.__class__) + "\nFIELDS:\n" + str(frepr) + "\n"
 
     def __getattr__(self, name):
-        fields = object.__getattribute__(self, 'FIELDS')
-        f = next((x for x in fields if x['field_def'].title == name), None)
-        if f:
-            return f['value']
-        else:
-            raise AttributeError(str(self.__class__) + " has no field " + name)
+        # Only called for fields which haven't been set, since set fields are found in their slots
+        raise AttributeError(str(self.__class__) + " has no field " + name)
 
     def __setattr__(self, key, value):
-        field_def = next((x for x in self.FIELD_DEFS if x.title == key), False)
-        if field_def:
-            if type(value) in [str, unicode, int, long] and datetime.datetime in field_def.allowed_types:
-                if type(value) in [int, long]:
-                    value = datetime.datetime.fromtimestamp(value)
-                elif type(value) in [str, unicode]:
-                    value = date_parser.parser(value)
-                else:
-                    raise ValueError
-            if self.__validate(value, field_def.allowed_types):
-                if 'choices' in field_def:
-                    if self.__checkchoices(value, field_def.choices):
-                        self.__add_field(field_def, value)
-                    else:
-                        e = "{0} is not present in choices {1}".format(value, field_def.choices)
-                        raise ValueError(e)
-                else:
-                    self.__add_field(field_def, value)
-            else:
-                e = "{0} does not validate against allowed_types {1}"\
-                    .format(value, field_def.allowed_types)
-                raise ValueError(e)
-
-    def __init__(self, from_json=False, **kwargs):
-        object.__setattr__(self, 'FIELDS', [])
+        validate = self.FIELD_VALIDATORS.get(key)
+        if validate:
+            object.__setattr__(self, key, validate(value))
+
+    def __init__(self, from_json=False, validate=True, **kwargs):
+        """
+        :param str from_json: A JSON string to load the fields from, instead of keyword args.
+        :param bool validate: If False, values are only converted and not validated. Use for trusted data, such as Facebook responses.
+
+        """
         if from_json:
             initial_attrib = self.__from_json(from_json)
         else:
             initial_attrib = kwargs
 
-        for (key, value) in initial_attrib.items():
-            setattr(self, key, value)
+        self.__load(initial_attrib, validate)
 
-    def __from_json(self, json_data):
-        return json.loads(json_data)
+    @classmethod
+    def from_dict(cls, data, validate=True):
+        """
+        Builds an object straight from an already decoded JSON dict, such as an item of a Facebook response.
 
-    def __checkchoices(self, value, choices):
-        if value in choices:
-            return True
+        :param dict data: The field values, keyed by field title.
+        :param bool validate: If False, values are only converted and not validated.
 
-    def __add_field(self, field_def, value):
-        this_field = next((x for x in self.FIELDS if x['field_def'].title == field_def.title), None)
-        if not this_field:
-            self.FIELDS.append({'field_def': field_def, 'value': value})
+        """
+        obj = cls.__new__(cls)
+        obj.__load(data, validate)
+        return obj
+
+    def __load(self, initial_attrib, validate):
+        if validate:
+            for (key, value) in initial_attrib.items():
+                setattr(self, key, value)
         else:
-            this_field['value'] = value
-
-    def __validate(self, value, allowed_types):
-
-        if long in allowed_types:
-            allowed_types.append(int)
-
-        if isinstance(value, str):
-            value = unicode(value)
-
-        if isinstance(value, dict):
-            new_val = {}
-            for k, v in value.iteritems():
-                if type(k) == str:
-                    k = unicode(k)
-                elif type(v) == str:
-                    v = unicode(v)
-                new_val[k] = v
-            dict_validator = [x for x in allowed_types if type(x) == dict][0]
-            key_type = dict_validator.keys()[0]
-            val_type = dict_validator.values()[0]
-            if key_type == type(new_val.keys()[0]) and val_type == type(new_val.values()[0]):
-                return True
-
-        if isinstance(allowed_types, list):
-            if len(allowed_types) > 1:
-                if type(value) in tuple(allowed_types):
-                    return True
-            else:
-                if not isinstance(allowed_types[0], list):
-                    if isinstance(value, allowed_types[0]):
-                        return True
-                else:
-                    whole_list_validator = []
-                    for v in value:
-                        if isinstance(v, allowed_types[0][0]):
-                            whole_list_validator.append(True)
-                        else:
-                            whole_list_validator.append(False)
-                    if True in whole_list_validator:
-                        return True
+            converters = self.FIELD_CONVERTERS
+            for (key, value) in initial_attrib.items():
+                convert = converters.get(key)
+                if convert:
+                    object.__setattr__(self, key, convert(value))
+
+    def __getstate__(self):
+        return dict((x['field_def'].title, x['value']) for x in self.FIELDS)
+
+    def __setstate__(self, state):
+        for (key, value) in state.items():
+            object.__setattr__(self, key, value)
+
+    def __from_json(self, json_data):
+        return json.loads(json_data)
 
 
 class AdCreative(AdBase):
@@ -442,8 +614,8 @@ class AdCreative(AdBase):
         NewFieldDef(title='previews', allowed_types=[[Preview]], choices=None),
     )
 
-    def __init__(self, from_json=False, **kwargs):
-        super(AdCreative, self).__init__(from_json, **kwargs)
+    def __init__(self, from_json=False, validate=True, **kwargs):
+        super(AdCreative, self).__init__(from_json, validate, **kwargs)
 
 
 class AdGroup(AdBase):
@@ -477,8 +649,8 @@ class AdGroup(AdBase):
         NewFieldDef(title='previews', allowed_types=[[Preview]], choices=None),
     )
 
-    def __init__(self, from_json=False, **kwargs):
-        super(AdGroup, self).__init__(from_json, **kwargs)
+    def __init__(self, from_json=False, validate=True, **kwargs):
+        super(AdGroup, self).__init__(from_json, validate, **kwargs)
 
 
 class AdCampaign(AdBase):
@@ -505,8 +677,8 @@ class AdCampaign(AdBase):
         NewFieldDef(title='stats', allowed_types=[[AdStatistic]], choices=None),
     )
 
-    def __init__(self, from_json=False, **kwargs):
-        super(AdCampaign, self).__init__(from_json, **kwargs)
+    def __init__(self, from_json=False, validate=True, **kwargs):
+        super(AdCampaign, self).__init__(from_json, validate, **kwargs)
 
 
 class AdAccount(AdBase):
@@ -537,8 +709,8 @@ class AdAccount(AdBase):
         NewFieldDef(title='adpreviewscss', allowed_types=[[AdPreviewCss]], choices=None),
     )
 
-    def __init__(self, from_json=False, **kwargs):
-        super(AdAccount, self).__init__(from_json, **kwargs)
+    def __init__(self, from_json=False, validate=True, **kwargs):
+        super(AdAccount, self).__init__(from_json, validate, **kwargs)
 
 
 class Post(FacebookModel):
@@ -0,0 +1,93 @@
+import sys
+import urlparse
+import threading
+
+
+def next_page_request(next_url, graph_url=None):
+    """
+    Splits a paging.next url from Facebook into the endpoint and params that call_graph_api expects.
+    The path of graph_url, such as a version prefix, is stripped from the endpoint, since call_graph_api adds it back.
+
+    :param str next_url: The full url of the next page
+    :param str graph_url: The url calls are sent to, e.g. https://graph.facebook.com/v2.0
+    :rtype tuple: (endpoint, params), with params as a list of (key, value) pairs so that repeated params are kept
+
+    """
+    parts = urlparse.urlsplit(next_url)
+    path = parts.path
+    base_path = urlparse.urlsplit(graph_url).path.rstrip('/') if graph_url else ''
+    if base_path and (path == base_path or path.startswith(base_path + '/')):
+        path = path[len(base_path):]
+    return path.lstrip('/'), urlparse.parse_qsl(parts.query, keep_blank_values=True)
+
+
+class PageFetch(threading.Thread):
+
+    """
+    Fetches a single page in a background thread, so that it is ready by the time the current page is consumed.
+
+    """
+
+    def __init__(self, fetch_page, next_url):
+        super(PageFetch, self).__init__()
+        self.daemon = True
+        self.fetch_page = fetch_page
+        self.next_url = next_url
+        self.page = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.page = self.fetch_page(self.next_url)
+        except Exception:
+            self.exc_info = sys.exc_info()
+
+    def result(self):
+        """
+        Waits for the page and returns it, re-raising any error raised while fetching it.
+
+        :rtype dict:
+
+        """
+        self.join()
+        if self.exc_info:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+        return self.page
+
+
+def iterate_pages(first_page, fetch_page, max_pages=None, max_items=None, prefetch=True):
+    """
+    Follows the paging.next cursors of a Graph API connection, yielding one normalized page at a time.
+
+    :param dict first_page: The normalized response for the first page.
+    :param function fetch_page: A function taking a paging.next url and returning the normalized response for it.
+    :param int max_pages: The maximum number of pages to yield.
+    :param int max_items: Stop fetching pages once this many items have been yielded.
+    :param bool prefetch: If True, the next page is fetched in the background while the current one is consumed.
+
+    :rtype generator: A generator of normalized response dicts
+
+    """
+    page = first_page
+    pages_seen = 0
+    items_seen = 0
+    while page is not None:
+        pages_seen += 1
+        items_seen += len(page['data'])
+        next_url = page.get('paging', {}).get('next')
+        if not page['data'] or (max_pages and pages_seen >= max_pages) or (max_items and items_seen >= max_items):
+            next_url = None
+
+        next_fetch = None
+        if next_url and prefetch:
+            next_fetch = PageFetch(fetch_page, next_url)
+            next_fetch.start()
+
+        yield page
+
+        if next_fetch:
+            page = next_fetch.result()
+        elif next_url:
+            page = fetch_page(next_url)
+        else:
+            page = None
@@ -0,0 +1,185 @@
+import re
+import threading
+
+from pyfacebook import models
+from pyfacebook.utils import request_template
+
+FIELD_NAME_RE = re.compile(r'^\s*([^{.(\s]+)')
+
+# Named field selections per model, usable as fields='status' in get, iterate, get_many and batch gets
+PRESETS = {
+    models.AdAccount: {
+        'minimal': ['id', 'account_id', 'name'],
+        'status': ['id', 'account_id', 'name', 'account_status'],
+        'spend': ['id', 'account_id', 'name', 'currency', 'daily_spend_limit', 'amount_spent'],
+    },
+    models.AdCampaign: {
+        'minimal': ['id', 'name'],
+        'status': ['id', 'name', 'account_id', 'campaign_status', 'updated_time'],
+        'budget': ['id', 'name', 'daily_budget', 'lifetime_budget', 'budget_remaining', 'start_time', 'end_time'],
+    },
+    models.AdGroup: {
+        'minimal': ['id', 'name'],
+        'status': ['id', 'name', 'account_id', 'campaign_id', 'adgroup_status', 'updated_time'],
+        'bidding': ['id', 'name', 'campaign_id', 'bid_type', 'bid_info'],
+    },
+    models.AdCreative: {
+        'minimal': ['id', 'name'],
+        'content': ['id', 'name', 'type', 'title', 'body', 'image_hash', 'link_url', 'object_id'],
+    },
+}
+
+# The partial models built so far, by (model, selected field titles)
+PARTIAL_MODELS = {}
+PARTIAL_MODELS_LOCK = threading.Lock()
+
+# What project returned so far, by (model, field selection), for selections given as strings or lists of strings
+PROJECTIONS = {}
+
+
+def register_preset(model, name, fields):
+    """
+    Adds or replaces a named field selection for a model.
+
+    :param tinymodel.TinyModel model: The model the preset is for.
+    :param str name: The name the preset is selected by.
+    :param list fields: The fields of the preset. Takes the same forms as the fields param of PyFacebook.get
+
+    """
+    PRESETS.setdefault(model, {})[name] = list(fields)
+    for key in [key for key in PROJECTIONS if key[0] is model]:
+        PROJECTIONS.pop(key, None)
+
+
+def split_fields(fields):
+    """
+    Splits a comma separated Graph API fields string into its top-level field specs, leaving nested expansions whole.
+
+    Example:
+        split_fields('id,targeting{countries,cities},name') == ['id', 'targeting{countries,cities}', 'name']
+
+    :rtype list:
+
+    """
+    specs = []
+    depth = 0
+    current = ''
+    for char in fields:
+        if char == ',' and depth == 0:
+            specs.append(current.strip())
+            current = ''
+            continue
+        if char in '{(':
+            depth += 1
+        elif char in '})':
+            depth -= 1
+        current += char
+    specs.append(current.strip())
+    return [spec for spec in specs if spec]
+
+
+def field_specs(model, fields):
+    """
+    Turns a field selection into a list of Graph API field specs.
+
+    fields may be the name of a preset of the model, a comma separated string of fields, or a list of fields.
+    Items of the list may be nested expansions, either as strings such as 'targeting{countries}' or as dicts
+    such as {'targeting': ['countries']}.
+
+    :rtype list:
+
+    """
+    if isinstance(fields, basestring):
+        preset = PRESETS.get(model, {}).get(fields)
+        if preset is None:
+            return split_fields(fields)
+        fields = preset
+
+    specs = []
+    for field in fields:
+        if isinstance(field, dict):
+            for name, sub_fields in sorted(field.items()):
+                specs.append(name + '{' + ','.join(field_specs(None, sub_fields)) + '}')
+        else:
+            specs.append(field)
+    return specs
+
+
+def field_name(spec):
+    """
+    Returns the name of the top-level field a field spec selects, e.g. targeting for 'targeting{countries}'.
+
+    """
+    match = FIELD_NAME_RE.match(spec)
+    return match.group(1) if match else spec
+
+
+def load_partial(model, titles, state):
+    """
+    Rebuilds a pickled partial model.
+
+    """
+    partial = partial_model(model, titles)
+    obj = partial.__new__(partial)
+    obj.__setstate__(state)
+    return obj
+
+
+def partial_model(model, titles):
+    """
+    Returns a subclass of an AdBase model which only validates and stores the given fields, so that objects
+    fetched with a field selection are cheaper to build. Objects of it are still instances of model.
+
+    Models which aren't AdBase models, and selections which include every field, get the model itself back.
+
+    :param tinymodel.TinyModel model: The model of the objects.
+    :param set titles: The titles of the selected fields.
+
+    :rtype type:
+
+    """
+    if not (isinstance(model, type) and issubclass(model, models.AdBase)):
+        return model
+    field_defs = tuple(f for f in model.FIELD_DEFS if f.title in titles)
+    if len(field_defs) == len(model.FIELD_DEFS):
+        return model
+    titles = frozenset(f.title for f in field_defs)
+
+    key = (model, titles)
+    with PARTIAL_MODELS_LOCK:
+        partial = PARTIAL_MODELS.get(key)
+        if partial is None:
+            partial = PARTIAL_MODELS[key] = type(model)(model.__name__, (model,), {
+                'FIELD_DEFS': field_defs,
+                'PARTIAL_OF': model,
+                '__module__': model.__module__,
+                '__reduce__': lambda self: (load_partial, (model, titles, self.__getstate__())),
+            })
+    return partial
+
+
+def project(model, fields):
+    """
+    Works out what a GET call with a field selection asks Facebook for, and what its objects are built as.
+
+    :param tinymodel.TinyModel model: The model of the objects.
+    :param < str | list > fields: The field selection, see field_specs. If empty, every default field is selected.
+
+    :rtype tuple: (the fields param to send, the model to build objects with)
+
+    """
+    if not fields:
+        return request_template(model).fields_param, model
+
+    key = None
+    if isinstance(fields, basestring):
+        key = (model, fields)
+    elif isinstance(fields, (list, tuple)) and all(isinstance(field, basestring) for field in fields):
+        key = (model, tuple(fields))
+    projection = PROJECTIONS.get(key) if key else None
+    if projection is None:
+        specs = field_specs(model, fields)
+        projection = (','.join(specs), partial_model(model, set(field_name(spec) for spec in specs)))
+        if key:
+            PROJECTIONS[key] = projection
+    return projection
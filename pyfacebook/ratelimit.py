@@ -0,0 +1,265 @@
+import re
+import json
+import time
+import errno
+import random
+import socket
+import threading
+
+from requests.exceptions import ConnectionError, Timeout
+from pyfacebook.utils import FacebookException
+
+ACCOUNT_ENDPOINT_RE = re.compile(r'^act_(\d+)')
+
+# Facebook error codes which mean we are being throttled, or that something went wrong on Facebook's end
+THROTTLING_ERROR_CODES = frozenset([4, 17, 32, 613])
+TRANSIENT_ERROR_CODES = frozenset([1, 2])
+
+# Calls which can be sent again without the risk of doing twice what Facebook may already have done
+IDEMPOTENT_METHODS = frozenset(['GET'])
+
+# Socket errors which mean no connection was made, so the request never reached Facebook
+UNSENT_ERRNOS = frozenset([errno.ECONNREFUSED, errno.ENETUNREACH, errno.EHOSTUNREACH])
+
+
+def request_not_sent(exception):
+    """
+    Tells whether a requests exception shows that the request never reached Facebook, e.g. because the host
+    couldn't be resolved or the connection was refused.
+
+    :rtype bool:
+
+    """
+    if not isinstance(exception, ConnectionError) or not exception.args:
+        return False
+    reason = exception.args[0]
+    reason = getattr(reason, 'reason', reason)
+    if isinstance(reason, socket.gaierror):
+        return True
+    return isinstance(reason, socket.error) and reason.errno in UNSENT_ERRNOS
+
+
+class TokenBucket(object):
+
+    """
+    A thread-safe token bucket. Tokens refill continuously at `rate` per second, up to `capacity`.
+
+    Callers take tokens even if the bucket is empty and then sleep off the debt, so concurrent callers
+    are spaced out in the order they arrived instead of all waking up at once.
+
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.time, sleep=time.sleep):
+        """
+        :param float rate: The number of tokens added per second.
+        :param float capacity: The maximum number of tokens, i.e. the largest burst allowed. Defaults to one second's worth.
+
+        """
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(rate, 1))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.__lock = threading.Lock()
+        self.__updated = clock()
+
+    def set_rate(self, rate):
+        with self.__lock:
+            self.__refill()
+            self.rate = float(rate)
+
+    def __refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens from the bucket, sleeping until they would have been available.
+
+        :param int tokens: The number of tokens to take.
+        :rtype float: The number of seconds slept.
+
+        """
+        with self.__lock:
+            self.__refill()
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class RequestScheduler(object):
+
+    """
+    Paces and retries Graph API calls made through PyFacebook.call_graph_api.
+
+    Calls are rate limited per app and per ad account with token buckets. The pace adapts to the
+    X-App-Usage and X-Ad-Account-Usage headers Facebook sends back, slowing down as usage nears 100%.
+    Throttling errors, transient errors, 5xx responses and connection errors are retried
+    with exponential backoff and full jitter.
+
+    POST and DELETE calls may already have been applied when a transient error, 5xx or timeout comes back,
+    so they are only retried when Facebook throttled them or the request was never sent.
+
+    """
+    USAGE_SLOWDOWN_PCT = 50.0
+    MIN_RATE_FACTOR = 0.05
+
+    def __init__(self, app_rate=None, account_rate=None, burst=None, max_retries=5, backoff_base=1.0, backoff_max=60.0,
+                 retry_error_codes=THROTTLING_ERROR_CODES | TRANSIENT_ERROR_CODES, clock=time.time, sleep=time.sleep):
+        """
+        :param float app_rate: The maximum number of calls per second for the whole app, or None for no limit.
+        :param float account_rate: The maximum number of calls per second to a single ad account, or None for no limit.
+        :param float burst: The number of calls which may be made at once before pacing starts. Defaults to one second's worth.
+        :param int max_retries: The maximum number of times a single call is retried.
+        :param float backoff_base: The backoff in seconds before the first retry. It doubles on each following retry.
+        :param float backoff_max: The maximum backoff in seconds.
+        :param set retry_error_codes: The Facebook error codes which should be retried.
+
+        """
+        self.account_rate = account_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_error_codes = frozenset(retry_error_codes)
+        self.clock = clock
+        self.sleep = sleep
+        self.app_bucket = TokenBucket(app_rate, burst, clock=clock, sleep=sleep) if app_rate else None
+        self.account_buckets = {}
+        self.__lock = threading.Lock()
+        self.__stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled_responses': 0,
+            'throttled_time': 0.0,
+            'backoff_time': 0.0,
+        }
+
+    def __count(self, stat, amount=1):
+        with self.__lock:
+            self.__stats[stat] += amount
+
+    def __account_bucket(self, endpoint):
+        match = ACCOUNT_ENDPOINT_RE.match(endpoint)
+        if not (match and self.account_rate):
+            return None
+        account_id = match.group(1)
+        with self.__lock:
+            bucket = self.account_buckets.get(account_id)
+            if not bucket:
+                bucket = self.account_buckets[account_id] = TokenBucket(self.account_rate, self.burst,
+                                                                        clock=self.clock, sleep=self.sleep)
+        return bucket
+
+    def wait(self, endpoint):
+        """
+        Blocks until a call to the endpoint is allowed by the app and ad account rate limits.
+
+        :param str endpoint: The endpoint about to be called.
+        :rtype float: The number of seconds waited.
+
+        """
+        waited = 0
+        for bucket in (self.app_bucket, self.__account_bucket(endpoint)):
+            if bucket:
+                waited += bucket.acquire()
+        self.__count('requests')
+        if waited:
+            self.__count('throttled_time', waited)
+        return waited
+
+    def __adapt_bucket(self, bucket, usage_pct):
+        if not bucket:
+            return
+        if usage_pct < self.USAGE_SLOWDOWN_PCT:
+            factor = 1.0
+        else:
+            factor = max(self.MIN_RATE_FACTOR, (100.0 - usage_pct) / (100.0 - self.USAGE_SLOWDOWN_PCT))
+        bucket.set_rate(bucket.base_rate * factor)
+
+    def record_response(self, endpoint, headers):
+        """
+        Adapts the pace of calls to the usage Facebook reports in the response headers, if there are any.
+
+        :param str endpoint: The endpoint that was called.
+        :param dict headers: The response headers.
+
+        """
+        app_usage = parse_usage_header(headers.get('x-app-usage'))
+        if app_usage:
+            self.__adapt_bucket(self.app_bucket, max(app_usage.values()))
+        account_usage = parse_usage_header(headers.get('x-ad-account-usage'))
+        if account_usage:
+            self.__adapt_bucket(self.__account_bucket(endpoint), max(account_usage.values()))
+
+    def should_retry(self, attempt, exception=None, status_code=None, http_method='GET'):
+        """
+        Decides whether a failed call should be retried.
+
+        :param int attempt: The number of retries made so far.
+        :param Exception exception: The exception the call raised, if any.
+        :param int status_code: The HTTP status code of the response, if there was one.
+        :param str http_method: The method of the call. Only GET calls are retried after errors which may have
+                                come back once the call was applied.
+
+        :rtype bool:
+
+        """
+        if isinstance(exception, FacebookException) and exception.code in THROTTLING_ERROR_CODES:
+            self.__count('throttled_responses')
+        if attempt >= self.max_retries:
+            return False
+        if http_method not in IDEMPOTENT_METHODS:
+            if isinstance(exception, FacebookException):
+                return exception.code in THROTTLING_ERROR_CODES and exception.code in self.retry_error_codes
+            return request_not_sent(exception)
+        if isinstance(exception, FacebookException):
+            return exception.code in self.retry_error_codes or (status_code or 0) >= 500
+        if isinstance(exception, (ConnectionError, Timeout)):
+            return True
+        return (status_code or 0) >= 500
+
+    def backoff(self, attempt):
+        """
+        Sleeps before retrying a call.
+
+        :param int attempt: The number of the retry about to be made, starting at 1.
+        :rtype float: The number of seconds slept.
+
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        self.__count('retries')
+        self.__count('backoff_time', delay)
+        self.sleep(delay)
+        return delay
+
+    def stats(self):
+        """
+        Returns counters for the calls made through this scheduler.
+
+        :rtype dict: A dict with keys requests, retries, throttled_responses, throttled_time and backoff_time
+
+        """
+        with self.__lock:
+            return dict(self.__stats)
+
+
+def parse_usage_header(header):
+    """
+    Parses a Facebook usage header such as X-App-Usage into a dict of percentages.
+
+    :param str header: The header value, a JSON object of usage percentages.
+    :rtype dict:
+
+    """
+    if not header:
+        return {}
+    try:
+        usage = json.loads(header)
+    except ValueError:
+        return {}
+    return dict((key, float(val)) for key, val in usage.items() if isinstance(val, (int, long, float)))
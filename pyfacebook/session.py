@@ -0,0 +1,135 @@
+import threading
+import requests
+
+from requests.adapters import HTTPAdapter
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+
+    """
+    An HTTPAdapter that keeps track of how many connections it has opened and how many requests it has sent.
+
+    urllib3 reuses its connection objects when a kept-alive socket was dropped or the server asked to close it,
+    quietly opening a new socket for them, so the connection counts of its pools miss those reconnects. We count
+    the sockets opened by wrapping the connect method of each connection the pools make instead.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.__counts_lock = threading.Lock()
+        self.__counts = {'connections': 0, 'requests': 0}
+        super(CountingHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def __count(self, counter):
+        with self.__counts_lock:
+            self.__counts[counter] += 1
+
+    def __counted_connection(self, new_conn):
+        def counted_new_conn():
+            conn = new_conn()
+            connect = conn.connect
+
+            def counted_connect():
+                self.__count('connections')
+                return connect()
+
+            conn.connect = counted_connect
+            return conn
+        return counted_new_conn
+
+    def get_connection(self, url, proxies=None):
+        pool = super(CountingHTTPAdapter, self).get_connection(url, proxies)
+        if not getattr(pool, 'counted_by_adapter', False):
+            pool._new_conn = self.__counted_connection(pool._new_conn)
+            pool.counted_by_adapter = True
+        return pool
+
+    def send(self, request, *args, **kwargs):
+        self.__count('requests')
+        return super(CountingHTTPAdapter, self).send(request, *args, **kwargs)
+
+    def counts(self):
+        """
+        Returns the number of connections opened and requests sent through this adapter so far.
+
+        :rtype tuple: (connections_opened, requests_sent)
+
+        """
+        with self.__counts_lock:
+            return self.__counts['connections'], self.__counts['requests']
+
+
+class GraphSession(object):
+
+    """
+    A pooled, keep-alive HTTP session for talking to the Facebook Graph API.
+
+    Each PyFacebook instance owns one of these (or is handed one), so that consecutive Graph calls reuse
+    open TCP/TLS connections instead of handshaking on every request.
+
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False, max_retries=0,
+                 keep_alive=True, timeout=None, session=None):
+        """
+        :param int pool_connections: The number of per-host connection pools to keep around.
+        :param int pool_maxsize: The maximum number of connections kept open to a single host.
+        :param bool pool_block: If True, block when all connections to a host are in use instead of opening a throwaway one.
+        :param int max_retries: The number of times to retry failed connections (not failed Graph calls).
+        :param bool keep_alive: If False, ask Facebook to close the connection after every request.
+        :param < float | tuple > timeout: The default timeout in seconds for every request.
+        :param requests.Session session: An optional pre-configured requests Session to send requests through.
+
+        """
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.adapter = CountingHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                           max_retries=max_retries, pool_block=pool_block)
+        self.session = session or requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request through the pooled session and returns the requests Response.
+
+        :param str method: The http method to use.
+        :param str url: The full url to call.
+
+        :rtype requests.Response:
+
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def stats(self):
+        """
+        Returns counters describing how well the connection pool is being reused.
+
+        :rtype dict: A dict with keys requests, connections_opened and connections_reused
+
+        """
+        connections, requests_sent = self.adapter.counts()
+        return {
+            'requests': requests_sent,
+            'connections_opened': connections,
+            'connections_reused': max(requests_sent - connections, 0),
+        }
+
+    def close(self):
+        """
+        Closes all pooled connections.
+
+        """
+        self.session.close()
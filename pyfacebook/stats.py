@@ -0,0 +1,228 @@
+import datetime
+
+from dateutil import parser as date_parser
+from pyfacebook import models
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def column_dtype(field_def):
+    """
+    Returns the NumPy dtype a field is stored as in a columnar result, based on its allowed_types.
+
+    :param FieldDef field_def: The field definition
+    :rtype numpy.dtype:
+
+    """
+    allowed_types = [t for t in field_def.allowed_types if t is not type(None)]
+    if datetime.datetime in allowed_types:
+        return numpy.dtype('datetime64[s]')
+    elif allowed_types and all(t in (int, long) for t in allowed_types):
+        return numpy.dtype(numpy.int64)
+    elif allowed_types == [float]:
+        return numpy.dtype(numpy.float64)
+    elif allowed_types == [bool]:
+        return numpy.dtype(numpy.bool_)
+    return numpy.dtype(object)
+
+
+def to_datetime64(value):
+    """
+    Converts a Facebook time (unix timestamp or ISO 8601 string) to seconds since the epoch in UTC, or NaT if missing.
+
+    """
+    if value is None or value == '':
+        return numpy.datetime64('NaT')
+    if isinstance(value, (int, long)):
+        return numpy.datetime64(value, 's')
+    this_datetime = date_parser.parse(value)
+    if this_datetime.tzinfo:
+        this_datetime = this_datetime.replace(tzinfo=None) - this_datetime.utcoffset()
+    return numpy.datetime64(int((this_datetime - EPOCH).total_seconds()), 's')
+
+
+def build_column(rows, title, dtype):
+    """
+    Builds a single typed column from a list of decoded JSON objects. Missing numbers are stored as 0.
+
+    """
+    count = len(rows)
+    if dtype.kind in 'iu':
+        return numpy.fromiter((int(row.get(title) or 0) for row in rows), dtype, count)
+    elif dtype.kind == 'f':
+        return numpy.fromiter((float(row.get(title) or 0) for row in rows), dtype, count)
+    elif dtype.kind == 'M':
+        return numpy.array([to_datetime64(row.get(title)) for row in rows], dtype=dtype)
+    column = numpy.empty(count, dtype=dtype)
+    column[:] = [row.get(title) for row in rows]
+    return column
+
+
+def is_id_field(title):
+    return title == 'id' or title.endswith('_id')
+
+
+def ratio(numerator, denominator):
+    """
+    Divides two columns element-wise, giving NaN where the denominator is 0.
+
+    :rtype numpy.ndarray:
+
+    """
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        result = numpy.true_divide(numpy.asarray(numerator, dtype=numpy.float64), denominator)
+    result[~numpy.isfinite(result)] = numpy.nan
+    return result
+
+
+class ColumnRow(object):
+
+    """
+    A lazy view of a single row of a ModelColumns. Field values are read from the columns on attribute access.
+
+    """
+    __slots__ = ('columns', 'index')
+
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+    def __getattr__(self, name):
+        column = self.columns.columns.get(name)
+        if column is None:
+            raise AttributeError(str(self.columns.model) + " has no field " + name)
+        value = column[self.index]
+        return value.item() if isinstance(value, numpy.generic) else value
+
+    def to_dict(self):
+        return dict((title, getattr(self, title)) for title in self.columns.columns)
+
+    def __repr__(self):
+        return "<" + self.columns.model.__name__ + " row " + str(self.index) + ": " + str(self.to_dict()) + ">"
+
+
+class ModelColumns(object):
+
+    """
+    A columnar result set: one typed NumPy array per field in the model's FIELD_DEFS, instead of one model object per row.
+    Requires numpy.
+
+    """
+
+    def __init__(self, model, rows):
+        """
+        :param tinymodel.TinyModel model: The model the rows are for.
+        :param list rows: The decoded JSON objects, e.g. the data of a Facebook response.
+
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for columnar results. Install it with: pip install numpy")
+        if isinstance(rows, dict):
+            rows = rows.values()
+        self.model = model
+        self.columns = dict((f.title, build_column(rows, f.title, column_dtype(f))) for f in model.FIELD_DEFS)
+        self.__length = len(rows)
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, key):
+        """
+        Returns a column by field title, or a lazy row view by index.
+
+        """
+        if isinstance(key, basestring):
+            return self.columns[key]
+        if key < 0:
+            key += self.__length
+        if not 0 <= key < self.__length:
+            raise IndexError("row index out of range")
+        return ColumnRow(self, key)
+
+    def __iter__(self):
+        for index in xrange(self.__length):
+            yield ColumnRow(self, index)
+
+    def sum(self, field):
+        return self.columns[field].sum()
+
+    def mean(self, field):
+        return self.columns[field].mean() if self.__length else numpy.nan
+
+    def group_by(self, key, fields=None, how='sum'):
+        """
+        Aggregates numeric columns per distinct value of the key column, e.g. per adcampaign_id.
+
+        :param str key: The title of the column to group by.
+        :param list fields: The titles of the columns to aggregate. Defaults to every integer and float column which isn't an id.
+        :param str how: Either 'sum' or 'mean'.
+
+        :rtype dict: A dict of columns: the distinct keys under the key title, a 'count' column, and one column per field.
+
+        """
+        if how not in ('sum', 'mean'):
+            raise ValueError("how must be either 'sum' or 'mean'")
+        if fields is None:
+            fields = [title for title, column in self.columns.items()
+                      if column.dtype.kind in 'iuf' and title != key and not is_id_field(title)]
+
+        keys, inverse = numpy.unique(self.columns[key], return_inverse=True)
+        counts = numpy.bincount(inverse, minlength=len(keys))
+        grouped = {key: keys, 'count': counts}
+        for field in fields:
+            column = self.columns[field]
+            totals = numpy.bincount(inverse, weights=column, minlength=len(keys))
+            if how == 'mean':
+                grouped[field] = totals / counts
+            elif column.dtype.kind in 'iu':
+                grouped[field] = totals.astype(numpy.int64)
+            else:
+                grouped[field] = totals
+        return grouped
+
+
+class AdStatisticColumns(ModelColumns):
+
+    """
+    A columnar set of AdStatistic rows, with the derived metrics Facebook reports.
+
+    """
+
+    def __init__(self, rows, model=models.AdStatistic):
+        super(AdStatisticColumns, self).__init__(model, rows)
+
+    def ctr(self):
+        """ Click-through rate of each row: clicks / impressions """
+        return ratio(self.columns['clicks'], self.columns['impressions'])
+
+    def cpc(self):
+        """ Cost per click of each row: spent / clicks """
+        return ratio(self.columns['spent'], self.columns['clicks'])
+
+    def cpm(self):
+        """ Cost per thousand impressions of each row: spent * 1000 / impressions """
+        return ratio(self.columns['spent'] * 1000, self.columns['impressions'])
+
+
+# The columnar result class used for a model, if it has a dedicated one
+COLUMNAR_MODELS = {
+    models.AdStatistic: AdStatisticColumns,
+}
+
+
+def to_columns(rows, model):
+    """
+    Translates a list or a dict of json objects into a columnar result for the model.
+
+    :rtype ModelColumns:
+
+    """
+    columns_class = COLUMNAR_MODELS.get(model)
+    if columns_class:
+        return columns_class(rows, model=model)
+    return ModelColumns(model, rows)
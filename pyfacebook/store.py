@@ -0,0 +1,274 @@
+import time
+import sqlite3
+import cPickle
+import threading
+import inflection
+
+from pyfacebook import models
+from pyfacebook.fanout import chunks
+from pyfacebook.utils import json_to_objects
+
+# How an object's body is stored: a decoded JSON dict, or the field values of an AdBase model.
+# Other models are stored as their JSON dict, since their field definitions can't be pickled.
+DICT_BODY, STATE_BODY = 0, 1
+
+# The most digests looked up in a single query, below SQLite's limit on bound parameters
+MAX_DIGESTS_PER_QUERY = 500
+
+# The fields holding the status of an object, for the models that have one
+STATUS_FIELDS = ('adgroup_status', 'campaign_status', 'account_status')
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS objects (
+        model TEXT NOT NULL,
+        id TEXT NOT NULL,
+        account_id TEXT,
+        campaign_id TEXT,
+        status TEXT,
+        body_type INTEGER NOT NULL,
+        body BLOB NOT NULL,
+        stored_at REAL NOT NULL,
+        PRIMARY KEY (model, id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS objects_account ON objects (model, account_id, status)",
+    "CREATE INDEX IF NOT EXISTS objects_campaign ON objects (model, campaign_id, status)",
+    "CREATE INDEX IF NOT EXISTS objects_status ON objects (model, status)",
+    """CREATE TABLE IF NOT EXISTS sync_state (
+        account_id TEXT NOT NULL,
+        connection TEXT NOT NULL,
+        body BLOB NOT NULL,
+        PRIMARY KEY (account_id, connection)
+    )""",
+    """CREATE TABLE IF NOT EXISTS images (
+        account_id TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        url TEXT,
+        stored_at REAL NOT NULL,
+        PRIMARY KEY (account_id, digest)
+    )""",
+)
+
+
+def normalize_account_id(account_id):
+    """
+    Strips the act_ prefix of an ad account id, so that both forms are stored the same way.
+
+    :rtype str:
+
+    """
+    if account_id is None:
+        return None
+    account_id = str(account_id)
+    return account_id[4:] if account_id.startswith('act_') else account_id
+
+
+def model_for_connection(connection):
+    """
+    Returns the model of the objects of an ad account connection, e.g. AdGroup for adgroups.
+
+    :rtype tinymodel.TinyModel:
+
+    """
+    name = inflection.singularize(connection).lower()
+    model = next((m for m in vars(models).values() if isinstance(m, type) and m.__name__.lower() == name), None)
+    if model is None:
+        raise ValueError("No model for connection " + str(connection))
+    return model
+
+
+class SQLiteObjectStore(object):
+
+    """
+    A local store of fetched Ads objects, kept in a SQLite database so it survives the process.
+
+    Objects are keyed by model and id, and indexed by account_id, campaign_id and status, so that queries like
+    "all ACTIVE adgroups of campaign X" never touch the Graph API. Objects are stored as given: models saved
+    from json_to_objects output come back as models, and decoded JSON dicts are hydrated when queried.
+
+    It also has the methods of a sync.IncrementalSync store, so synced connections can be kept in it, and those of
+    an images.ImageUploader index, so the images uploaded to each account can be kept in it.
+
+    """
+
+    def __init__(self, path=':memory:'):
+        """
+        :param str path: The path of the SQLite database file. Defaults to an in-memory database.
+
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        with self.__db:
+            for statement in SCHEMA:
+                self.__db.execute(statement)
+
+    def __row(self, model, obj, account_id=None):
+        if isinstance(obj, dict):
+            values, body_type, body = obj, DICT_BODY, obj
+        elif isinstance(obj, models.AdBase):
+            values = obj.__getstate__()
+            body_type, body = STATE_BODY, values
+        else:
+            values = obj.to_json(return_dict=True)
+            body_type, body = DICT_BODY, values
+
+        status = next((values[field] for field in STATUS_FIELDS if values.get(field) is not None), None)
+        campaign_id = values.get('campaign_id')
+        return (model.__name__, str(values['id']),
+                normalize_account_id(values.get('account_id') or account_id),
+                None if campaign_id is None else str(campaign_id),
+                None if status is None else str(status),
+                body_type, sqlite3.Binary(cPickle.dumps(body, cPickle.HIGHEST_PROTOCOL)), time.time())
+
+    def __load(self, model, rows, return_json=False):
+        objects = []
+        for body_type, body in rows:
+            obj = cPickle.loads(str(body))
+            if body_type == STATE_BODY:
+                state, obj = obj, model.__new__(model)
+                obj.__setstate__(state)
+            elif body_type == DICT_BODY and not return_json:
+                obj = json_to_objects([obj], model, validate=False)[0]
+            objects.append(obj)
+        return objects
+
+    def save(self, objects, model=None, account_id=None):
+        """
+        Inserts or replaces objects, in a single transaction.
+
+        :param < list | dict > objects: Models, such as the output of json_to_objects, or decoded JSON dicts.
+        :param tinymodel.TinyModel model: The model of the objects. Defaults to the class of the first object.
+        :param str account_id: The ad account of objects which don't have an account_id field.
+
+        :rtype int: The number of objects saved.
+
+        """
+        if isinstance(objects, dict):
+            objects = objects.values()
+        if not objects:
+            return 0
+        model = model or type(objects[0])
+        rows = [self.__row(model, obj, account_id) for obj in objects]
+        with self.__lock:
+            with self.__db:
+                self.__db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def get(self, model, id, return_json=False):
+        """
+        Returns a single stored object, or None.
+
+        """
+        with self.__lock:
+            rows = self.__db.execute("SELECT body_type, body FROM objects WHERE model = ? AND id = ?",
+                                     (model.__name__, str(id))).fetchall()
+        objects = self.__load(model, rows, return_json)
+        return objects[0] if objects else None
+
+    def query(self, model, account_id=None, campaign_id=None, status=None, return_json=False):
+        """
+        Returns the stored objects of a model which match every filter given.
+
+        Example:
+            store.query(models.AdGroup, campaign_id=123, status='ACTIVE')
+
+        :param tinymodel.TinyModel model: The model of the objects.
+        :param str account_id: The ad account of the objects, with or without the act_ prefix.
+        :param str campaign_id: The campaign of the objects.
+        :param < str | list > status: The status of the objects, or a list of statuses.
+        :param bool return_json: If True, objects stored as dicts are returned as dicts instead of models.
+
+        :rtype list:
+
+        """
+        clauses = ["model = ?"]
+        args = [model.__name__]
+        if account_id is not None:
+            clauses.append("account_id = ?")
+            args.append(normalize_account_id(account_id))
+        if campaign_id is not None:
+            clauses.append("campaign_id = ?")
+            args.append(str(campaign_id))
+        if status is not None:
+            statuses = [str(s) for s in (status if isinstance(status, (list, tuple, set)) else [status])]
+            clauses.append("status IN (" + ", ".join("?" * len(statuses)) + ")")
+            args.extend(statuses)
+        with self.__lock:
+            rows = self.__db.execute("SELECT body_type, body FROM objects WHERE " + " AND ".join(clauses) + " ORDER BY id",
+                                     args).fetchall()
+        return self.__load(model, rows, return_json)
+
+    def delete(self, model, ids):
+        """
+        Drops stored objects by id.
+
+        :rtype int: The number of objects dropped.
+
+        """
+        with self.__lock:
+            with self.__db:
+                return self.__db.executemany("DELETE FROM objects WHERE model = ? AND id = ?",
+                                             [(model.__name__, str(id)) for id in ids]).rowcount
+
+    def count(self, model=None):
+        with self.__lock:
+            if model:
+                return self.__db.execute("SELECT COUNT(*) FROM objects WHERE model = ?", (model.__name__,)).fetchone()[0]
+            return self.__db.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    def get_state(self, account_id, connection):
+        with self.__lock:
+            row = self.__db.execute("SELECT body FROM sync_state WHERE account_id = ? AND connection = ?",
+                                    (normalize_account_id(account_id), connection)).fetchone()
+        return cPickle.loads(str(row[0])) if row else None
+
+    def set_state(self, account_id, connection, state):
+        body = sqlite3.Binary(cPickle.dumps(dict(state), cPickle.HIGHEST_PROTOCOL))
+        with self.__lock:
+            with self.__db:
+                self.__db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+                                  (normalize_account_id(account_id), connection, body))
+
+    def upsert(self, account_id, connection, objects):
+        self.save(objects, model=model_for_connection(connection), account_id=account_id)
+
+    def replace(self, account_id, connection, objects):
+        model = model_for_connection(connection)
+        rows = [self.__row(model, obj, account_id) for obj in objects]
+        with self.__lock:
+            with self.__db:
+                self.__db.execute("DELETE FROM objects WHERE model = ? AND account_id = ?",
+                                  (model.__name__, normalize_account_id(account_id)))
+                self.__db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def get_objects(self, account_id, connection):
+        return self.query(model_for_connection(connection), account_id=account_id, return_json=True)
+
+    def get_images(self, account_id, digests):
+        account_id = normalize_account_id(account_id)
+        images = {}
+        with self.__lock:
+            for chunk in chunks(list(digests), MAX_DIGESTS_PER_QUERY):
+                rows = self.__db.execute("SELECT digest, hash, url FROM images WHERE account_id = ? AND digest IN (" +
+                                         ", ".join("?" * len(chunk)) + ")", [account_id] + chunk).fetchall()
+                images.update((digest, {'hash': image_hash, 'url': url}) for digest, image_hash, url in rows)
+        return images
+
+    def set_images(self, account_id, images):
+        account_id = normalize_account_id(account_id)
+        rows = [(account_id, digest, image['hash'], image.get('url'), time.time()) for digest, image in images.items()]
+        with self.__lock:
+            with self.__db:
+                self.__db.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?)", rows)
+
+    def drop_images(self, account_id, digests):
+        account_id = normalize_account_id(account_id)
+        with self.__lock:
+            with self.__db:
+                self.__db.executemany("DELETE FROM images WHERE account_id = ? AND digest = ?",
+                                      [(account_id, digest) for digest in digests])
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,235 @@
+import json
+import codecs
+
+from pyfacebook.hydration import hydrate
+from pyfacebook.utils import FacebookException
+
+# The number of bytes read from the response at a time
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+
+
+class StreamingResponse(object):
+
+    """
+    A Graph API response decoded incrementally as it is read, for pages too large to hold in memory twice over.
+
+    Iterating over it yields the elements of data one at a time, as soon as each is parsed, so only the element
+    being parsed and the unread part of the current chunk are held in memory. It follows normalize_response:
+    an error raises a FacebookException, the objects of an images response are yielded as its data, and a response
+    with neither is yielded as a single object. The other top-level keys, such as paging, are kept in meta and are
+    complete once iteration ends. PyFacebook calls check_error before handing the response back, so an error
+    response is raised while the call can still be retried.
+
+    A StreamingResponse can only be iterated over once.
+
+    """
+
+    def __init__(self, response, chunk_size=CHUNK_SIZE):
+        """
+        :param requests.Response response: A response sent with stream=True, whose body hasn't been read.
+        :param int chunk_size: The number of bytes read from the response at a time.
+
+        """
+        self.response = response
+        self.meta = {}
+        self.model = None
+        self.validate = True
+        self.instrumentation = None
+        self.event = None
+        self.__chunks = response.iter_content(chunk_size)
+        self.__utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.__decoder = json.JSONDecoder()
+        self.__buffer = u''
+        self.__pos = 0
+        self.__exhausted = False
+        self.__consumed = False
+        self.__opened = False
+        self.__first_key = None
+
+    @property
+    def paging(self):
+        return self.meta.get('paging', {})
+
+    def hydrate(self, model, validate=True, instrumentation=None, event=None):
+        """
+        Makes iteration yield TinyModels of model instead of dicts. See hydration.hydrate
+
+        :rtype StreamingResponse: self, for chaining.
+
+        """
+        self.model = model
+        self.validate = validate
+        self.instrumentation = instrumentation
+        self.event = event
+        return self
+
+    def check_error(self):
+        """
+        Reads the start of the response and raises its error, if the response is a Graph API error. Call before
+        returning the response, so that errors such as throttling are raised where the call can still be retried.
+
+        """
+        if self.__open() == 'error':
+            error = self.__value()
+            self.close()
+            raise FacebookException(message=error['message'], code=error['code'])
+
+    def __iter__(self):
+        if self.__consumed:
+            raise ValueError("A StreamingResponse can only be iterated over once")
+        self.__consumed = True
+        for obj in self.__objects():
+            yield hydrate([obj], self.model, validate=self.validate, instrumentation=self.instrumentation,
+                          event=self.event)[0] if self.model else obj
+
+    def close(self):
+        """
+        Stops reading the response and releases its connection.
+
+        """
+        self.__exhausted = True
+        self.__buffer = u''
+        self.__pos = 0
+        raw = getattr(self.response, 'raw', None)
+        if raw is not None and hasattr(raw, 'release_conn'):
+            raw.release_conn()
+
+    def __read(self, min_chars=1):
+        """
+        Reads chunks into the buffer until it holds at least min_chars unparsed characters, or the response ends.
+        Parsed characters are dropped from the buffer first.
+
+        :rtype bool: False if the response ended before min_chars were read.
+
+        """
+        if self.__pos:
+            self.__buffer = self.__buffer[self.__pos:]
+            self.__pos = 0
+        while len(self.__buffer) < min_chars:
+            if self.__exhausted:
+                return False
+            chunk = next(self.__chunks, None)
+            if chunk is None:
+                self.__exhausted = True
+                self.__buffer += self.__utf8.decode('', final=True)
+            else:
+                self.__buffer += self.__utf8.decode(chunk)
+        return True
+
+    def __peek(self):
+        """
+        Skips whitespace and returns the next character, or None at the end of the response.
+
+        """
+        while True:
+            while self.__pos < len(self.__buffer) and self.__buffer[self.__pos] in WHITESPACE:
+                self.__pos += 1
+            if self.__pos < len(self.__buffer):
+                return self.__buffer[self.__pos]
+            if not self.__read():
+                return None
+
+    def __expect(self, chars):
+        char = self.__peek()
+        if char is None or char not in chars:
+            raise ValueError("Expected one of " + repr(chars) + " at character " + str(self.__pos) + ", got " + repr(char))
+        self.__pos += 1
+        return char
+
+    def __value(self):
+        """
+        Decodes the next whole JSON value, reading more of the response until it is complete.
+
+        """
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__decoder.raw_decode(self.__buffer, self.__pos)
+                # A number at the end of the buffer may go on in the next chunk
+                if end < len(self.__buffer) or self.__exhausted:
+                    self.__pos = end
+                    return value
+            except ValueError:
+                if self.__exhausted:
+                    raise
+            # Grow the buffer geometrically, so that a large value isn't re-parsed once per chunk
+            self.__read(2 * (len(self.__buffer) - self.__pos) or 1)
+
+    def __members(self, container_end):
+        """
+        Yields the values of the array or object just opened, with their keys for objects.
+
+        """
+        if self.__peek() == container_end:
+            self.__pos += 1
+            return
+        while True:
+            key = None
+            if container_end == '}':
+                key = self.__value()
+                self.__expect(':')
+            yield key, self.__value()
+            if self.__expect(',' + container_end) == container_end:
+                return
+
+    def __open(self):
+        """
+        Reads the opening brace and the first key of the top-level object, once.
+
+        :rtype unicode: The first key, or None if the object is empty.
+
+        """
+        if not self.__opened:
+            if self.__peek() != '{':
+                raise ValueError("Graph API response is not a JSON object")
+            self.__pos += 1
+            self.__opened = True
+            if self.__peek() == '}':
+                self.__pos += 1
+            else:
+                self.__first_key = self.__value()
+                self.__expect(':')
+        return self.__first_key
+
+    def __objects(self):
+        streamed = False
+        for key in self.__keys():
+            char = self.__peek()
+            if not streamed and ((key == 'data' and char == '[') or (key == 'images' and char == '{')):
+                self.__pos += 1
+                streamed = True
+                for _, obj in self.__members(']' if char == '[' else '}'):
+                    yield obj
+                continue
+
+            value = self.__value()
+            if key == 'error' and value:
+                raise FacebookException(message=value['message'], code=value['code'])
+            elif key == 'data':
+                streamed = True
+                yield value
+            else:
+                self.meta[key] = value
+
+        if self.__peek() is not None:
+            raise ValueError("Extra data after the Graph API response")
+        if not streamed:
+            obj, self.meta = self.meta, {}
+            yield obj
+
+    def __keys(self):
+        """
+        Yields the keys of the top-level object, leaving the position at the start of each value.
+
+        """
+        key = self.__open()
+        if key is None:
+            return
+        while True:
+            yield key
+            if self.__expect(',}') == '}':
+                return
+            key = self.__value()
+            self.__expect(':')
@@ -0,0 +1,199 @@
+import time
+import calendar
+import threading
+
+from dateutil import parser as date_parser
+from pyfacebook import models
+from pyfacebook.pagination import iterate_pages, next_page_request
+from pyfacebook.projection import field_name, field_specs
+from pyfacebook.utils import request_template
+
+# The connections of an ad account synced by default, and the models of their objects
+DEFAULT_CONNECTIONS = (
+    ('adgroups', models.AdGroup),
+    ('adcampaigns', models.AdCampaign),
+)
+
+
+def to_timestamp(value):
+    """
+    Converts a Facebook time (unix timestamp or ISO 8601 string) to a unix timestamp, or None if missing.
+
+    :rtype int:
+
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, long)):
+        return value
+    this_datetime = date_parser.parse(value)
+    if this_datetime.tzinfo:
+        return calendar.timegm(this_datetime.utctimetuple())
+    return calendar.timegm(this_datetime.timetuple())
+
+
+class MemorySyncStore(object):
+
+    """
+    Keeps synced objects and sync state in memory, per ad account and connection.
+
+    Any store passed to IncrementalSync needs the same methods: get_state, set_state, upsert, replace and get_objects.
+
+    """
+
+    def __init__(self):
+        self.__states = {}
+        self.__objects = {}
+        self.__lock = threading.Lock()
+
+    def get_state(self, account_id, connection):
+        """
+        :rtype dict: The sync state of a connection, with keys watermark and full_synced_at, or None if it was never synced.
+
+        """
+        with self.__lock:
+            state = self.__states.get((account_id, connection))
+            return dict(state) if state else None
+
+    def set_state(self, account_id, connection, state):
+        with self.__lock:
+            self.__states[(account_id, connection)] = dict(state)
+
+    def upsert(self, account_id, connection, objects):
+        """
+        Adds objects to a connection, replacing those with the same id.
+
+        :param list objects: The decoded JSON objects.
+
+        """
+        with self.__lock:
+            stored = self.__objects.setdefault((account_id, connection), {})
+            for obj in objects:
+                stored[str(obj['id'])] = obj
+
+    def replace(self, account_id, connection, objects):
+        """
+        Replaces every object of a connection, dropping those which aren't in objects.
+
+        """
+        with self.__lock:
+            self.__objects[(account_id, connection)] = dict((str(obj['id']), obj) for obj in objects)
+
+    def get_objects(self, account_id, connection):
+        """
+        :rtype list: The decoded JSON objects stored for a connection.
+
+        """
+        with self.__lock:
+            return self.__objects.get((account_id, connection), {}).values()
+
+
+class IncrementalSync(object):
+
+    """
+    Keeps a local copy of the objects of ad account connections up to date, fetching only what changed.
+
+    For each account and connection we keep a watermark: the latest updated_time seen. Later syncs ask Facebook
+    for objects updated after it, skip any older objects Facebook sends anyway, and stop paginating once a whole
+    page is older than the watermark. A full resync, which also drops objects that are gone, runs on the first
+    sync of a connection, when forced, and once every full_resync_interval seconds.
+
+    """
+
+    def __init__(self, pyfacebook, store=None, full_resync_interval=86400, overlap=60, stop_early=True):
+        """
+        :param PyFacebook pyfacebook: The PyFacebook instance to fetch objects through.
+        :param MemorySyncStore store: Where synced objects and watermarks are kept. Defaults to an in-memory store.
+        :param int full_resync_interval: The number of seconds after which a full resync runs, or None to never force one.
+        :param int overlap: The number of seconds before the watermark still fetched, to allow for clock skew.
+        :param bool stop_early: If True, pagination stops at the first page with nothing newer than the watermark.
+                                This assumes Facebook returns objects most recently updated first.
+
+        """
+        self.pyfacebook = pyfacebook
+        self.store = store if store is not None else MemorySyncStore()
+        self.full_resync_interval = full_resync_interval
+        self.overlap = overlap
+        self.stop_early = stop_early
+
+    def __needs_full_sync(self, state, force_full):
+        if force_full or not state or state.get('watermark') is None:
+            return True
+        if self.full_resync_interval is None:
+            return False
+        return time.time() - (state.get('full_synced_at') or 0) >= self.full_resync_interval
+
+    def __fetch_page(self, next_url):
+        endpoint, params = next_page_request(next_url, self.pyfacebook.facebook_graph_url)
+        return self.pyfacebook.call_graph_api(endpoint=endpoint, params=params)
+
+    def sync(self, account_id, connection, model, force_full=False, **kwargs):
+        """
+        Brings the local copy of a single connection up to date.
+
+        :param str account_id: The id of the ad account, e.g. act_123
+        :param str connection: The name of the connection, e.g. adgroups
+        :param tinymodel.TinyModel model: The class of the connection's objects. It needs an updated_time field.
+        :param bool force_full: If True, run a full resync.
+
+        :rtype dict: A dict with keys full, pages, fetched, changed and watermark
+                     (the number of objects returned by Facebook, and how many of them were new or updated).
+
+        """
+        state = self.store.get_state(account_id, connection)
+        full = self.__needs_full_sync(state, force_full)
+        watermark = None if full else state['watermark']
+        since = None if watermark is None else watermark - self.overlap
+
+        params = {'fields': list(request_template(model).fields)}
+        params.update(kwargs)
+        # Selections may be a preset name or a comma separated string, so expand them before adding updated_time
+        params['fields'] = field_specs(model, params['fields'] or list(request_template(model).fields))
+        if 'updated_time' not in [field_name(spec) for spec in params['fields']]:
+            params['fields'].append('updated_time')
+        if since is not None:
+            params['filtering'] = [{'field': 'updated_time', 'operator': 'GREATER_THAN', 'value': since}]
+
+        first_page = self.pyfacebook.get(model=model, id=account_id, connection=connection, return_json=True, **params)
+        started_at = time.time()
+        new_watermark = watermark
+        pages = fetched = 0
+        changed = []
+        for page in iterate_pages(first_page, self.__fetch_page, prefetch=not (self.stop_early and since is not None)):
+            pages += 1
+            data = page['data'] if isinstance(page['data'], list) else page['data'].values()
+            fetched += len(data)
+            page_changed = 0
+            for obj in data:
+                updated_time = to_timestamp(obj.get('updated_time'))
+                if since is not None and updated_time is not None and updated_time <= since:
+                    continue
+                changed.append(obj)
+                page_changed += 1
+                if updated_time is not None and (new_watermark is None or updated_time > new_watermark):
+                    new_watermark = updated_time
+            if since is not None and self.stop_early and data and not page_changed:
+                break
+
+        if full:
+            self.store.replace(account_id, connection, changed)
+            state = {'full_synced_at': started_at}
+        else:
+            self.store.upsert(account_id, connection, changed)
+        state['watermark'] = new_watermark
+        self.store.set_state(account_id, connection, state)
+        return {'full': full, 'pages': pages, 'fetched': fetched, 'changed': len(changed), 'watermark': new_watermark}
+
+    def sync_account(self, account_id, connections=DEFAULT_CONNECTIONS, force_full=False):
+        """
+        Brings the local copy of several connections of an ad account up to date.
+
+        :param str account_id: The id of the ad account, e.g. act_123
+        :param tuple connections: Pairs of (connection, model) to sync.
+        :param bool force_full: If True, run a full resync of every connection.
+
+        :rtype dict: A dict of connection to what sync returned for it.
+
+        """
+        return dict((connection, self.sync(account_id, connection, model, force_full=force_full))
+                    for connection, model in connections)
@@ -0,0 +1,131 @@
+import time
+import shelve
+import hashlib
+import threading
+
+
+# How long a validated token is served from a cache by default, in seconds
+DEFAULT_MAX_AGE = 3600
+
+
+def token_key(token_text, graph_url=None, app_id=None):
+    """
+    Returns the key a token is cached under. Tokens are keyed by a hash so the token itself is never used as a key.
+    The Graph API url and the app are part of the key, so that clients talking to different servers or apps
+    don't share entries.
+
+    :param str token_text: The oauth token
+    :param str graph_url: The url of the Graph API the token was validated against.
+    :param str app_id: The app the token was validated for.
+    :rtype str:
+
+    """
+    parts = []
+    for part in (graph_url, app_id, token_text):
+        part = '' if part is None else part
+        parts.append(part.encode('utf-8') if isinstance(part, unicode) else str(part))
+    return hashlib.sha256('\0'.join(parts)).hexdigest()
+
+
+class TokenCache(object):
+
+    """
+    Caches the result of debug_token calls, so that validating an already known token takes no network calls.
+
+    Entries are kept in memory, and optionally in a shelf on disk so they survive the process. They are dropped
+    after max_age seconds, so that tokens revoked on Facebook stop being trusted, and once the token is within
+    expiry_margin seconds of its expires_at, so that PyFacebook re-validates (and exchanges, if using long-lived tokens)
+    it in time. The token text itself is never written to disk.
+
+    """
+
+    def __init__(self, path=None, expiry_margin=86400, max_age=DEFAULT_MAX_AGE):
+        """
+        :param str path: The path of a shelf file to persist the cache to. If None, the cache is in memory only.
+        :param int expiry_margin: The number of seconds before expires_at at which a token stops being served from the cache.
+        :param int max_age: The maximum number of seconds a token is served from the cache.
+
+        """
+        self.path = path
+        self.expiry_margin = expiry_margin
+        self.max_age = max_age
+        self.__entries = {}
+        self.__lock = threading.Lock()
+
+    def __is_fresh(self, entry):
+        now = time.time()
+        if self.max_age and now - entry['cached_at'] > self.max_age:
+            return False
+        expires_at = entry['token'].get('expires_at')
+        return not expires_at or expires_at - self.expiry_margin > now
+
+    def get(self, token_text, graph_url=None, app_id=None):
+        """
+        Returns the cached debug_token data for a token, or None if it isn't cached or is about to expire.
+
+        :param str token_text: The oauth token
+        :param str graph_url: The url of the Graph API the token is validated against.
+        :param str app_id: The app the token is validated for.
+        :rtype dict: The data of the debug_token response, including the token text.
+
+        """
+        key = token_key(token_text, graph_url, app_id)
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if not entry and self.path:
+                shelf = shelve.open(self.path)
+                try:
+                    entry = shelf.get(key)
+                finally:
+                    shelf.close()
+                if entry:
+                    self.__entries[key] = entry
+
+        if not entry or not self.__is_fresh(entry):
+            return None
+        token_dict = dict(entry['token'])
+        token_dict['text'] = token_text
+        return token_dict
+
+    def set(self, token_text, token_dict, graph_url=None, app_id=None):
+        """
+        Caches the debug_token data for a token. Invalid tokens are not cached.
+
+        :param str token_text: The oauth token
+        :param dict token_dict: The data of the debug_token response.
+        :param str graph_url: The url of the Graph API the token was validated against.
+        :param str app_id: The app the token was validated for.
+
+        """
+        if not token_dict.get('is_valid'):
+            return
+        token_dict = dict(token_dict)
+        token_dict.pop('text', None)
+        key = token_key(token_text, graph_url, app_id)
+        entry = {'token': token_dict, 'cached_at': time.time()}
+        with self.__lock:
+            self.__entries[key] = entry
+            if self.path:
+                shelf = shelve.open(self.path)
+                try:
+                    shelf[key] = entry
+                finally:
+                    shelf.close()
+
+    def clear(self):
+        """
+        Drops every cached token, in memory and on disk.
+
+        """
+        with self.__lock:
+            self.__entries.clear()
+            if self.path:
+                shelf = shelve.open(self.path)
+                try:
+                    shelf.clear()
+                finally:
+                    shelf.close()
+
+
+# A cache which PyFacebook instances can share within the process, by passing it as token_cache
+PROCESS_TOKEN_CACHE = TokenCache()
@@ -1,5 +1,9 @@
 import os
 import json
+import pytz
+import datetime
+import warnings
+import inflection
 
 class FacebookException(Exception):
 
@@ -9,6 +13,7 @@ class FacebookException(Exception):
     """
 
     def __init__(self, message, code=None):
+        self.code = code
         custom_message = "Facebook API Error: " + message
         if code:
             custom_message += "\nError Code: " + str(code)
@@ -44,20 +49,293 @@ def delete_shelf_files(filename):
             pass
 
 
-def json_to_objects(list_or_dict, model):
+def json_to_objects(list_or_dict, model, validate=True):
     """
     Translates a list or a dict of json objects into a list or a dict of TinyModel objects
     :param < list | dict > list_or_dict: A list or a dict of JSON objects
+    :param bool validate: If False, AdBase models skip field validation. Use for trusted data, such as Facebook responses.
 
     :rtype < list | dict >: A list or a dict of TinyModel objects
     """
+    from_dict = getattr(model, 'from_dict', None) or (lambda obj, validate: model(from_json=json.dumps(obj)))
+
     if isinstance(list_or_dict, list):
         for index, obj in enumerate(list_or_dict):
-            list_or_dict[index] = model(from_json=json.dumps(obj))
+            list_or_dict[index] = from_dict(obj, validate=validate)
     elif isinstance(list_or_dict, dict):
         for key, val in list_or_dict.items():
-            list_or_dict[key] = model(from_json=json.dumps(val))
+            list_or_dict[key] = from_dict(val, validate=validate)
     else:
         raise Exception("Facebook data returned in an unrecognized type: " + str(type(list_or_dict)))
 
     return list_or_dict
+
+
+# Facebook time: the start of the hour of a UTC datetime, in ISO 8601
+FACEBOOK_TIME_FORMAT = '%04d-%02d-%02dT%02d:00:00+00:00'
+
+
+def facebook_time(this_datetime):
+    """
+    Formats a UTC (or naive) datetime as Facebook time, without any checks. See convert_datetime_to_facebook
+
+    :rtype str:
+
+    """
+    return FACEBOOK_TIME_FORMAT % (this_datetime.year, this_datetime.month, this_datetime.day, this_datetime.hour)
+
+
+def convert_datetime_to_facebook(field_name, this_datetime, warn=True):
+    """
+    Converts any date or datetime to the proper format for a Facebook call
+
+    Facebook expects UTC times so if we get anything other than UTC than we raise a warning and convert if possible
+
+    :param str field_name: The name of the field we're converting
+    :param datetime this_datetime: The datetime we want to convert
+    :param bool warn: If False, naive and non-UTC datetimes are converted without a warning.
+    :rtype str: A string representing the Facebook time
+
+    """
+    if not isinstance(this_datetime, datetime.datetime):
+        if not isinstance(this_datetime, datetime.date):
+            raise Exception(field_name + " needs to be either a date or a datetime object")
+        else:
+            this_datetime = datetime.datetime(this_datetime.year, this_datetime.month, this_datetime.day)
+
+    if not this_datetime.tzinfo:
+        if warn:
+            warnings.warn("WARNING: Your parameter " + field_name + " was sent as a naive datetime.\n"
+                          "Facebook expects UTC datetimes only, so we are sending as UTC.\n"
+                          "Please send timezone-aware datetimes in the future.")
+    elif not this_datetime.tzinfo == pytz.utc:
+        if warn:
+            warnings.warn("WARNING: Your parameter " + field_name + " was not sent as UTC.\n"
+                          "Facebook expects UTC datetimes only, so we are converting it to UTC.\n"
+                          "Please send UTC datetimes in the future.")
+        this_datetime = this_datetime.astimezone(pytz.utc)
+
+    return facebook_time(this_datetime)
+
+
+def encode_datetime(key, value):
+    """
+    Encodes a date or datetime param, going straight to the formatting for datetimes which are already UTC.
+
+    """
+    if type(value) is datetime.datetime and value.tzinfo is pytz.utc:
+        return facebook_time(value)
+    return convert_datetime_to_facebook(key, value)
+
+
+def encode_datetimes(key, values):
+    """
+    Converts a list of dates and datetimes to Facebook time in a single pass. UTC datetimes skip every check,
+    and a list of naive or non-UTC datetimes warns once, not once per item.
+
+    :param str key: The name of the param the list is for.
+    :param list values: The dates and datetimes.
+    :rtype list: A list of Facebook time strings.
+
+    """
+    encoded = []
+    warned = False
+    for value in values:
+        if type(value) is datetime.datetime and value.tzinfo is pytz.utc:
+            encoded.append(facebook_time(value))
+            continue
+        encoded.append(convert_datetime_to_facebook(key, value, warn=not warned))
+        warned = warned or getattr(value, 'tzinfo', None) != pytz.utc
+    return encoded
+
+
+def encode_container(key, value):
+    """
+    Dumps a list, tuple, set or dict param to JSON. Lists of datetimes are converted to Facebook time first.
+    Values which can't be dumped, such as sets, are sent as they are.
+
+    """
+    try:
+        return json.dumps(value)
+    except (TypeError, ValueError):
+        if isinstance(value, (list, tuple)) and value and all(isinstance(val, datetime.date) for val in value):
+            return json.dumps(encode_datetimes(key, value))
+        return value
+
+
+class EncodedParam(object):
+
+    """
+    A param value encoded once and sent as is on every call, for large values reused across many calls,
+    such as a targeting spec shared by many adgroups. The value must not be changed after it is wrapped.
+
+    Example:
+        targeting = EncodedParam({'countries': ['US'], 'age_min': 18})
+        for name in names:
+            pyfb.post(models.AdGroup, id=account_id, name=name, targeting=targeting, ...)
+
+    """
+    __slots__ = ('value', 'encoded')
+
+    def __init__(self, value, key=None):
+        """
+        :param obj value: The param value.
+        :param str key: The name of the param, only used in warnings about datetimes.
+
+        """
+        self.value = value
+        self.encoded = encode_param(key or 'param', value)
+
+    def __repr__(self):
+        return "<EncodedParam " + repr(self.encoded) + ">"
+
+
+def pass_through(key, value):
+    return value
+
+
+# How each type of param value is encoded. Types not listed are looked up by their base classes in
+# PARAM_ENCODER_BASES on first use, and added here.
+PARAM_ENCODERS = {
+    str: pass_through,
+    unicode: pass_through,
+    int: pass_through,
+    long: pass_through,
+    float: pass_through,
+    bool: pass_through,
+    type(None): pass_through,
+    list: encode_container,
+    tuple: encode_container,
+    set: encode_container,
+    dict: encode_container,
+    datetime.datetime: encode_datetime,
+    datetime.date: encode_datetime,
+    EncodedParam: lambda key, value: value.encoded,
+}
+PARAM_ENCODER_BASES = (
+    (basestring, pass_through),
+    ((list, tuple, set, dict), encode_container),
+    (datetime.date, encode_datetime),
+)
+
+
+def encode_param(key, value):
+    """
+    Encodes a single Graph API param value: iterables are dumped to JSON and dates are converted to Facebook time.
+    Anything else is sent as it is.
+
+    :rtype obj: The encoded value.
+
+    """
+    encoder = PARAM_ENCODERS.get(type(value))
+    if encoder is None:
+        encoder = next((encoder for bases, encoder in PARAM_ENCODER_BASES if isinstance(value, bases)), pass_through)
+        PARAM_ENCODERS[type(value)] = encoder
+    return encoder(key, value)
+
+
+def encode_params(params):
+    """
+    Encodes a dict of Graph API params: iterables are dumped to JSON and dates are converted to Facebook time.
+    The dict passed in is left unchanged.
+
+    :param dict params: A dict of params to attach to a graph API call.
+    :rtype dict: A new dict, with the values encoded.
+
+    """
+    encoders = PARAM_ENCODERS
+    encoded = {}
+    for key, val in params.iteritems():
+        encoder = encoders.get(type(val))
+        encoded[key] = encoder(key, val) if encoder is not None else encode_param(key, val)
+    return encoded
+
+
+def normalize_response(json_response):
+    """
+    Standardizes a decoded Graph API response dict so that results are always found under the 'data' key.
+    Raises a FacebookException if Facebook returned an error.
+
+    :param dict json_response: The json-decoded response from Facebook.
+    :rtype dict: A dict with results under the 'data' key.
+
+    """
+    if json_response.get('error'):
+        raise FacebookException(message=json_response['error']['message'], code=json_response['error']['code'])
+    elif json_response.get('images'):
+        json_response = {'data': json_response['images']}
+    elif 'data' not in json_response:
+        json_response = {'data': [json_response]}
+    return json_response
+
+
+def build_endpoint(model, id=None, connection=None):
+    """
+    Creates a properly-formatted Facebook Graph API endpoint from id and connection parameters.
+
+    :param tinymodel.TinyModel model: The class associated with the objects we're calling.
+    :param str id: The id of the parent object
+    :param str connection: The name of connection to call
+    :rtype str: The endpoint, relative to the Graph API root
+
+    """
+    endpoint = str(id) if id else request_template(model).endpoint
+
+    if connection:
+        endpoint += ('/' + connection)
+
+    return endpoint
+
+
+def default_fields(model):
+    """
+    Returns the fields GET calls ask for when none are specified: every field that is not a connection or create-only.
+
+    :param tinymodel.TinyModel model: The class associated with the objects we're getting.
+    :rtype list: A list of field titles
+
+    """
+    return [f.title for f in model.FIELD_DEFS
+            if f.title not in getattr(model, 'CONNECTIONS', []) and
+            f.title not in getattr(model, 'CREATE_ONLY', [])]
+
+
+class RequestTemplate(object):
+
+    """
+    The parts of a Graph API call that only depend on the model, worked out once so that hot loops
+    don't redo the introspection and inflection on every call.
+
+    """
+    __slots__ = ('model', 'fields', 'fields_param', 'endpoint', 'connection')
+
+    def __init__(self, model):
+        """
+        :param tinymodel.TinyModel model: The class associated with the objects we're calling.
+
+        """
+        self.model = model
+        # The default fields, and the same already encoded as encode_params would send them
+        self.fields = tuple(default_fields(model))
+        self.fields_param = json.dumps(list(self.fields))
+        # The endpoint of the model when called without an id, and the connection objects are POSTed to
+        self.endpoint = model.__name__.lower()
+        self.connection = inflection.pluralize(self.endpoint)
+
+
+# The RequestTemplate of every model called so far
+REQUEST_TEMPLATES = {}
+
+
+def request_template(model):
+    """
+    Returns the RequestTemplate of a model, building it on first use.
+
+    :param tinymodel.TinyModel model: The class associated with the objects we're calling.
+    :rtype RequestTemplate:
+
+    """
+    template = REQUEST_TEMPLATES.get(model)
+    if template is None:
+        template = REQUEST_TEMPLATES[model] = RequestTemplate(model)
+    return template
@@ -25,6 +25,9 @@ setup(
         'inflection==0.2.0',
         'caliendo==v2.0.5'
     ],
+    extras_require={
+        'columnar': ['numpy'],
+    },
     dependency_links=[
         'https://github.com/buzzfeed/tinymodel/tarball/0.0.19#egg=tinymodel-0.0.19',
         'https://github.com/buzzfeed/caliendo/tarball/v2.0.5#egg=caliendo-v2.0.5'
@@ -0,0 +1,55 @@
+import json
+import pickle
+import datetime
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import models
+
+
+class AdBaseTest(unittest.TestCase):
+    """ Tests the slot-backed field store of AdBase models. """
+
+    def test_slots(self):
+        for model in (models.AdAccount, models.AdCampaign, models.AdCreative, models.AdGroup):
+            ok_(set(model.__slots__) == set(f.title for f in model.FIELD_DEFS))
+            ok_(set(model.FIELD_DEFS_BY_TITLE) == set(model.FIELD_VALIDATORS) == set(model.__slots__))
+            ok_(not hasattr(model(), '__dict__'))
+
+    def test_fields(self):
+        adgroup = models.AdGroup(name=u'adgroup', id=6010000000000L, adgroup_status=u'ACTIVE')
+        ok_([(x['field_def'].title, x['value']) for x in adgroup.FIELDS] ==
+            [('id', 6010000000000L), ('name', u'adgroup'), ('adgroup_status', u'ACTIVE')])
+        self.assertRaises(AttributeError, getattr, adgroup, 'campaign_id')
+        ok_(getattr(adgroup, 'campaign_id', None) is None)
+
+        adgroup.campaign_id = 6000000000000L
+        ok_(adgroup.campaign_id == 6000000000000L and len(adgroup.FIELDS) == 4)
+
+        # Unknown fields are ignored, as they always have been
+        adgroup.unknown = 1
+        self.assertRaises(AttributeError, getattr, adgroup, 'unknown')
+        ok_("'name': u'adgroup'" in repr(adgroup))
+
+    def test_validation(self):
+        self.assertRaises(ValueError, models.AdGroup, name=1)
+        self.assertRaises(ValueError, setattr, models.AdGroup(), 'creative_ids', [u'1'])
+        adgroup = models.AdGroup(name=1, validate=False)
+        ok_(adgroup.name == 1)
+
+    def test_from_json(self):
+        campaign = models.AdCampaign(from_json=json.dumps({
+            'id': 6000000000000, 'name': 'campaign', 'campaign_status': 1, 'start_time': 1393632000,
+        }))
+        ok_(campaign.name == u'campaign' and isinstance(campaign.name, unicode))
+        ok_(campaign.start_time == datetime.datetime(2014, 3, 1))
+
+    def test_pickle(self):
+        adgroup = models.AdGroup(id=6010000000000L, name=u'adgroup', creative={u'creative_id': 1L},
+                                 updated_time=datetime.datetime(2014, 3, 1))
+        ok_(adgroup.__getstate__() == {'id': 6010000000000L, 'name': u'adgroup', 'creative': {u'creative_id': 1L},
+                                       'updated_time': datetime.datetime(2014, 3, 1)})
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            loaded = pickle.loads(pickle.dumps(adgroup, protocol))
+            ok_(loaded.__getstate__() == adgroup.__getstate__())
+            self.assertRaises(AttributeError, getattr, loaded, 'campaign_id')
@@ -0,0 +1,87 @@
+import time
+import functools
+import threading
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.async_client import AsyncPyFacebook
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.instrumentation import Instrumentation
+from pyfacebook.utils import FacebookException
+
+
+class AsyncPyFacebookTest(unittest.TestCase):
+    """ Tests AsyncPyFacebook against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=5, creatives_per_account=2).start()
+        self.afb = AsyncPyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, max_concurrency=4)
+
+    def tearDown(self):
+        self.afb.close()
+        self.server.stop()
+
+    def test_calls(self):
+        account = self.afb.get(models.AdAccount, 'act_1')
+        adgroups = self.afb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True, limit=3)
+        ok_(account.get()['data'][0].account_id == 1)
+        ok_(len(adgroups.get()['data']) == 3 and isinstance(adgroups.get()['data'][0], dict))
+
+        campaign_id = self.afb.post(models.AdCampaign, id='act_1', name=u'async', campaign_status=1).get()['data'][0].id
+        ok_(self.afb.get(models.AdCampaign, str(campaign_id)).get()['data'][0].name == u'async')
+        ok_(self.afb.delete(campaign_id).get())
+        ok_(self.afb.call_graph_api('act_1', params={'fields': 'name'}).get()['data'][0]['name'])
+        ok_(self.afb.validate_access_token('fake-token').get())
+        ok_(self.afb.access_token == self.afb.pyfacebook.access_token)
+
+    def test_errors(self):
+        missing = self.afb.get(models.AdGroup, '1234')
+        self.assertRaises(FacebookException, missing.get)
+
+    def test_gather(self):
+        state = {'in_flight': 0, 'most_in_flight': 0}
+        lock = threading.Lock()
+
+        def call(id):
+            with lock:
+                state['in_flight'] += 1
+                state['most_in_flight'] = max(state['most_in_flight'], state['in_flight'])
+            try:
+                time.sleep(0.01)
+                return self.afb.pyfacebook.get(models.AdGroup, id)['data'][0].id
+            finally:
+                with lock:
+                    state['in_flight'] -= 1
+
+        ids = [adgroup['id'] for adgroup in self.afb.pyfacebook.get(models.AdGroup, 'act_1', 'adgroups',
+                                                                    return_json=True, limit=10)['data']]
+        results = self.afb.gather((functools.partial(call, id) for id in ids), concurrency=2)
+        ok_(results == [long(id) for id in ids])
+        ok_(state['most_in_flight'] == 2)
+
+    def test_gather_exceptions(self):
+        calls = [functools.partial(self.afb.pyfacebook.get, models.AdAccount, 'act_1'),
+                 functools.partial(self.afb.pyfacebook.get, models.AdGroup, '1234')]
+        self.assertRaises(FacebookException, self.afb.gather, calls)
+        results = self.afb.gather(calls, return_exceptions=True)
+        ok_(results[0]['data'][0].account_id == 1 and isinstance(results[1], FacebookException))
+
+    def test_pyfacebook_arguments(self):
+        instrumentation = Instrumentation()
+        afb = AsyncPyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, max_concurrency=2,
+                              validate_responses=False, lazy_validate=True, instrumentation=instrumentation)
+        ok_(afb.pyfacebook.validate_responses is False and afb.pyfacebook.instrumentation is instrumentation)
+        ok_(afb.get(models.AdAccount, 'act_1').get()['data'][0].account_id == 1)
+        afb.close()
+        self.assertRaises(TypeError, AsyncPyFacebook, token_text='fake-token', facebook_graph_url=self.server.url,
+                          unknown=True)
+
+    def test_wrapped_pyfacebook(self):
+        pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        afb = AsyncPyFacebook(pyfacebook=pyfb, max_concurrency=2)
+        ok_(afb.pyfacebook is pyfb and afb.get(models.AdAccount, 'act_1').get()['data'][0].account_id == 1)
+        afb.close()
@@ -0,0 +1,193 @@
+import json
+import urlparse
+import unittest
+import warnings
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.batch import GraphBatch
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.utils import FacebookException
+
+
+class RecordingGraph(object):
+    """ Stands in for PyFacebook, recording the batch calls sent through it and answering each sub-request with answer. """
+
+    validate_responses = True
+    hydrator = None
+    instrumentation = None
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.batches = []
+
+    def call_graph_api(self, endpoint, http_method, expect_json, params):
+        ok_(endpoint == '' and http_method == 'POST' and not expect_json)
+        self.batches.append(params['batch'])
+        return json.dumps([self.answer(sub_request) for sub_request in params['batch']])
+
+
+def created(sub_request):
+    if sub_request['method'] == 'DELETE':
+        return {'code': 200, 'body': 'true'}
+    return {'code': 200, 'body': json.dumps({'id': '1' + str(len(sub_request['relative_url']))})}
+
+
+def body_params(sub_request):
+    return dict(urlparse.parse_qsl(sub_request.get('body', '')))
+
+
+class GraphBatchTest(unittest.TestCase):
+    """ Tests the encoding and chunking of batch calls, and how their results are handed back. """
+
+    def test_chunking(self):
+        graph = RecordingGraph(created)
+        batch = GraphBatch(graph, max_batch_size=500)
+        ok_(batch.max_batch_size == 50)
+        for id in range(120):
+            batch.delete(id)
+        ok_(batch.execute() == [True] * 120)
+        ok_([len(sub_requests) for sub_requests in graph.batches] == [50, 50, 20])
+        ok_([sub_request['relative_url'] for sub_request in graph.batches[2]] == [str(id) for id in range(100, 120)])
+        ok_(batch.execute() == [True] * 120 and len(graph.batches) == 3)
+
+    def test_encoding(self):
+        graph = RecordingGraph(created)
+        batch = GraphBatch(graph)
+        batch.get(models.AdGroup, 'act_1', 'adgroups', return_json=True, fields=['id', 'name'], limit=2)
+        batch.post(models.AdCampaign, id='act_1', return_json=True, name=u'caf\xe9', campaign_status=1)
+        batch.execute()
+        get, post = graph.batches[0]
+        ok_(get['method'] == 'GET' and get['relative_url'].startswith('act_1/adgroups?'))
+        ok_(dict(urlparse.parse_qsl(get['relative_url'].split('?')[1])) == {'fields': 'id,name', 'limit': '2'})
+        ok_(post['method'] == 'POST' and post['relative_url'] == 'act_1/adcampaigns')
+        ok_(body_params(post) == {'name': 'caf\xc3\xa9', 'campaign_status': '1'})
+
+    def test_named_references(self):
+        graph = RecordingGraph(created)
+        batch = GraphBatch(graph)
+        campaign = batch.post(models.AdCampaign, id='act_1', return_json=True, name=u'c')
+        adgroup = batch.post(models.AdGroup, id='act_1', return_json=True, campaign_id=campaign.ref(),
+                             creative={'creative_id': campaign.ref('$.id')})
+        batch.execute()
+        first, second = graph.batches[0]
+        ok_(campaign.name == 'request_0' and first['name'] == 'request_0' and first['omit_response_on_success'] is False)
+        ok_('name' not in second)
+        ok_(body_params(second)['campaign_id'] == '{result=request_0:$.id}')
+        ok_(json.loads(body_params(second)['creative']) == {'creative_id': '{result=request_0:$.id}'})
+        ok_(adgroup.exception is None)
+
+    def test_references_across_chunks(self):
+        graph = RecordingGraph(created)
+        batch = GraphBatch(graph, max_batch_size=1)
+        campaign = batch.post(models.AdCampaign, id='act_1', return_json=True, name=u'c')
+        batch.post(models.AdGroup, id='act_1', return_json=True, campaign_id=campaign.ref())
+        results = batch.execute()
+        ok_(len(graph.batches) == 2 and results[0]['data'][0]['id'] == campaign.raw['id'])
+        ok_(body_params(graph.batches[1][0])['campaign_id'] == campaign.raw['id'])
+
+    def test_reference_outside_batch(self):
+        other = GraphBatch(RecordingGraph(created)).post(models.AdCampaign, id='act_1', name=u'c')
+        self.assertRaises(Exception, GraphBatch(RecordingGraph(created)).post, models.AdGroup, id='act_1',
+                          campaign_id=other.ref())
+
+    def test_dependency_failures(self):
+        def answer(sub_request):
+            if sub_request['relative_url'] == 'act_1/adcampaigns':
+                return {'code': 400, 'body': json.dumps({'error': {'message': 'Invalid name', 'code': 100}})}
+            # Facebook answers null for requests whose dependencies failed
+            return None if '{result=' in body_params(sub_request).get('campaign_id', '') else created(sub_request)
+
+        graph = RecordingGraph(answer)
+        batch = GraphBatch(graph, max_batch_size=2)
+        campaign = batch.post(models.AdCampaign, id='act_1', return_json=True, name=u'c')
+        same_chunk = batch.post(models.AdGroup, id='act_1', return_json=True, campaign_id=campaign.ref())
+        next_chunk = batch.post(models.AdGroup, id='act_1', return_json=True, campaign_id=campaign.ref())
+        independent = batch.delete(5)
+        results = batch.execute()
+        ok_(all(isinstance(result, FacebookException) for result in results[:3]) and results[3] is True)
+        ok_(campaign.exception.code == 100 and same_chunk.exception and next_chunk.exception)
+        ok_([len(sub_requests) for sub_requests in graph.batches] == [2, 1])
+
+    def test_per_request_errors(self):
+        def answer(sub_request):
+            if sub_request['relative_url'] == '2':
+                return {'code': 400, 'body': json.dumps({'error': {'message': 'Unsupported delete request.', 'code': 100}})}
+            if sub_request['relative_url'] == '3':
+                return {'code': 200, 'body': 'false'}
+            return created(sub_request)
+
+        batch = GraphBatch(RecordingGraph(answer))
+        for id in (1, 2, 3):
+            batch.delete(id)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            results = batch.execute()
+        ok_(results[0] is True and isinstance(results[1], FacebookException) and results[2] is False)
+        ok_(results[1].code == 100 and len(caught) == 1)
+
+    def test_failed_batch_call(self):
+        class FailingGraph(RecordingGraph):
+            def call_graph_api(self, **kwargs):
+                raise FacebookException(message="Service unavailable", code=2)
+
+        batch = GraphBatch(FailingGraph(created))
+        requests = [batch.delete(id) for id in range(3)]
+        ok_(all(isinstance(result, FacebookException) and result.code == 2 for result in batch.execute()))
+        ok_(all(request.exception for request in requests))
+
+    def test_invalid_batch_response(self):
+        class BodyGraph(RecordingGraph):
+            def call_graph_api(self, **kwargs):
+                return self.answer(kwargs['params']['batch'])
+
+        bodies = ['<html><body>502 Bad Gateway</body></html>', '[{"code": 200, "body": "true"}',
+                  '[{"code": 200, "body": "true"}]', '{"code": 200, "body": "true"}']
+        for body in bodies:
+            batch = GraphBatch(BodyGraph(lambda sub_requests: body))
+            requests = [batch.delete(id) for id in range(2)]
+            results = batch.execute()
+            ok_(all(isinstance(result, FacebookException) for result in results), body)
+            ok_(all(request.exception is request.result for request in requests))
+
+    def test_raw_kept_decoded(self):
+        def answer(sub_request):
+            if sub_request['method'] == 'GET':
+                return {'code': 200, 'body': json.dumps({'data': [{'id': 6000000000000, 'name': 'c'}]})}
+            return created(sub_request)
+
+        graph = RecordingGraph(answer)
+        batch = GraphBatch(graph, max_batch_size=1)
+        campaigns = batch.get(models.AdCampaign, 'act_1', 'adcampaigns')
+        batch.post(models.AdGroup, id='act_1', return_json=True, campaign_id=campaigns.ref('$.data.0.id'))
+        batch.execute()
+        ok_(isinstance(campaigns.result['data'][0], models.AdCampaign))
+        ok_(campaigns.raw == {'data': [{'id': 6000000000000, 'name': 'c'}]})
+        ok_(body_params(graph.batches[1][0])['campaign_id'] == '6000000000000')
+
+
+class FakeGraphBatchTest(unittest.TestCase):
+    """ Tests batch calls against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=2, creatives_per_account=2).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_create_with_references(self):
+        batch = self.pyfb.batch()
+        campaign = batch.post(models.AdCampaign, id='act_1', name=u'batched', campaign_status=1)
+        adgroup = batch.post(models.AdGroup, id='act_1', name=u'batched adgroup', campaign_id=campaign.ref())
+        missing = batch.get(models.AdGroup, '1234')
+        accounts = batch.get(models.AdAccount, 'act_1')
+        batch.execute()
+        ok_(isinstance(missing.result, FacebookException) and accounts.result['data'][0].account_id == 1)
+        campaign_id = campaign.result['data'][0].id
+        created = self.pyfb.get(models.AdGroup, str(adgroup.result['data'][0].id))['data'][0]
+        ok_(created.name == u'batched adgroup' and created.campaign_id == long(campaign_id))
+        ok_(self.server.graph.stats()['POST act_{id}/adgroups']['requests'] == 1)
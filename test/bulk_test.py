@@ -0,0 +1,83 @@
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.bulk import(
+    BulkDeleter,
+    BulkResult,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.utils import FacebookException
+
+TIER_ORDER = ['adgroups', 'adcreatives', 'adcampaigns']
+
+
+class BulkDeleteTest(unittest.TestCase):
+    """ Tests bulk deletes and archives against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=3, adgroups_per_campaign=30, creatives_per_account=5).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def assert_tier_order(self, results):
+        tiers = [TIER_ORDER.index(result.connection) for result in results]
+        ok_(tiers == sorted(tiers))
+
+    def test_delete_account(self):
+        deleter = BulkDeleter(self.pyfb)
+        listed = deleter.list_account('act_1')
+        ok_(listed.keys() == TIER_ORDER and [len(ids) for ids in listed.values()] == [90, 5, 3])
+
+        results = self.pyfb.bulk_delete(account_id='act_1', max_workers=4)
+        ok_(len(results) == 98 and all(result.success and result.exception is None for result in results))
+        self.assert_tier_order(results)
+        ok_(self.server.graph.stats()['POST /']['requests'] == 4)
+        ok_(all(not ids for ids in deleter.list_account('act_1').values()))
+
+    def test_delete_without_batches(self):
+        ids = BulkDeleter(self.pyfb).list_account('act_1')
+        ids['adgroups'] = ids['adgroups'][:5]
+        results = self.pyfb.bulk_delete(ids=ids, use_batch=False)
+        ok_(len(results) == 13 and all(result.success for result in results))
+        self.assert_tier_order(results)
+        ok_(self.server.graph.stats()['DELETE {id}']['requests'] == 13)
+
+    def test_delete_ids(self):
+        ids = [adgroup['id'] for adgroup in self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True,
+                                                         limit=3)['data']]
+        for use_batch in (True, False):
+            results = dict((result.id, result) for result in self.pyfb.bulk_delete(ids=ids + ['1234'],
+                                                                                  use_batch=use_batch))
+            ok_(all(results[id].success for id in ids) and results[ids[0]].connection is None)
+            ok_(not results['1234'].success and isinstance(results['1234'].exception, FacebookException))
+        self.assertRaises(Exception, self.pyfb.bulk_delete)
+
+    def test_archive(self):
+        results = self.pyfb.bulk_delete(account_id='act_1', archive=True)
+        ok_(len(results) == 98)
+        self.assert_tier_order(results)
+        ok_(all(result.success for result in results if result.connection == 'adgroups'))
+        unarchived = [result for result in results if result.connection != 'adgroups']
+        ok_(len(unarchived) == 8 and all(not result.success and isinstance(result.exception, ValueError)
+                                         for result in unarchived))
+        statuses = set(adgroup.adgroup_status for adgroup in self.pyfb.iterate(models.AdGroup, 'act_1', 'adgroups'))
+        ok_(statuses == set([u'ARCHIVED']))
+        ok_(len(BulkDeleter(self.pyfb).list_account('act_1')['adcampaigns']) == 3)
+
+    def test_archive_ids(self):
+        ids = [adgroup['id'] for adgroup in self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True,
+                                                         limit=3)['data']]
+        results = self.pyfb.bulk_delete(ids=ids, archive=True)
+        ok_(sorted(result.id for result in results) == sorted(ids))
+        ok_(all(not result.success and isinstance(result.exception, ValueError) for result in results))
+        ok_('POST {id}' not in self.server.graph.stats())
+
+    def test_bulk_result(self):
+        ok_('ok' in repr(BulkResult(1, 'adgroups', success=True)))
+        ok_('false' in repr(BulkResult(1, 'adgroups', response='false')))
@@ -0,0 +1,118 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.cache import(
+    cache_key,
+    written_endpoints,
+    DEFAULT_TTLS,
+    DiskCacheBackend,
+    MemoryCacheBackend,
+    ResponseCache,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+
+
+class CacheBackendTest(unittest.TestCase):
+    """ Tests the expiry, eviction and invalidation of cached responses. """
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def backends(self, max_bytes):
+        return [MemoryCacheBackend(max_bytes=max_bytes), DiskCacheBackend(os.path.join(self.tempdir, 'cache'), max_bytes=max_bytes)]
+
+    def test_cache_key(self):
+        ok_(cache_key('act_1', {'access_token': 'a', 'fields': 'id'}) == cache_key('act_1', {'fields': 'id', 'access_token': 'b'}))
+        ok_(cache_key('act_1', {'fields': 'id'}) != cache_key('act_1', {'fields': 'name'}))
+        ok_(cache_key('act_1', {'fields': u'n\xe9'}) != cache_key('act_2', {'fields': u'n\xe9'}))
+
+    def test_expiry(self):
+        for backend in self.backends(1000):
+            backend.set('fresh', 'body', time.time() + 60, set())
+            backend.set('stale', 'body', time.time() - 1, set())
+            ok_(backend.get('fresh') == 'body' and backend.get('stale') is None)
+            ok_(len(backend) == 1 and backend.bytes == 4)
+
+    def test_lru_eviction(self):
+        for backend in self.backends(10):
+            expires_at = time.time() + 60
+            backend.set('a', 'aaaa', expires_at, set())
+            time.sleep(0.01)
+            backend.set('b', 'bbbb', expires_at, set())
+            time.sleep(0.01)
+            ok_(backend.get('a') == 'aaaa')
+            backend.set('c', 'cccc', expires_at, set())
+            ok_(backend.get('b') is None and backend.get('a') == 'aaaa' and backend.get('c') == 'cccc')
+            ok_(backend.evictions == 1 and backend.bytes == 8)
+            backend.set('d', 'd' * 11, expires_at, set())
+            ok_(backend.get('d') is None and len(backend) == 2)
+
+    def test_invalidate(self):
+        for backend in self.backends(1000):
+            expires_at = time.time() + 60
+            backend.set('a', 'body', expires_at, set(['act_1', '5']))
+            backend.set('b', 'body', expires_at, set(['act_2']))
+            ok_(backend.invalidate('5') == 1 and backend.invalidate('5') == 0)
+            ok_(backend.get('a') is None and backend.get('b') == 'body' and backend.bytes == 4)
+
+    def test_written_endpoints(self):
+        ok_(written_endpoints('5/adgroups', {}) == ['5/adgroups'])
+        batch = '[{"method": "GET", "relative_url": "1"}, {"method": "DELETE", "relative_url": "2"},' \
+                ' {"method": "POST", "relative_url": "/act_3/adcampaigns?x=1"}]'
+        ok_(written_endpoints('', {'batch': batch}) == ['2', 'act_3/adcampaigns'])
+
+    def test_ttls_copied(self):
+        cache = ResponseCache()
+        cache.ttls[models.AdGroup] = 60
+        ok_(models.AdGroup not in DEFAULT_TTLS and ResponseCache().ttl_for(models.AdGroup) is None)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    """ Tests that cached responses are invalidated by writes, however they are sent. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=3, adgroups_per_campaign=1, creatives_per_account=1).start()
+        self.cache = ResponseCache(default_ttl=60)
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, response_cache=self.cache)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def campaigns(self):
+        return self.pyfb.get(models.AdCampaign, 'act_1', 'adcampaigns', fields=['id', 'name', 'campaign_status'])['data']
+
+    def test_hits(self):
+        ok_(len(self.campaigns()) == len(self.campaigns()) == 3)
+        ok_(self.server.graph.stats()['GET act_{id}/adcampaigns']['requests'] == 1)
+        ok_(self.cache.stats()['hits'] == 1 and self.cache.stats()['misses'] == 1)
+
+    def test_invalidated_by_post(self):
+        self.campaigns()
+        self.pyfb.post(models.AdCampaign, id='act_1', name=u'new campaign', campaign_status=1)
+        ok_(len(self.campaigns()) == 4 and self.cache.stats()['invalidations'] == 1)
+
+    def test_invalidated_by_batch(self):
+        self.campaigns()
+        batch = self.pyfb.batch()
+        batch.get(models.AdAccount, 'act_1')
+        batch.post(models.AdCampaign, id='act_1', name=u'batched campaign', campaign_status=1)
+        batch.execute()
+        ok_(u'batched campaign' in [campaign.name for campaign in self.campaigns()])
+
+    def test_invalidated_by_bulk_delete(self):
+        campaign = self.campaigns()[0]
+        ok_(self.pyfb.get(models.AdCampaign, str(campaign.id))['data'][0].campaign_status != 3)
+        results = self.pyfb.bulk_delete(ids=[campaign.id])
+        ok_(results[0].success)
+        ok_(self.pyfb.get(models.AdCampaign, str(campaign.id))['data'][0].campaign_status == 3)
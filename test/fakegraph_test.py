@@ -0,0 +1,59 @@
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.ratelimit import RequestScheduler
+from pyfacebook.utils import FacebookException
+
+
+class FakeGraphTest(unittest.TestCase):
+    """ Tests PyFacebook against the local fake Graph API, without calling Facebook. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=30, creatives_per_account=3).start()
+        self.pyfb = PyFacebook(app_id='1', app_secret='secret', token_text='fake-token', facebook_graph_url=self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_access_token(self):
+        ok_(self.pyfb.access_token.is_valid)
+        new_token = self.pyfb.exchange_access_token(current_token=self.pyfb.access_token, app_id='1', app_secret='secret')
+        ok_(new_token.text == 'long-fake-token')
+
+    def test_paging(self):
+        adgroups = list(self.pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=7))
+        ok_(len(adgroups) == 60)
+        ok_(len(set(adgroup.id for adgroup in adgroups)) == 60)
+        ok_(all(isinstance(adgroup, models.AdGroup) for adgroup in adgroups))
+        ok_(adgroups[0].updated_time > adgroups[-1].updated_time)
+
+    def test_post_and_delete(self):
+        campaign = self.pyfb.post(models.AdCampaign, id='act_1', name=u'new campaign', campaign_status=1)['data'][0]
+        newest = self.pyfb.get(models.AdCampaign, 'act_1', 'adcampaigns', limit=1)['data'][0]
+        ok_(newest.id == campaign.id and newest.name == u'new campaign')
+        ok_(self.pyfb.delete(campaign.id))
+        ok_(self.pyfb.get(models.AdCampaign, str(campaign.id))['data'][0].campaign_status == 3)
+        self.assertRaises(FacebookException, self.pyfb.get, models.AdGroup, '1234')
+
+    def test_batch(self):
+        adgroup_id = self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', limit=1)['data'][0].id
+        batch = self.pyfb.batch()
+        batch.get(models.AdAccount, 'act_1')
+        batch.delete(adgroup_id)
+        account, deleted = batch.execute()
+        ok_(account['data'][0].account_id == 1)
+        ok_(deleted is True)
+
+    def test_throttling(self):
+        self.server.stop()
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=30, throttle_rate=0.5, seed=1).start()
+        pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url,
+                          scheduler=RequestScheduler(backoff_base=0.001, max_retries=30))
+        ok_(len(list(pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=10))) == 60)
+        stats = self.server.graph.stats()['GET act_{id}/adgroups']
+        ok_(stats['throttled'] > 0 and stats['objects'] == 60)
@@ -0,0 +1,94 @@
+import time
+import threading
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.fanout import(
+    GetResult,
+    fan_out,
+)
+from pyfacebook.utils import FacebookException
+
+
+class FanOutTest(unittest.TestCase):
+    """ Tests running tasks on the bounded fan-out pool. """
+
+    def test_fan_out(self):
+        state = {'running': 0, 'most_running': 0}
+        lock = threading.Lock()
+
+        def task(n):
+            with lock:
+                state['running'] += 1
+                state['most_running'] = max(state['most_running'], state['running'])
+            time.sleep(0.01)
+            with lock:
+                state['running'] -= 1
+            return [n, -n]
+
+        results = list(fan_out([lambda n=n: task(n) for n in range(1, 11)], max_workers=3))
+        ok_(sorted(results) == sorted(range(1, 11) + range(-10, 0)))
+        ok_(state['most_running'] == 3)
+        ok_(list(fan_out([], max_workers=3)) == [])
+
+    def test_get_result(self):
+        ok_(GetResult(1, response={'data': []}).ok and 'ok' in repr(GetResult(1, response={})))
+        failed = GetResult(2, exception=FacebookException(message="Unknown id", code=100))
+        ok_(not failed.ok and 'Unknown id' in repr(failed))
+
+
+class GetManyTest(unittest.TestCase):
+    """ Tests get_many against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=3, adgroups_per_campaign=40, creatives_per_account=1).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        self.ids = [adgroup['id'] for adgroup in self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True,
+                                                               limit=200)['data']]
+        self.server.graph.reset_stats()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_multi_id_calls(self):
+        results = dict((result.id, result) for result in self.pyfb.get_many(models.AdGroup, self.ids + ['1234'],
+                                                                            fields=['id', 'name'], max_workers=2))
+        ok_(self.server.graph.stats()['GET /']['requests'] == 3)
+        ok_(len(results) == 121 and isinstance(results['1234'].exception, FacebookException))
+        for id in self.ids:
+            adgroup = results[id].response['data'][0]
+            ok_(isinstance(adgroup, models.AdGroup) and adgroup.id == long(id) and adgroup.name)
+            self.assertRaises(AttributeError, getattr, adgroup, 'campaign_id')
+
+    def test_return_json(self):
+        results = list(self.pyfb.get_many(models.AdGroup, self.ids[:5], return_json=True, fields=['name']))
+        ok_(sorted(result.response['data'][0]['id'] for result in results) == sorted(self.ids[:5]))
+
+    def test_single_id_calls(self):
+        results = list(self.pyfb.get_many(models.AdGroup, self.ids[:5], ids_per_call=1))
+        ok_(len(results) == 5 and all(result.ok for result in results))
+        ok_(self.server.graph.stats()['GET {id}']['requests'] == 5)
+
+    def test_connections(self):
+        results = list(self.pyfb.get_many(models.AdCampaign, ['act_1', 'act_2'], connection='adcampaigns'))
+        by_id = dict((result.id, result) for result in results)
+        ok_(len(by_id['act_1'].response['data']) == 3 and isinstance(by_id['act_2'].exception, FacebookException))
+
+    def test_failed_chunk(self):
+        pyfb = self.pyfb
+
+        class FailingMultiIdGraph(PyFacebook):
+            def call_graph_api(self, endpoint, params=None, **kwargs):
+                if 'ids' in (params or {}):
+                    raise FacebookException(message="An unknown error occurred", code=1)
+                return pyfb.call_graph_api(endpoint, params=params, **kwargs)
+
+        failing = FailingMultiIdGraph(token_text='fake-token', facebook_graph_url=self.server.url)
+        results = list(failing.get_many(models.AdGroup, self.ids[:3] + ['1234'], fields=['id']))
+        ok_(sorted(result.id for result in results if result.ok) == sorted(self.ids[:3]))
+        ok_([result.id for result in results if not result.ok] == ['1234'])
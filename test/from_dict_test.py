@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import models
+
+
+class FromDictTest(unittest.TestCase):
+    """ Tests that models built from decoded dicts match models built from JSON. """
+
+    def assert_same_fields(self, model, data):
+        from_dict = model.from_dict(dict(data))
+        from_json = model(from_json=json.dumps(data))
+        for field_def in model.FIELD_DEFS:
+            ok_(getattr(from_dict, field_def.title, None) == getattr(from_json, field_def.title, None),
+                field_def.title + ": " + repr(getattr(from_dict, field_def.title, None)) + " != " +
+                repr(getattr(from_json, field_def.title, None)))
+        return from_dict
+
+    def test_token(self):
+        token = self.assert_same_fields(models.Token, {
+            'text': 'CAAB123',
+            'app_id': u'123456',
+            'is_valid': True,
+            'application': u'pyfacebook',
+            'user_id': u'100000',
+            'issued_at': 1393632000,
+            'expires_at': 1398816000,
+            'scopes': [u'ads_management', u'read_insights'],
+        })
+        ok_(isinstance(token.text, unicode))
+        ok_(token.expires_at.year == 2014)
+
+    def test_ad_statistic(self):
+        self.assert_same_fields(models.AdStatistic, {
+            'id': u'6010000000000/stats/0/1393632000',
+            'account_id': 106929496119713,
+            'adcampaign_id': 6000000000000,
+            'adgroup_id': 6010000000000,
+            'impressions': 1000,
+            'clicks': 12,
+            'spent': 250,
+            'social_impressions': 10,
+            'social_clicks': 1,
+            'social_spent': 3,
+            'unique_impressions': 900,
+            'unique_clicks': 11,
+            'social_unique_impressions': 9,
+            'social_unique_clicks': 1,
+            'start_time': u'2014-03-01T00:00:00+0000',
+            'end_time': None,
+        })
+
+    def test_unknown_keys_ignored(self):
+        token = models.Token.from_dict({'app_id': u'123456', 'metadata': {'sso': u'ios'}})
+        ok_(token.app_id == u'123456')
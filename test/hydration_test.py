@@ -0,0 +1,84 @@
+import copy
+import decimal
+import datetime
+import unittest
+
+from dateutil import tz
+from nose.tools import ok_
+from pyfacebook import models
+from pyfacebook.hydration import(
+    decode_states,
+    encode_states,
+    ProcessHydrator,
+)
+from pyfacebook.projection import partial_model
+from pyfacebook.utils import json_to_objects
+
+
+class BidAdGroup(models.AdGroup):
+    """ An AdGroup with a field which can't be marshalled, so that its states are sent back pickled. """
+    FIELD_DEFS = models.AdGroup.FIELD_DEFS + (models.NewFieldDef(title='bid', allowed_types=[decimal.Decimal], choices=None),)
+
+BidAdGroup.FIELD_VALIDATORS['bid'] = BidAdGroup.FIELD_CONVERTERS['bid'] = lambda value: decimal.Decimal(str(value))
+
+
+def adgroup_dicts(count, **extra):
+    adgroups = []
+    for i in range(count):
+        adgroup = {u'id': 6000000000000 + i, u'name': u'adgroup ' + unicode(i), u'account_id': 106929496119713,
+                   u'campaign_id': 6010000000000 + i % 5, u'adgroup_status': u'ACTIVE', u'bid_type': u'CPM',
+                   u'bid_info': {u'IMPRESSIONS': 2}, u'creative_ids': [6020000000000 + i],
+                   u'created_time': u'2014-03-01T10:00:%02d-0800' % (i % 60),
+                   u'updated_time': u'2014-03-02T10:00:%02d+0000' % (i % 60)}
+        adgroup.update(extra)
+        adgroups.append(adgroup)
+    return adgroups
+
+
+class ProcessHydratorTest(unittest.TestCase):
+    """ Tests that models built on worker processes are the same as those built in-process. """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.hydrator = ProcessHydrator(processes=2, threshold=1, chunk_size=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.hydrator.close()
+
+    def assert_same_models(self, data, model):
+        expected = json_to_objects(copy.deepcopy(data), model)
+        hydrated = self.hydrator.hydrate(copy.deepcopy(data), model)
+        ok_([type(obj) for obj in hydrated] == [type(obj) for obj in expected])
+        ok_([obj.__getstate__() for obj in hydrated] == [obj.__getstate__() for obj in expected])
+        return hydrated
+
+    def test_full_models(self):
+        adgroups = self.assert_same_models(adgroup_dicts(10), models.AdGroup)
+        ok_(adgroups[0].created_time.utcoffset() == datetime.timedelta(hours=-8))
+        ok_(adgroups[0].updated_time.utcoffset() == datetime.timedelta(0))
+
+    def test_partial_models(self):
+        titles = set(['id', 'name', 'created_time'])
+        data = [dict((key, val) for key, val in obj.items() if key in titles) for obj in adgroup_dicts(10)]
+        adgroups = self.assert_same_models(data, partial_model(models.AdGroup, titles))
+        ok_(all(isinstance(adgroup, models.AdGroup) for adgroup in adgroups))
+
+    def test_pickle_fallback(self):
+        adgroups = self.assert_same_models(adgroup_dicts(7, bid=0.25), BidAdGroup)
+        ok_(adgroups[0].bid == decimal.Decimal('0.25') and adgroups[0].created_time.tzinfo is not None)
+
+    def test_dict_and_small_pages(self):
+        data = dict((str(obj['id']), obj) for obj in adgroup_dicts(5))
+        hydrated = self.hydrator.hydrate(copy.deepcopy(data), models.AdGroup)
+        ok_(sorted(hydrated) == sorted(data) and all(hydrated[key].id == data[key]['id'] for key in data))
+        ok_(self.hydrator.hydrate([], models.AdGroup) == [])
+
+    def test_encode_states(self):
+        states = [{'a': datetime.datetime(2014, 3, 1, 10, 0, 0, 5, tzinfo=tz.tzoffset(None, -28800)), 'b': 1},
+                  {'a': datetime.datetime(2014, 3, 1), 'b': None}]
+        encoded = encode_states(copy.deepcopy(states))
+        ok_(encoded[0] == ('a',) and decode_states(encoded) == states)
+        states.append({'a': object()})
+        encoded = encode_states(list(states))
+        ok_(encoded[0] is None and decode_states(encoded)[:2] == states[:2])
@@ -0,0 +1,134 @@
+import os
+import hashlib
+import tempfile
+import warnings
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import PyFacebook
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.images import(
+    ImageSource,
+    ImageUploader,
+    MemoryImageIndex,
+)
+from pyfacebook.store import SQLiteObjectStore
+
+TEST_IMAGE = os.path.join(os.path.dirname(__file__), 'test_image.png')
+
+
+class ImageSourceTest(unittest.TestCase):
+    """ Tests reading images to upload from their sources. """
+
+    def read(self, image):
+        reader = image.open()
+        try:
+            return reader.read()
+        finally:
+            reader.close()
+
+    def test_path(self):
+        with open(TEST_IMAGE, 'rb') as f:
+            content = f.read()
+        image = ImageSource(TEST_IMAGE)
+        ok_(image.name == 'test_image.png' and image.size == len(content))
+        ok_(self.read(image) == content and image.digest == hashlib.md5(content).hexdigest())
+
+    def test_missing_path(self):
+        self.assertRaises(IOError, ImageSource, TEST_IMAGE + '.missing')
+        self.assertRaises(IOError, ImageSource, 'not an image path', name='a.png')
+
+    def test_buffers(self):
+        images = [ImageSource(source, name='a.png') for source in (bytearray('image'), buffer('image'), memoryview('image'))]
+        images.append(ImageSource('image', name='a.png', is_path=False))
+        for image in images:
+            ok_(image.path is None and image.size == 5 and self.read(image) == 'image')
+        ok_(ImageSource('image', name='a.png', is_path=False).digest == hashlib.md5('image').hexdigest())
+        self.assertRaises(ValueError, ImageSource, bytearray('image'))
+
+    def test_open_file(self):
+        with open(TEST_IMAGE, 'rb') as f:
+            f.seek(10)
+            image = ImageSource(f)
+            ok_(image.name == 'test_image.png' and image.size == os.path.getsize(TEST_IMAGE) - 10)
+            ok_(self.read(image) == self.read(image) == open(TEST_IMAGE, 'rb').read()[10:])
+
+
+class ImageIndexTest(unittest.TestCase):
+    """ Tests the indexes of uploaded images. """
+
+    def test_indexes(self):
+        for index in (MemoryImageIndex(), SQLiteObjectStore()):
+            index.set_images('act_1', {'d1': {'hash': 'h1', 'url': 'u1'}, 'd2': {'hash': 'h2'}})
+            index.set_images('2', {'d1': {'hash': 'other', 'url': None}})
+            ok_(index.get_images('1', ['d1', 'd2', 'd3']) == {'d1': {'hash': 'h1', 'url': 'u1'}, 'd2': {'hash': 'h2', 'url': None}})
+            ok_(index.get_images('act_2', ['d1']) == {'d1': {'hash': 'other', 'url': None}})
+            index.drop_images('act_1', ['d1', 'd3'])
+            ok_(index.get_images('act_1', ['d1', 'd2']) == {'d2': {'hash': 'h2', 'url': None}})
+            ok_(index.get_images('act_2', ['d1']).keys() == ['d1'])
+
+
+class FailingLookups(object):
+    """ Sends uploads through a PyFacebook, but fails every GET. """
+
+    def __init__(self, pyfacebook):
+        self.pyfacebook = pyfacebook
+
+    def get(self, *args, **kwargs):
+        raise IOError("Lookup failed")
+
+    def post(self, *args, **kwargs):
+        return self.pyfacebook.post(*args, **kwargs)
+
+
+class ImageUploaderTest(unittest.TestCase):
+    """ Tests uploading images to the fake Graph API, with and without an index. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=1, adgroups_per_campaign=1, creatives_per_account=1).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        self.index = MemoryImageIndex()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def uploads(self):
+        return self.server.graph.stats().get('POST act_{id}/adimages', {}).get('requests', 0)
+
+    def test_dedupe(self):
+        uploader = ImageUploader(self.pyfb, index=self.index, images_per_request=1)
+        images = {'a.png': bytearray('same'), 'b.png': bytearray('same'), 'c.png': bytearray('other')}
+        result = uploader.upload('act_1', images)
+        ok_(sorted(result) == ['a.png', 'b.png', 'c.png'] and result['a.png'].hash == result['b.png'].hash)
+        ok_(self.uploads() == 2 and len(self.index) == 2)
+        result = uploader.upload('act_1', {'d.png': bytearray('other')})
+        ok_(self.uploads() == 2 and uploader.reused.keys() == ['d.png'] and result['d.png'].hash == hashlib.md5('other').hexdigest())
+
+    def test_unreadable_image(self):
+        fd, path = tempfile.mkstemp(suffix='.png')
+        os.write(fd, 'gone')
+        os.close(fd)
+        gone = ImageSource(path)
+        os.remove(path)
+        uploader = ImageUploader(self.pyfb, index=self.index)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            result = uploader.upload('act_1', [gone, ImageSource(bytearray('kept'), name='kept.png')])
+        ok_(result.keys() == ['kept.png'] and isinstance(uploader.errors[gone.name], IOError))
+
+    def test_verify_drops_missing(self):
+        digest = hashlib.md5('image').hexdigest()
+        self.index.set_images('act_1', {digest: {'hash': 'deleted-on-facebook', 'url': None}})
+        uploader = ImageUploader(self.pyfb, index=self.index, verify=True)
+        result = uploader.upload('act_1', {'a.png': bytearray('image')})
+        ok_(self.uploads() == 1 and not uploader.reused and result['a.png'].hash == digest)
+        ok_(self.index.get_images('act_1', [digest])[digest]['hash'] == digest)
+        result = uploader.upload('act_1', {'b.png': bytearray('image')})
+        ok_(self.uploads() == 1 and uploader.reused.keys() == ['b.png'])
+
+    def test_failed_verify_uploads_again(self):
+        digest = hashlib.md5('image').hexdigest()
+        self.index.set_images('act_1', {digest: {'hash': digest, 'url': None}})
+        uploader = ImageUploader(FailingLookups(self.pyfb), index=self.index, verify=True)
+        result = uploader.upload('act_1', {'a.png': bytearray('image')})
+        ok_(self.uploads() == 1 and not uploader.reused and not uploader.errors and result['a.png'].hash == digest)
@@ -0,0 +1,62 @@
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.instrumentation import(
+    Instrumentation,
+    MetricsCollector,
+)
+
+
+class InstrumentationTest(unittest.TestCase):
+    """ Tests the hooks PyFacebook reports its calls to, against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=10, creatives_per_account=1).start()
+        self.instrumentation = Instrumentation()
+        self.events = []
+        self.instrumentation.add_hook('after_hydrate', self.events.append)
+        self.metrics = MetricsCollector().attach(self.instrumentation)
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, instrumentation=self.instrumentation)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def hydrated(self, model=models.AdGroup):
+        return sum(event['objects'] for event in self.events if event['model'].__name__ == model.__name__)
+
+    def test_response_metrics(self):
+        self.pyfb.get(models.AdAccount, 'act_1')
+        self.assertRaises(Exception, self.pyfb.get, models.AdGroup, '1234')
+        metrics = self.metrics.to_dict()
+        ok_(metrics['GET act_{id}']['requests'] == 1 and metrics['GET act_{id}']['objects_hydrated'] == {'AdAccount': 1})
+        ok_(sum(m['status_codes'].get(404, 0) + m['status_codes'].get(400, 0) for m in metrics.values()) == 1)
+
+    def test_get_and_iterate(self):
+        ok_(len(self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', limit=5)['data']) == 5)
+        ok_(len(list(self.pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=7))) == 20)
+        ok_(self.hydrated() == 25)
+        ok_(all(event['endpoint'] == 'act_1/adgroups' and event['http_method'] == 'GET' for event in self.events))
+        ok_(self.metrics.to_dict()['GET act_{id}/adgroups']['objects_hydrated'] == {'AdGroup': 25})
+
+    def test_stream(self):
+        ok_(len(list(self.pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=7, stream=True))) == 20)
+        ok_(self.hydrated() == 20 and all(event['hydrate_time'] >= 0 for event in self.events))
+
+    def test_get_many(self):
+        ids = [adgroup['id'] for adgroup in self.pyfb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True, limit=6)['data']]
+        results = list(self.pyfb.get_many(models.AdGroup, ids, ids_per_call=4))
+        ok_(len(results) == 6 and all(result.response['data'][0].id == result.id for result in results))
+        ok_(self.hydrated() == 6)
+
+    def test_batch(self):
+        batch = self.pyfb.batch()
+        batch.get(models.AdAccount, 'act_1')
+        batch.get(models.AdGroup, 'act_1', 'adgroups', limit=3)
+        batch.execute()
+        ok_(self.hydrated() == 3 and self.hydrated(models.AdAccount) == 1)
+        ok_(set(event['endpoint'] for event in self.events) == set(['act_1', 'act_1/adgroups']))
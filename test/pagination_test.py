@@ -0,0 +1,62 @@
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.cache import cache_key
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.pagination import(
+    iterate_pages,
+    next_page_request,
+)
+
+
+class NextPageRequestTest(unittest.TestCase):
+    """ Tests turning paging urls into calls. """
+
+    def test_endpoint(self):
+        next_url = 'https://graph.facebook.com/v2.0/act_1/adgroups?limit=25&after=abc'
+        ok_(next_page_request(next_url) == ('v2.0/act_1/adgroups', [('limit', '25'), ('after', 'abc')]))
+        ok_(next_page_request(next_url, 'https://graph.facebook.com/v2.0')[0] == 'act_1/adgroups')
+        ok_(next_page_request(next_url, 'https://graph.facebook.com/v2.0/')[0] == 'act_1/adgroups')
+        ok_(next_page_request(next_url, 'http://proxy.example.com/v2.0')[0] == 'act_1/adgroups')
+        ok_(next_page_request(next_url, 'https://graph.facebook.com')[0] == 'v2.0/act_1/adgroups')
+        ok_(next_page_request(next_url, 'https://graph.facebook.com/v2')[0] == 'v2.0/act_1/adgroups')
+
+    def test_repeated_params(self):
+        endpoint, params = next_page_request('https://graph.facebook.com/search?type=adgeolocation&location_types=city'
+                                             '&location_types=region&q=&after=MjQZD')
+        ok_(params == [('type', 'adgeolocation'), ('location_types', 'city'), ('location_types', 'region'), ('q', ''),
+                       ('after', 'MjQZD')])
+        ok_(cache_key(endpoint, params) != cache_key(endpoint, dict(params)))
+        ok_(cache_key('act_1', [('b', '2'), ('a', '1'), ('access_token', 'x')]) == cache_key('act_1', {'a': '1', 'b': '2'}))
+
+    def test_iterate_pages(self):
+        pages = {'2': {'data': [3, 4], 'paging': {'next': '3'}}, '3': {'data': [5], 'paging': {}}}
+        first_page = {'data': [1, 2], 'paging': {'next': '2'}}
+        for prefetch in (True, False):
+            ok_([page['data'] for page in iterate_pages(first_page, pages.get, prefetch=prefetch)] == [[1, 2], [3, 4], [5]])
+            ok_(len(list(iterate_pages(first_page, pages.get, max_pages=2, prefetch=prefetch))) == 2)
+
+
+class PagingCallTest(unittest.TestCase):
+    """ Tests calls made with the params of paging urls, against the fake Graph API. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=1, adgroups_per_campaign=10, creatives_per_account=1).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_pair_params(self):
+        page = self.pyfb.call_graph_api('act_1/adgroups', params=[('limit', '3'), ('fields', '["id"]')])
+        ok_(len(page['data']) == 3 and page['data'][0].keys() == ['id'])
+        endpoint, params = next_page_request(page['paging']['next'], self.pyfb.facebook_graph_url)
+        ok_(endpoint == 'act_1/adgroups')
+        ok_(len(self.pyfb.call_graph_api(endpoint, params=params)['data']) == 3)
+
+    def test_iterate(self):
+        ok_(len(list(self.pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=3, fields=['id', 'name']))) == 10)
@@ -0,0 +1,73 @@
+import pickle
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.projection import(
+    PRESETS,
+    field_name,
+    field_specs,
+    partial_model,
+    project,
+    register_preset,
+    split_fields,
+)
+from pyfacebook.utils import request_template
+
+
+class ProjectionTest(unittest.TestCase):
+    """ Tests field selections and the partial models they are built as. """
+
+    def test_field_specs(self):
+        ok_(split_fields('id, targeting{countries,cities{key}},name') == ['id', 'targeting{countries,cities{key}}', 'name'])
+        ok_(split_fields('insights.date_preset(last_7_days){spend},') == ['insights.date_preset(last_7_days){spend}'])
+        ok_(field_specs(models.AdGroup, 'status') == PRESETS[models.AdGroup]['status'])
+        ok_(field_specs(models.AdGroup, ['id', {'targeting': ['countries', {'cities': 'key'}]}]) ==
+            ['id', 'targeting{countries,cities{key}}'])
+        ok_(field_name('targeting{countries}') == 'targeting' and field_name('insights.date_preset(x)') == 'insights')
+        ok_(field_name(' name') == 'name')
+
+    def test_partial_model(self):
+        partial = partial_model(models.AdGroup, set(['id', 'name', 'unknown']))
+        ok_(issubclass(partial, models.AdGroup) and partial.PARTIAL_OF is models.AdGroup)
+        ok_(partial.__name__ == 'AdGroup' and [f.title for f in partial.FIELD_DEFS] == ['id', 'name'])
+        ok_(partial_model(models.AdGroup, set(['name', 'id'])) is partial)
+        ok_(partial_model(models.AdGroup, set(f.title for f in models.AdGroup.FIELD_DEFS)) is models.AdGroup)
+        ok_(partial_model(models.AdStatistic, set(['id'])) is models.AdStatistic)
+
+        adgroup = partial(id=1L, name=u'adgroup', campaign_id=2L)
+        ok_(adgroup.__getstate__() == {'id': 1L, 'name': u'adgroup'} and isinstance(adgroup, models.AdGroup))
+        self.assertRaises(ValueError, partial, name=1)
+        loaded = pickle.loads(pickle.dumps(adgroup, pickle.HIGHEST_PROTOCOL))
+        ok_(type(loaded) is partial and loaded.__getstate__() == adgroup.__getstate__())
+
+    def test_project(self):
+        ok_(project(models.AdGroup, None) == (request_template(models.AdGroup).fields_param, models.AdGroup))
+        fields_param, hydrate_as = project(models.AdCampaign, 'budget')
+        ok_(fields_param == ','.join(PRESETS[models.AdCampaign]['budget']))
+        ok_(set(f.title for f in hydrate_as.FIELD_DEFS) == set(PRESETS[models.AdCampaign]['budget']))
+        ok_(project(models.AdCampaign, 'budget') is project(models.AdCampaign, 'budget'))
+        ok_(project(models.AdGroup, [{'targeting': ['countries']}])[0] == 'targeting{countries}')
+
+        budget = PRESETS[models.AdCampaign]['budget']
+        register_preset(models.AdCampaign, 'budget', ['id', 'daily_budget'])
+        try:
+            ok_(project(models.AdCampaign, 'budget')[0] == 'id,daily_budget')
+        finally:
+            register_preset(models.AdCampaign, 'budget', budget)
+
+    def test_get(self):
+        with FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=5, creatives_per_account=1) as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url)
+            adgroups = pyfb.get(models.AdGroup, 'act_1', 'adgroups', fields='minimal')['data']
+            ok_(len(adgroups) == 10 and all(set(a.__getstate__()) == set(['id', 'name']) for a in adgroups))
+            ok_(type(adgroups[0]).PARTIAL_OF is models.AdGroup)
+
+            raw = pyfb.get(models.AdGroup, 'act_1', 'adgroups', return_json=True, fields='id,adgroup_status')['data']
+            ok_(set(raw[0]) == set(['id', 'adgroup_status']))
+            full = pyfb.get(models.AdGroup, str(raw[0]['id']))['data'][0]
+            ok_(type(full) is models.AdGroup and full.campaign_id)
@@ -0,0 +1,127 @@
+import errno
+import socket
+import unittest
+
+from nose.tools import ok_
+from requests.exceptions import ConnectionError, Timeout
+from requests.packages.urllib3.exceptions import MaxRetryError
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.ratelimit import(
+    RequestScheduler,
+    TokenBucket,
+    request_not_sent,
+)
+from pyfacebook.utils import FacebookException
+
+
+class FakeClock(object):
+    """ A clock which only moves when slept on. """
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def connection_error(reason):
+    return ConnectionError(MaxRetryError(None, '/act_1', reason=reason))
+
+
+class TokenBucketTest(unittest.TestCase):
+    """ Tests the pacing of TokenBucket. """
+
+    def test_burst_then_pace(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, capacity=5, clock=clock.time, sleep=clock.sleep)
+        for _ in range(5):
+            ok_(bucket.acquire() == 0)
+        for _ in range(10):
+            bucket.acquire()
+        ok_(abs(clock.now - 1.0) < 1e-9)
+        ok_(all(abs(wait - 0.1) < 1e-9 for wait in clock.slept))
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, capacity=2, clock=clock.time, sleep=clock.sleep)
+        bucket.acquire(2)
+        clock.now += 10
+        ok_(bucket.acquire(2) == 0)
+        ok_(bucket.acquire() == 0.5)
+
+    def test_set_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, capacity=1, clock=clock.time, sleep=clock.sleep)
+        bucket.acquire()
+        bucket.set_rate(1)
+        ok_(bucket.acquire() == 1.0)
+
+
+class RequestSchedulerTest(unittest.TestCase):
+    """ Tests the backoff and retry decisions of RequestScheduler. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RequestScheduler(max_retries=3, backoff_base=1.0, backoff_max=4.0,
+                                          clock=self.clock.time, sleep=self.clock.sleep)
+
+    def test_backoff(self):
+        for attempt in range(1, 8):
+            delay = self.scheduler.backoff(attempt)
+            ok_(0 <= delay <= min(4.0, 2 ** (attempt - 1)))
+        ok_(self.scheduler.stats()['retries'] == 7)
+        ok_(abs(self.scheduler.stats()['backoff_time'] - sum(self.clock.slept)) < 1e-9)
+
+    def test_account_pacing(self):
+        scheduler = RequestScheduler(account_rate=2, burst=1, clock=self.clock.time, sleep=self.clock.sleep)
+        scheduler.wait('act_1/adgroups')
+        ok_(scheduler.wait('act_2/adgroups') == 0)
+        ok_(scheduler.wait('act_1/adcampaigns') == 0.5)
+
+    def test_retry_get(self):
+        should_retry = self.scheduler.should_retry
+        ok_(should_retry(0, exception=FacebookException(message='throttled', code=17)))
+        ok_(should_retry(0, exception=FacebookException(message='unknown', code=1)))
+        ok_(should_retry(0, status_code=503))
+        ok_(should_retry(0, exception=Timeout()))
+        ok_(should_retry(0, exception=connection_error(socket.error(errno.ECONNRESET, 'reset'))))
+        ok_(not should_retry(0, exception=FacebookException(message='invalid', code=100)))
+        ok_(not should_retry(0, status_code=404))
+        ok_(not should_retry(3, exception=FacebookException(message='throttled', code=17)))
+
+    def test_retry_post(self):
+        for http_method in ('POST', 'DELETE'):
+            def should_retry(**kwargs):
+                return self.scheduler.should_retry(0, http_method=http_method, **kwargs)
+            ok_(should_retry(exception=FacebookException(message='throttled', code=613)))
+            ok_(should_retry(exception=connection_error(socket.error(errno.ECONNREFUSED, 'refused'))))
+            ok_(should_retry(exception=connection_error(socket.gaierror(-2, 'Name or service not known'))))
+            ok_(not should_retry(exception=FacebookException(message='unknown', code=1)))
+            ok_(not should_retry(exception=FacebookException(message='service', code=2)))
+            ok_(not should_retry(status_code=500))
+            ok_(not should_retry(exception=Timeout()))
+            ok_(not should_retry(exception=connection_error(socket.error(errno.ECONNRESET, 'reset'))))
+
+    def test_request_not_sent(self):
+        ok_(request_not_sent(ConnectionError(socket.error(errno.ECONNREFUSED, 'refused'))))
+        ok_(not request_not_sent(ConnectionError()))
+        ok_(not request_not_sent(Timeout(socket.error(errno.ECONNREFUSED, 'refused'))))
+
+    def test_post_not_retried_after_server_error(self):
+        with FakeGraphServer() as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url,
+                              scheduler=RequestScheduler(backoff_base=0.001))
+            server.graph.error_rate = 1.0
+            self.assertRaises(Exception, pyfb.post, models.AdCampaign, id='act_1', name=u'campaign')
+            ok_(server.graph.stats()['POST act_{id}/adcampaigns']['requests'] == 1)
+            self.assertRaises(Exception, pyfb.get, models.AdAccount, 'act_1')
+            ok_(server.graph.stats()['GET act_{id}']['requests'] == 6)
@@ -0,0 +1,56 @@
+import unittest
+
+import requests
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.session import GraphSession
+
+
+class GraphSessionTest(unittest.TestCase):
+    """ Tests that Graph calls reuse the connections of the pooled session. """
+
+    def setUp(self):
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=2, creatives_per_account=2).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def __get_accounts(self, session, calls=5):
+        pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, session=session)
+        for _ in range(calls):
+            ok_(pyfb.get(models.AdAccount, 'act_1')['data'][0].account_id == 1)
+        return pyfb
+
+    def test_keep_alive(self):
+        # PyFacebook validates its token when it is made, so there is one more request than the gets
+        pyfb = self.__get_accounts(None)
+        ok_(pyfb.session.stats() == {'requests': 6, 'connections_opened': 1, 'connections_reused': 5})
+        pyfb.session.close()
+
+    def test_no_keep_alive(self):
+        session = GraphSession(keep_alive=False)
+        self.__get_accounts(session)
+        ok_(session.session.headers['Connection'] == 'close')
+        ok_(session.stats() == {'requests': 6, 'connections_opened': 6, 'connections_reused': 0})
+
+    def test_given_session(self):
+        sent = []
+        session = requests.Session()
+        session.hooks['response'].append(lambda response, *args, **kwargs: sent.append(response.request.method))
+        self.__get_accounts(GraphSession(session=session), calls=2)
+        ok_(sent == ['GET'] * 3)
+
+    def test_default_timeout(self):
+        class RecordingSession(requests.Session):
+            def request(self, method, url, **kwargs):
+                self.timeouts = getattr(self, 'timeouts', []) + [kwargs.get('timeout')]
+                return super(RecordingSession, self).request(method, url, **kwargs)
+
+        session = GraphSession(timeout=7.5, session=RecordingSession())
+        session.get(self.server.url + '/act_1', params={'access_token': 'fake-token'})
+        session.get(self.server.url + '/act_1', params={'access_token': 'fake-token'}, timeout=1)
+        ok_(session.session.timeouts == [7.5, 1])
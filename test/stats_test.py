@@ -0,0 +1,87 @@
+import math
+import unittest
+
+import numpy
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.stats import(
+    AdStatisticColumns,
+    ModelColumns,
+    ratio,
+    to_columns,
+)
+
+ROWS = [
+    {'id': u'1/stats', 'adcampaign_id': 10, 'adgroup_id': 1, 'impressions': 1000, 'clicks': 10, 'spent': 50,
+     'start_time': 1393632000, 'end_time': '2014-03-02T00:00:00+0100'},
+    {'id': u'2/stats', 'adcampaign_id': 10, 'adgroup_id': 2, 'impressions': 3000, 'clicks': 0, 'spent': 0,
+     'start_time': None},
+    {'id': u'3/stats', 'adcampaign_id': 20, 'adgroup_id': 3, 'impressions': 0, 'clicks': None, 'spent': 0},
+]
+
+
+class ModelColumnsTest(unittest.TestCase):
+    """ Tests building and aggregating columnar results. """
+
+    def test_columns(self):
+        stats = to_columns(ROWS, models.AdStatistic)
+        ok_(isinstance(stats, AdStatisticColumns) and len(stats) == 3)
+        ok_(set(stats.columns) == set(f.title for f in models.AdStatistic.FIELD_DEFS))
+        ok_(stats['impressions'].dtype == numpy.int64 and stats['id'].dtype == object)
+        ok_(list(stats['clicks']) == [10, 0, 0] and list(stats['social_clicks']) == [0, 0, 0])
+        ok_(stats['start_time'][0] == numpy.datetime64('2014-03-01T00:00:00'))
+        ok_(stats['end_time'][0] == numpy.datetime64('2014-03-01T23:00:00'))
+        ok_(numpy.isnat(stats['start_time'][1]) and numpy.isnat(stats['end_time'][2]))
+        ok_(stats.sum('impressions') == 4000 and stats.mean('spent') == 50 / 3.0)
+
+    def test_rows(self):
+        stats = to_columns(dict((row['id'], row) for row in ROWS[:1]), models.AdStatistic)
+        row = stats[-1]
+        ok_(row.impressions == 1000 and isinstance(row.impressions, (int, long)) and row.id == u'1/stats')
+        ok_(row.to_dict()['spent'] == 50)
+        self.assertRaises(AttributeError, getattr, row, 'unknown')
+        self.assertRaises(IndexError, stats.__getitem__, 1)
+        ok_([r.adgroup_id for r in to_columns(ROWS, models.AdStatistic)] == [1, 2, 3])
+
+    def test_derived_metrics(self):
+        stats = AdStatisticColumns(ROWS)
+        ctr = stats.ctr()
+        ok_(ctr[0] == 0.01 and ctr[1] == 0 and math.isnan(ctr[2]))
+        ok_(stats.cpc()[0] == 5 and math.isnan(stats.cpc()[1]))
+        ok_(stats.cpm()[1] == 0 and math.isnan(stats.cpm()[2]))
+        ok_(list(ratio([1, 1], [2, 0]))[0] == 0.5)
+
+    def test_group_by(self):
+        stats = AdStatisticColumns(ROWS)
+        grouped = stats.group_by('adcampaign_id')
+        ok_(list(grouped['adcampaign_id']) == [10, 20] and list(grouped['count']) == [2, 1])
+        ok_(list(grouped['impressions']) == [4000, 0] and grouped['impressions'].dtype == numpy.int64)
+        ok_('adgroup_id' not in grouped and 'account_id' not in grouped)
+        mean = stats.group_by('adcampaign_id', fields=['impressions'], how='mean')
+        ok_(list(mean['impressions']) == [2000, 0] and set(mean) == set(['adcampaign_id', 'count', 'impressions']))
+        self.assertRaises(ValueError, stats.group_by, 'adcampaign_id', how='max')
+
+    def test_other_models(self):
+        adgroups = to_columns([{'id': 1, 'name': u'adgroup'}], models.AdGroup)
+        ok_(type(adgroups) is ModelColumns and adgroups['id'].dtype == numpy.int64 and adgroups[0].name == u'adgroup')
+        ok_(numpy.isnat(adgroups['updated_time'][0]))
+
+
+class ColumnarGetTest(unittest.TestCase):
+    """ Tests columnar GETs against the fake Graph API. """
+
+    def test_get(self):
+        with FakeGraphServer(campaigns_per_account=3, adgroups_per_campaign=20, creatives_per_account=1) as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url)
+            columns = pyfb.get(models.AdStatistic, 'act_1', 'adgroupstats', columnar=True, limit=100)['data']
+            hydrated = pyfb.get(models.AdStatistic, 'act_1', 'adgroupstats', limit=100)['data']
+            ok_(len(columns) == len(hydrated) == 60)
+            for field in ('impressions', 'clicks', 'spent', 'unique_clicks'):
+                ok_(columns.sum(field) == sum(getattr(stat, field) for stat in hydrated))
+            ok_(len(columns.group_by('adcampaign_id')['count']) == 3)
+            self.assertRaises(ValueError, pyfb.get, models.AdStatistic, 'act_1', 'adgroupstats', columnar=True,
+                              stream=True)
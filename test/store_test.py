@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.store import(
+    SQLiteObjectStore,
+    model_for_connection,
+    normalize_account_id,
+)
+from pyfacebook.sync import IncrementalSync
+
+
+class SQLiteObjectStoreTest(unittest.TestCase):
+    """ Tests storing and querying fetched objects in SQLite. """
+
+    @classmethod
+    def setUpClass(cls):
+        with FakeGraphServer(accounts=2, campaigns_per_account=2, adgroups_per_campaign=5, creatives_per_account=1) as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url)
+            cls.adgroups = pyfb.get(models.AdGroup, 'act_1', 'adgroups', limit=100)['data']
+            cls.adgroup_dicts = pyfb.get(models.AdGroup, 'act_2', 'adgroups', return_json=True, limit=100)['data']
+            cls.campaigns = pyfb.get(models.AdCampaign, 'act_1', 'adcampaigns')['data']
+            cls.stats = pyfb.get(models.AdStatistic, 'act_1', 'adgroupstats', limit=3)['data']
+
+    def setUp(self):
+        self.store = SQLiteObjectStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_save_and_query(self):
+        ok_(self.store.save(self.adgroups) == 10 and self.store.save(self.campaigns) == 2)
+        ok_(self.store.save([]) == 0 and self.store.count() == 12 and self.store.count(models.AdGroup) == 10)
+
+        campaign_id = self.campaigns[0].id
+        found = self.store.query(models.AdGroup, campaign_id=campaign_id)
+        expected = sorted(a.__getstate__() for a in self.adgroups if a.campaign_id == campaign_id)
+        ok_(len(found) == 5 and sorted(a.__getstate__() for a in found) == expected)
+        ok_(len(self.store.query(models.AdGroup, account_id='act_1', status=[u'ACTIVE', u'DELETED'])) ==
+            len([a for a in self.adgroups if a.adgroup_status in (u'ACTIVE', u'DELETED')]))
+        ok_(self.store.query(models.AdGroup, account_id=2) == [])
+
+        stored = self.store.get(models.AdGroup, self.adgroups[0].id)
+        ok_(isinstance(stored, models.AdGroup) and stored.__getstate__() == self.adgroups[0].__getstate__())
+        ok_(self.store.get(models.AdGroup, 1234) is None)
+
+        ok_(self.store.delete(models.AdGroup, [a.id for a in self.adgroups[:3]]) == 3)
+        ok_(self.store.count(models.AdGroup) == 7)
+
+    def test_bodies(self):
+        self.store.save(self.adgroup_dicts, model=models.AdGroup)
+        hydrated = self.store.query(models.AdGroup, account_id='act_2')
+        ok_(len(hydrated) == 10 and isinstance(hydrated[0], models.AdGroup))
+        as_json = self.store.query(models.AdGroup, account_id='2', return_json=True)
+        ok_(sorted(as_json) == sorted(self.adgroup_dicts))
+
+        self.store.save(self.stats, account_id='act_1')
+        stats = self.store.query(models.AdStatistic, account_id='act_1')
+        ok_(sorted(s.impressions for s in stats) == sorted(s.impressions for s in self.stats))
+
+    def test_persistence(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'objects.db')
+            store = SQLiteObjectStore(path)
+            store.save(self.campaigns)
+            store.set_state('act_1', 'adcampaigns', {'watermark': 1})
+            store.close()
+
+            store = SQLiteObjectStore(path)
+            ok_([c.id for c in store.query(models.AdCampaign)] == sorted(c.id for c in self.campaigns))
+            ok_(store.get_state('1', 'adcampaigns') == {'watermark': 1})
+            store.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_sync_store(self):
+        with FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=5, creatives_per_account=1) as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url)
+            result = IncrementalSync(pyfb, store=self.store).sync_account('act_1')
+            ok_(result['adgroups']['full'] and self.store.count(models.AdGroup) == 10)
+            ok_(len(self.store.get_objects('act_1', 'adcampaigns')) == 2)
+            ok_(self.store.get_state('act_1', 'adgroups')['watermark'] == result['adgroups']['watermark'])
+
+            self.store.replace('act_1', 'adgroups', self.adgroup_dicts[:1])
+            ok_(self.store.count(models.AdGroup) == 1)
+
+    def test_helpers(self):
+        ok_(normalize_account_id('act_123') == '123' and normalize_account_id(123) == '123')
+        ok_(normalize_account_id(None) is None)
+        ok_(model_for_connection('adgroups') is models.AdGroup and model_for_connection('adcampaigns') is models.AdCampaign)
+        self.assertRaises(ValueError, model_for_connection, 'unknown')
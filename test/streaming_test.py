@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.ratelimit import RequestScheduler
+from pyfacebook.streaming import StreamingResponse
+from pyfacebook.utils import FacebookException
+
+
+class FakeResponse(object):
+    """ A response whose body is read in the given chunks. """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size):
+        return iter(self.chunks)
+
+
+def split_at(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class StreamingResponseTest(unittest.TestCase):
+    """ Tests the incremental parsing of streamed Graph API responses. """
+
+    def parse(self, body, size=None):
+        response = StreamingResponse(FakeResponse(split_at(body, size or len(body))))
+        response.check_error()
+        return list(response), response.meta
+
+    def test_data(self):
+        body = json.dumps({'data': [{'id': 1}, {'id': 2, 'adgroup': {'id': 3, 'tags': [1, {'a': None}]}}],
+                           'paging': {'next': 'http://next'}})
+        objects, meta = self.parse(body)
+        ok_(objects == [{'id': 1}, {'id': 2, 'adgroup': {'id': 3, 'tags': [1, {'a': None}]}}])
+        ok_(meta == {'paging': {'next': 'http://next'}})
+
+    def test_dict_data_and_images(self):
+        objects, meta = self.parse('{"data": {"id": 1, "nested": {"a": [1]}}, "summary": 2}')
+        ok_(objects == [{'id': 1, 'nested': {'a': [1]}}] and meta == {'summary': 2})
+        objects, meta = self.parse('{"images": {"a.png": {"hash": "1"}, "b.png": {"hash": "2"}}}')
+        ok_(objects == [{'hash': '1'}, {'hash': '2'}] and meta == {})
+
+    def test_single_object(self):
+        objects, meta = self.parse('{"id": "1", "name": "x"}')
+        ok_(objects == [{'id': '1', 'name': 'x'}] and meta == {})
+        ok_(self.parse('{}') == ([{}], {}))
+
+    def test_chunk_boundaries(self):
+        expected = [{'name': u'quote " backslash \\ é ☃', 'n': 12345}, {'name': u'café', 'n': -0.5}]
+        body = '{"data": [{"name": "quote \\" backslash \\\\ \\u00e9 \xe2\x98\x83", "n": 12345}, ' \
+               '{"name": "caf\xc3\xa9", "n": -0.5}], "paging": {"cursors": {"after": "\\u0041"}}}'
+        for size in range(1, len(body) + 1):
+            objects, meta = self.parse(body, size)
+            ok_(objects == expected, size)
+            ok_(meta == {'paging': {'cursors': {'after': u'A'}}}, size)
+
+    def test_error(self):
+        body = json.dumps({'error': {'message': 'Calls to this api have exceeded the rate limit.', 'code': 17}})
+        for size in (1, 7, len(body)):
+            response = StreamingResponse(FakeResponse(split_at(body, size)))
+            try:
+                response.check_error()
+                ok_(False)
+            except FacebookException as e:
+                ok_(e.code == 17)
+
+    def test_late_error(self):
+        response = StreamingResponse(FakeResponse(['{"data": [{"id": 1}], "error": {"message": "x", "code": 1}}']))
+        response.check_error()
+        objects = iter(response)
+        ok_(next(objects) == {'id': 1})
+        self.assertRaises(FacebookException, next, objects)
+
+    def test_single_use(self):
+        response = StreamingResponse(FakeResponse(['{"data": []}']))
+        ok_(list(response) == [])
+        self.assertRaises(ValueError, list, response)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, self.parse, '[1, 2]')
+        self.assertRaises(ValueError, self.parse, '{"data": [1]} x')
+
+    def test_throttled_stream_is_retried(self):
+        with FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=30, seed=1) as server:
+            pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=server.url,
+                              scheduler=RequestScheduler(backoff_base=0.001, max_retries=30))
+            server.graph.throttle_rate = 0.5
+            adgroups = list(pyfb.iterate(models.AdGroup, 'act_1', 'adgroups', limit=10, stream=True))
+            ok_(len(adgroups) == 60)
+            ok_(server.graph.stats()['GET act_{id}/adgroups']['throttled'] > 0)
@@ -0,0 +1,105 @@
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.sync import(
+    IncrementalSync,
+    MemorySyncStore,
+    to_timestamp,
+)
+
+
+class FakeClock(object):
+    """ A clock which only moves when told to. """
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class IncrementalSyncTest(unittest.TestCase):
+    """ Tests incremental syncs against the fake Graph API. """
+
+    def setUp(self):
+        self.clock = FakeClock(1393632000)
+        self.server = FakeGraphServer(campaigns_per_account=2, adgroups_per_campaign=30, creatives_per_account=1,
+                                      clock=self.clock.time).start()
+        self.pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        self.syncer = self.pyfb.incremental_sync(overlap=0)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def adgroup_ids(self):
+        return sorted(str(obj['id']) for obj in self.syncer.store.get_objects('act_1', 'adgroups'))
+
+    def test_full_then_incremental(self):
+        result = self.syncer.sync('act_1', 'adgroups', models.AdGroup, limit=25)
+        ok_(result == {'full': True, 'pages': 3, 'fetched': 60, 'changed': 60, 'watermark': 1393631940})
+        ids = self.adgroup_ids()
+        ok_(len(ids) == 60)
+
+        self.server.graph.reset_stats()
+        result = self.syncer.sync('act_1', 'adgroups', models.AdGroup, limit=25)
+        ok_(result == {'full': False, 'pages': 1, 'fetched': 0, 'changed': 0, 'watermark': 1393631940})
+
+        self.clock.now += 120
+        self.pyfb.call_graph_api(ids[5], http_method='POST', params={'name': u'renamed'})
+        self.pyfb.delete(ids[6])
+        result = self.syncer.sync('act_1', 'adgroups', models.AdGroup, limit=25)
+        ok_(result == {'full': False, 'pages': 1, 'fetched': 2, 'changed': 2, 'watermark': 1393632120})
+        ok_(self.server.graph.stats()['GET act_{id}/adgroups']['objects'] == 2)
+        stored = dict((str(obj['id']), obj) for obj in self.syncer.store.get_objects('act_1', 'adgroups'))
+        ok_(len(stored) == 60 and stored[ids[5]]['name'] == u'renamed' and stored[ids[6]]['adgroup_status'] == u'DELETED')
+
+    def test_string_fields(self):
+        sent = []
+
+        class RecordingPyFacebook(PyFacebook):
+            def get(self, *args, **kwargs):
+                sent.append(kwargs.get('fields'))
+                return super(RecordingPyFacebook, self).get(*args, **kwargs)
+
+        pyfb = RecordingPyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        syncer = IncrementalSync(pyfb, overlap=0)
+        ok_(syncer.sync('act_1', 'adgroups', models.AdGroup, fields='id,name')['changed'] == 60)
+        ok_(sent[-1] == ['id', 'name', 'updated_time'])
+        obj = syncer.store.get_objects('act_1', 'adgroups')[0]
+        ok_(set(obj) == set(['id', 'name', 'updated_time']))
+
+        self.clock.now += 120
+        self.pyfb.call_graph_api(str(obj['id']), http_method='POST', params={'name': u'renamed'})
+        ok_(syncer.sync('act_1', 'adgroups', models.AdGroup, fields='id,name')['changed'] == 1)
+
+        ok_(syncer.sync('act_1', 'adcampaigns', models.AdCampaign, fields='status')['changed'] == 2)
+        ok_(sent[-1] == ['id', 'name', 'account_id', 'campaign_status', 'updated_time'])
+
+    def test_full_resync(self):
+        store = MemorySyncStore()
+        store.replace('act_1', 'adgroups', [{'id': 1234, 'updated_time': 0}])
+        store.set_state('act_1', 'adgroups', {'watermark': 1393632000, 'full_synced_at': 0})
+        syncer = IncrementalSync(self.pyfb, store=store, full_resync_interval=3600)
+        ok_(syncer.sync('act_1', 'adgroups', models.AdGroup)['full'])
+        ids = [str(obj['id']) for obj in store.get_objects('act_1', 'adgroups')]
+        ok_(len(ids) == 60 and '1234' not in ids)
+        ok_(not syncer.sync('act_1', 'adgroups', models.AdGroup)['full'])
+        ok_(syncer.sync('act_1', 'adgroups', models.AdGroup, force_full=True)['full'])
+
+    def test_sync_account(self):
+        results = self.syncer.sync_account('act_1')
+        ok_(set(results) == set(['adgroups', 'adcampaigns']) and results['adcampaigns']['changed'] == 2)
+        ok_(len(self.syncer.store.get_objects('act_1', 'adcampaigns')) == 2)
+        ok_(self.syncer.store.get_state('act_1', 'adcampaigns')['watermark'] == 1393631940)
+        ok_(self.syncer.store.get_state('act_2', 'adcampaigns') is None)
+
+    def test_to_timestamp(self):
+        ok_(to_timestamp(None) is None and to_timestamp('') is None and to_timestamp(1393632000) == 1393632000)
+        ok_(to_timestamp('2014-03-01T00:00:00+0000') == 1393632000)
+        ok_(to_timestamp('2014-03-01T01:00:00+0100') == 1393632000)
+        ok_(to_timestamp('2014-03-01T00:00:00') == 1393632000)
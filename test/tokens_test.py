@@ -0,0 +1,62 @@
+import time
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import PyFacebook
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.tokens import(
+    TokenCache,
+    token_key,
+)
+
+
+class TokenCacheTest(unittest.TestCase):
+    """ Tests the caching of validated tokens. """
+
+    def setUp(self):
+        self.server = FakeGraphServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def debug_token_calls(self):
+        return self.server.graph.stats().get('GET debug_token', {}).get('requests', 0)
+
+    def test_no_cache_by_default(self):
+        PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url)
+        ok_(self.debug_token_calls() == 2)
+
+    def test_cached(self):
+        cache = TokenCache()
+        PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, token_cache=cache)
+        pyfb = PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, token_cache=cache)
+        ok_(self.debug_token_calls() == 1)
+        ok_(pyfb.access_token.is_valid)
+
+    def test_keyed_by_graph_url_and_app(self):
+        cache = TokenCache()
+        PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url, token_cache=cache)
+        PyFacebook(token_text='fake-token', facebook_graph_url=self.server.url.replace('127.0.0.1', 'localhost'),
+                   token_cache=cache)
+        PyFacebook(app_id='1', token_text='fake-token', facebook_graph_url=self.server.url, token_cache=cache)
+        ok_(self.debug_token_calls() == 3)
+        ok_(token_key('token', 'https://graph.facebook.com', '1') != token_key('token', 'https://graph.facebook.com', '2'))
+
+    def test_max_age(self):
+        cache = TokenCache(max_age=60)
+        ok_(cache.max_age == 60 and TokenCache().max_age)
+        cache.set('token', {'is_valid': True, 'app_id': u'1'})
+        ok_(cache.get('token')['text'] == 'token')
+        entry_time = time.time() - 120
+        cache = TokenCache(max_age=60)
+        cache.set('token', {'is_valid': True})
+        cache._TokenCache__entries[token_key('token')]['cached_at'] = entry_time
+        ok_(cache.get('token') is None)
+
+    def test_expiring_and_invalid_tokens(self):
+        cache = TokenCache(expiry_margin=3600)
+        cache.set('expiring', {'is_valid': True, 'expires_at': time.time() + 60})
+        cache.set('invalid', {'is_valid': False})
+        ok_(cache.get('expiring') is None)
+        ok_(cache.get('invalid') is None)
@@ -0,0 +1,84 @@
+import datetime
+import unittest
+import warnings
+
+import pytz
+from nose.tools import ok_
+from pyfacebook import(
+    models,
+    PyFacebook,
+)
+from pyfacebook.fakegraph import FakeGraphServer
+from pyfacebook.utils import(
+    EncodedParam,
+    build_endpoint,
+    default_fields,
+    encode_params,
+    request_template,
+)
+
+
+class EncodeParamsTest(unittest.TestCase):
+    """ Tests the encoding of Graph API params. """
+
+    def encode(self, params):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            encoded = encode_params(params)
+        return encoded, caught
+
+    def test_not_mutated(self):
+        params = {'name': u'x', 'targeting': {'countries': ['US']}, 'ids': [1, 2], 'shared': EncodedParam({'a': 1})}
+        encoded, caught = self.encode(params)
+        ok_(encoded == {'name': u'x', 'targeting': '{"countries": ["US"]}', 'ids': '[1, 2]', 'shared': '{"a": 1}'})
+        ok_(params['targeting'] == {'countries': ['US']} and not caught)
+
+    def test_datetimes(self):
+        utc = datetime.datetime(2014, 3, 1, 10, tzinfo=pytz.utc)
+        encoded, caught = self.encode({'start_time': utc, 'day': datetime.date(2014, 3, 1)})
+        ok_(encoded == {'start_time': '2014-03-01T10:00:00+00:00', 'day': '2014-03-01T00:00:00+00:00'})
+        ok_(len(caught) == 1)
+
+    def test_datetime_list_warns_once(self):
+        eastern = pytz.timezone('US/Eastern')
+        values = [datetime.datetime(2014, 3, 1, 10, tzinfo=pytz.utc), datetime.datetime(2014, 3, 1, 10),
+                  eastern.localize(datetime.datetime(2014, 3, 1, 5)), datetime.date(2014, 3, 2)]
+        encoded, caught = self.encode({'time_ranges': values})
+        ok_(encoded['time_ranges'] == '["2014-03-01T10:00:00+00:00", "2014-03-01T10:00:00+00:00", '
+                                      '"2014-03-01T10:00:00+00:00", "2014-03-02T00:00:00+00:00"]')
+        ok_(len(caught) == 1)
+        encoded, caught = self.encode({'time_ranges': values[:1] * 3})
+        ok_(not caught)
+
+
+class RequestTemplateTest(unittest.TestCase):
+    """ Tests the per-model request templates. """
+
+    def test_templates(self):
+        template = request_template(models.AdImage)
+        ok_(request_template(models.AdImage) is template and template.model is models.AdImage)
+        ok_(template.fields == ('hash', 'url') and template.fields_param == '["hash", "url"]')
+        ok_(template.endpoint == 'adimage' and template.connection == 'adimages')
+        ok_(request_template(models.AdCampaign).connection == 'adcampaigns')
+        ok_(default_fields(models.AdUser) == ['id', 'permissions'])
+
+    def test_build_endpoint(self):
+        ok_(build_endpoint(models.AdGroup) == 'adgroup')
+        ok_(build_endpoint(models.AdGroup, id='act_1', connection='adgroups') == 'act_1/adgroups')
+        ok_(build_endpoint(models.AdGroup, id=6010000000000L) == '6010000000000')
+
+    def test_default_fields_sent(self):
+        sent = []
+
+        class RecordingPyFacebook(PyFacebook):
+            def call_graph_api(self, endpoint, params=None, **kwargs):
+                sent.append((endpoint, dict(params or {})))
+                return super(RecordingPyFacebook, self).call_graph_api(endpoint, params=params, **kwargs)
+
+        with FakeGraphServer(campaigns_per_account=1, adgroups_per_campaign=1, creatives_per_account=1) as server:
+            pyfb = RecordingPyFacebook(token_text='fake-token', facebook_graph_url=server.url)
+            del sent[:]
+            ok_(pyfb.get(models.AdCampaign, 'act_1', 'adcampaigns')['data'][0].name)
+            pyfb.post(models.AdCampaign, id='act_1', name=u'posted', campaign_status=1)
+        ok_(sent[0] == ('act_1/adcampaigns', {'fields': request_template(models.AdCampaign).fields_param}))
+        ok_(sent[1][0] == 'act_1/adcampaigns' and 'fields' not in sent[1][1])
@@ -0,0 +1,115 @@
+import datetime
+import unittest
+
+from nose.tools import ok_
+from pyfacebook import models
+from pyfacebook.projection import partial_model
+
+# Values of every shape Facebook sends, and some it doesn't
+VALUES = [1, 10L, True, 1.5, 'str', u'unicode', None, datetime.datetime(2014, 1, 1), [1], [10L], [u'a'], ['a'],
+          [{u'k': 1}], {u'k': 1L}, {u'k': 1}, {u'k': u'v'}, {'k': 'v'}, {u'k': True}]
+
+
+def baseline_validate(value, allowed_types):
+    """ The type check AdBase.__setattr__ made before validators were compiled, kept as it was. """
+    if long in allowed_types:
+        allowed_types.append(int)
+
+    if isinstance(value, str):
+        value = unicode(value)
+
+    if isinstance(value, dict):
+        new_val = {}
+        for k, v in value.iteritems():
+            if type(k) == str:
+                k = unicode(k)
+            elif type(v) == str:
+                v = unicode(v)
+            new_val[k] = v
+        dict_validator = [x for x in allowed_types if type(x) == dict][0]
+        key_type = dict_validator.keys()[0]
+        val_type = dict_validator.values()[0]
+        if key_type == type(new_val.keys()[0]) and val_type == type(new_val.values()[0]):
+            return True
+
+    if isinstance(allowed_types, list):
+        if len(allowed_types) > 1:
+            if type(value) in tuple(allowed_types):
+                return True
+        else:
+            if not isinstance(allowed_types[0], list):
+                if isinstance(value, allowed_types[0]):
+                    return True
+            else:
+                whole_list_validator = []
+                for v in value:
+                    if isinstance(v, allowed_types[0][0]):
+                        whole_list_validator.append(True)
+                    else:
+                        whole_list_validator.append(False)
+                if True in whole_list_validator:
+                    return True
+
+
+def baseline_accepts(field_def, value):
+    if type(value) in (int, long) and datetime.datetime in field_def.allowed_types:
+        value = datetime.datetime.fromtimestamp(value)
+    try:
+        # The baseline appended to allowed_types, so it is given a copy
+        return bool(baseline_validate(value, list(field_def.allowed_types)))
+    except Exception:
+        return False
+
+
+def accepts(model, title, value):
+    try:
+        model.FIELD_VALIDATORS[title](value)
+        return True
+    except ValueError:
+        return False
+
+
+def adbase_models():
+    return [val for val in vars(models).values() if isinstance(val, type) and issubclass(val, models.AdBase) and val.FIELD_DEFS]
+
+
+def is_long_container(field_def, value):
+    """ Lists and dicts of ints for long fields, which the baseline wrongly rejected. """
+    containers = [t[0] if isinstance(t, list) else t.values()[0] for t in field_def.allowed_types if isinstance(t, (list, dict))]
+    items = value if isinstance(value, list) else value.values() if isinstance(value, dict) else []
+    return long in containers and any(type(item) is int for item in items)
+
+
+class CompiledValidatorTest(unittest.TestCase):
+    """ Tests the compiled AdBase field validators against the validation they replaced. """
+
+    def test_same_as_baseline(self):
+        for model in adbase_models():
+            for field_def in model.FIELD_DEFS:
+                for value in VALUES:
+                    if is_long_container(field_def, value):
+                        continue
+                    ok_(accepts(model, field_def.title, value) == baseline_accepts(field_def, value),
+                        (model.__name__, field_def.title, value))
+
+    def test_choices_not_enforced(self):
+        ok_(models.AdCreative(type=999).type == 999)
+
+    def test_choices_enforced(self):
+        class StrictAdCreative(models.AdCreative):
+            ENFORCE_CHOICES = True
+
+        ok_(StrictAdCreative(type=1).type == 1)
+        self.assertRaises(ValueError, StrictAdCreative, type=999)
+        self.assertRaises(ValueError, partial_model(StrictAdCreative, set(['id', 'type'])), type=999)
+        ok_(partial_model(models.AdCreative, set(['id', 'type']))(type=999).type == 999)
+
+    def test_intended_differences(self):
+        # Every element of a list is checked, not just one
+        self.assertRaises(ValueError, models.AdGroup, creative_ids=[1, u'a'])
+        ok_(not baseline_accepts(models.AdGroup.FIELD_DEFS_BY_TITLE['creative_ids'], []))
+        ok_(models.AdGroup(creative_ids=[]).creative_ids == [])
+        # Ints are longs, however they are nested
+        ok_(models.AdGroup(creative_ids=[1]).creative_ids == [1])
+        # Date strings are parsed
+        ok_(models.AdGroup(created_time=u'2014-03-01T10:00:00+0000').created_time.year == 2014)